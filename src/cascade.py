@@ -0,0 +1,52 @@
+# cascade.py
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .endpoints import recognition_capacity
+
+# Pages recognized per model, for tuning the cascade split.
+_model_usage: Counter = Counter()
+_model_usage_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CascadeModel:
+    """
+    One tier of the recognition model cascade: a model together with its own
+    concurrency limit and request timeout. Tiers are tried in order; a page
+    moves to the next tier when the escalation rule rejects its result or the
+    request times out.
+    """
+
+    name: str
+    concurrency: int = 4
+    timeout_seconds: Optional[float] = 60.0
+
+
+def resolve_cascade(settings) -> List[CascadeModel]:
+    """
+    Returns the configured cascade, or a single tier made of
+    RECOGNITION_MODEL when RECOGNITION_CASCADE is not set.
+    """
+    if settings.RECOGNITION_CASCADE:
+        return list(settings.RECOGNITION_CASCADE)
+    return [
+        CascadeModel(
+            name=settings.RECOGNITION_MODEL,
+            concurrency=recognition_capacity(settings),
+            timeout_seconds=None,
+        )
+    ]
+
+
+def record_model_usage(model: str):
+    with _model_usage_lock:
+        _model_usage[model] += 1
+
+
+def get_model_usage() -> Dict[str, int]:
+    """Returns the number of pages recognized by each model so far."""
+    with _model_usage_lock:
+        return dict(_model_usage)
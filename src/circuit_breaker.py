@@ -0,0 +1,190 @@
+# circuit_breaker.py
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+from .config import get_settings
+from .exceptions import CircuitOpenError
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_outage_error(error: Exception) -> bool:
+    """
+    Whether an error suggests the dependency is down (connection failures,
+    timeouts, 429 and 5xx responses) rather than a problem with one request.
+    Errors re-raised from another error (`raise ... from`) are judged by it.
+    """
+    import requests
+
+    cause = getattr(error, "__cause__", None)
+    if cause is not None and is_outage_error(cause):
+        return True
+
+    if isinstance(
+        error,
+        (
+            ConnectionError,
+            TimeoutError,
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ),
+    ):
+        return True
+    # Dropbox errors carry `status_code`, Google API errors `resp.status`.
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "resp", None), "status", None)
+    return isinstance(status, int) and (status >= 500 or status == 429)
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing dependency. After `failure_threshold` outage
+    errors in a row the circuit opens and calls fail fast with
+    CircuitOpenError. After `reset_seconds` it is half-open: one probe call
+    is let through, which closes the circuit on success or reopens it on
+    failure. Errors for which `is_failure` is false count as successes, since
+    the dependency did answer.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_seconds: float,
+        is_failure: Callable[[Exception], bool] = is_outage_error,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.is_failure = is_failure
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def _current_state(self) -> str:
+        if (
+            self._state == OPEN
+            and time.monotonic() - self._opened_at >= self.reset_seconds
+        ):
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def rejecting(self) -> bool:
+        """Whether a call made now would be rejected, without making one."""
+        with self._lock:
+            state = self._current_state()
+            return state == OPEN or (state == HALF_OPEN and self._probe_in_flight)
+
+    def before_call(self):
+        """Raises CircuitOpenError unless a call may go ahead now."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logging.info(f"Circuit '{self.name}' is half-open; sending a probe.")
+                return
+        raise CircuitOpenError(
+            f"Circuit '{self.name}' is open; {self.name} looks unavailable."
+        )
+
+    def record_success(self):
+        """Records a call that reached the dependency, closing the circuit."""
+        with self._lock:
+            self._probe_in_flight = False
+            if self._state != CLOSED:
+                logging.info(f"Circuit '{self.name}' closed; {self.name} recovered.")
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self, error: Exception):
+        """Records an outage error, opening the circuit if there were enough."""
+        with self._lock:
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            self._failures += 1
+            if was_probe or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                logging.warning(
+                    f"Circuit '{self.name}' opened after {self._failures} failure(s); "
+                    f"retrying in {self.reset_seconds}s. Last error: {error}"
+                )
+
+    def record_cancelled(self):
+        """Records that a call let through by `before_call` was never made."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record(self, error: Optional[Exception] = None):
+        """Records the outcome of a call let through by `before_call`."""
+        if error is not None and self.is_failure(error):
+            self.record_failure(error)
+        else:
+            self.record_success()
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Runs `fn` through the breaker."""
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(e)
+            raise
+        self.record()
+        return result
+
+
+_recognition_breaker: Optional[CircuitBreaker] = None
+_storage_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def _new_breaker(name: str) -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(
+        name,
+        failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds=settings.CIRCUIT_RESET_SECONDS,
+    )
+
+
+def get_recognition_breaker() -> CircuitBreaker:
+    """
+    Returns the process-wide breaker of the recognition API. The recognition
+    module classifies its own errors and records outcomes explicitly.
+    """
+    global _recognition_breaker
+    with _breakers_lock:
+        if _recognition_breaker is None:
+            _recognition_breaker = _new_breaker("recognition")
+    return _recognition_breaker
+
+
+def get_storage_breaker(route_name: str) -> CircuitBreaker:
+    """
+    Returns the breaker of a route's storage account. Breakers outlive
+    workflow runs, so an open circuit is remembered between polling cycles.
+    """
+    with _breakers_lock:
+        if route_name not in _storage_breakers:
+            _storage_breakers[route_name] = _new_breaker(f"storage:{route_name}")
+        return _storage_breakers[route_name]
@@ -1,11 +1,16 @@
 from pathlib import Path
 from pydantic import Field
 from pydantic_settings import BaseSettings
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
+import dataclasses
 import logging
 from functools import lru_cache
 import os
 
+from .cascade import CascadeModel
+from .endpoints import Endpoint
+from .routes import Route
+
 
 class Settings(BaseSettings):
     """
@@ -17,7 +22,21 @@ class Settings(BaseSettings):
     STORAGE_PROVIDER: str = "dropbox"  # "dropbox" or "gdrive"
     OPENAI_API_KEY: str
     OPENAI_BASE_URL: str
+    # Several OpenAI-compatible hosts to balance recognition requests over, as
+    # a JSON list of objects (name, base_url, api_key, weight, concurrency).
+    # Empty: every request goes to OPENAI_BASE_URL.
+    RECOGNITION_ENDPOINTS: List[Endpoint] = []
+    # An endpoint whose recent error rate exceeds this is ejected for a while.
+    ENDPOINT_MAX_ERROR_RATE: float = 0.5
+    ENDPOINT_EJECTION_SECONDS: float = 30.0
     LOG_LEVEL: str = "INFO"
+    # "text" or "json" (one JSON object per line).
+    LOG_FORMAT: str = "text"
+    # Write log records from a background thread instead of the logging thread.
+    LOG_QUEUE: bool = True
+    # app.log is rotated at this size, keeping LOG_BACKUP_COUNT old files.
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
 
     # --- Dynamic Provider-Specific Settings (set by validator) ---
     SRC_FOLDER: Optional[str] = None
@@ -40,6 +59,11 @@ class Settings(BaseSettings):
     GDRIVE_DEST_FOLDER_ID: Optional[str] = None
     GDRIVE_FAILED_FOLDER_ID: Optional[str] = None
 
+    # --- Multi-Route Settings (optional) ---
+    # A JSON list of routes (provider, credentials, source, dest, failed) served
+    # by one process. When set, it replaces the single-provider settings above.
+    ROUTES: List[Route] = []
+
     # --- AI Settings (must be set in .env) ---
     RECOGNITION_MODEL: str = Field(
         "gemini-pro-vision", validation_alias="RECOGNITION_MODEL"
@@ -48,10 +72,133 @@ class Settings(BaseSettings):
         128 * 1024 * 1024, validation_alias="DROPBOX_UPLOAD_CHUNK_SIZE"
     )  # 128 MB default
     RECOGNITION_PROMPT: str
+    # An ordered JSON list of models (name, concurrency, timeout_seconds), from
+    # fast and cheap to slow and accurate. Empty: RECOGNITION_MODEL only.
+    RECOGNITION_CASCADE: List[CascadeModel] = []
+    # When a page moves to the next model: "quality" (the ESCALATION_* checks
+    # below), "never", or a rule registered with register_escalation_rule.
+    CASCADE_ESCALATION_RULE: str = "quality"
     PDF_DPI: int
+    # Progressive recognition: DPIs to try in ascending order, e.g. [100, 200, 300].
+    # Pages are recognized at the first DPI and re-rasterized at the next one
+    # only when the result looks poor. Empty: every page uses PDF_DPI.
+    PDF_DPI_LADDER: List[int] = []
+    # A result looks poor if it is shorter than this many characters,
+    ESCALATION_MIN_CHARS: int = 20
+    # contains one of these uncertainty markers (case-insensitive),
+    ESCALATION_MARKERS: List[str] = ["[illegible]", "[unclear]", "???"]
+    # or matches this regular expression.
+    ESCALATION_PATTERN: Optional[str] = None
+
+    # Sharding: PDFs with at least this many pages (per pdfinfo) are split into
+    # page ranges of SHARD_PAGES pages, which are rasterized and recognized in
+    # parallel and merged in order. A shard failing with a transient error is
+    # retried on its own up to SHARD_MAX_ATTEMPTS times. 0 disables sharding.
+    SHARD_MIN_PAGES: int = 0
+    SHARD_PAGES: int = 20
+    SHARD_MAX_ATTEMPTS: int = 3
+    # Tiling: a dense page is split into overlapping horizontal bands that are
+    # recognized in parallel and stitched back together. One band per
+    # TILE_DENSITY_PER_BAND of the page covered by ink, up to TILE_MAX_BANDS
+    # (1 disables tiling). Bands overlap by TILE_OVERLAP of their height.
+    TILE_MAX_BANDS: int = 1
+    TILE_DENSITY_PER_BAND: float = 0.04
+    TILE_OVERLAP: float = 0.15
+
+    # Maximum number of in-flight recognition API calls, shared by all routes.
+    RECOGNITION_CONCURRENCY: int = 4
+    # Circuit breakers: after this many outage errors in a row (connection
+    # errors, timeouts, 429 and 5xx responses), calls to the recognition API or
+    # a route's storage fail fast until a probe call succeeds, which is let
+    # through every CIRCUIT_RESET_SECONDS.
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 60.0
+    # Hedged requests: when a page has not been answered within this percentile
+    # of the model's recent latencies, a duplicate request is sent and the first
+    # answer wins. Hedges are capped at HEDGE_BUDGET times the requests sent.
+    HEDGE_REQUESTS: bool = False
+    HEDGE_PERCENTILE: float = 95.0
+    HEDGE_BUDGET: float = 0.05
+    # Never hedge a request earlier than this.
+    HEDGE_MIN_DELAY_SECONDS: float = 2.0
+    # Prices per million prompt and completion tokens by model, as JSON, e.g.
+    # {"gpt-4o": [2.5, 10]}. Used to report the cost of files and runs.
+    TOKEN_PRICES: Dict[str, List[float]] = {}
+    # Recognition requests wait while the tokens spent in the last hour reach
+    # this budget. 0 (or less) disables the budget.
+    TOKEN_BUDGET_PER_HOUR: int = 0
+    # A SQLite file recording the token usage and cost of every processed
+    # file, for totals per route and day.
+    USAGE_DB_PATH: Optional[Path] = None
 
     # --- Workflow Settings (must be set in .env) ---
+    # The longest sleep between runs while no new files arrive. After a run
+    # that found files the sleep drops to POLL_MIN_SECONDS, and each idle run
+    # multiplies it by POLL_BACKOFF until it reaches LOOP_SLEEP_SECONDS.
     LOOP_SLEEP_SECONDS: int
+    POLL_MIN_SECONDS: float = 5.0
+    POLL_BACKOFF: float = 2.0
+    # Files started per run (0 = all). A run that leaves files queued is
+    # followed by the next one without sleeping.
+    MAX_FILES_PER_RUN: int = 0
+    # Port of an embedded HTTP receiver for Dropbox webhooks (POST /dropbox)
+    # and Google Drive push notifications (POST /gdrive). A notification wakes
+    # the main loop at once. Unset: polling only.
+    WEBHOOK_PORT: Optional[int] = None
+    WEBHOOK_HOST: str = "0.0.0.0"
+    # The token Google Drive channels were created with; Drive notifications
+    # without it are rejected. Dropbox webhooks are checked against the app
+    # secrets of the Dropbox routes.
+    WEBHOOK_GDRIVE_TOKEN: Optional[str] = None
+    # Notification bursts are coalesced until none arrived for this long.
+    WEBHOOK_DEBOUNCE_SECONDS: float = 2.0
+    # Number of files processed concurrently across all routes.
+    WORKER_COUNT: int = 4
+    # Maximum number of files of one route processed at the same time. The
+    # remaining workers serve other routes, so no route can take all of them.
+    ROUTE_CONCURRENCY: int = 2
+    # Order of files within a route: "sjf" (shortest job first, by estimated
+    # page count) or "fifo" (listing order).
+    SCHEDULING_POLICY: str = "sjf"
+    # SJF aging: each minute a file waits counts as this many fewer pages, so
+    # large files cannot be starved by a stream of small ones.
+    SCHEDULING_AGING_PAGES_PER_MINUTE: float = 1.0
+
+    # --- Replica Settings (optional) ---
+    # A lock directory shared by all replicas (e.g. a mounted volume). When set,
+    # each file is leased by exactly one replica before it is processed.
+    LEASE_DIR: Optional[Path] = None
+    # Leases expire unless renewed by their owner's heartbeat within this time.
+    LEASE_TTL_SECONDS: int = 300
+    # Maximum time in seconds to wait for the lease directory lock.
+    LOCK_TIMEOUT: int = 5
+
+    # --- Storage Settings ---
+    # How long cached storage metadata (verified folders, destination file
+    # names, parent folders) is trusted before it is fetched again.
+    METADATA_CACHE_TTL_SECONDS: int = 600
+    # Collect source deletes and quarantine moves during a run and submit them
+    # in batches at its end, instead of one API call per file.
+    DEFER_STORAGE_OPS: bool = False
+
+    # Files up to this size (bytes) are processed entirely in memory, without
+    # working files. 0 disables the in-memory path.
+    IN_MEMORY_MAX_BYTES: int = 20 * 1024 * 1024
+    # A SQLite file remembering each processed file's output by the provider's
+    # content hash. A later file with the same content reuses that output
+    # (copied under its own name) and is deleted without being downloaded.
+    DEDUP_INDEX_PATH: Optional[Path] = None
+    # A SQLite file recording every processed file by ID and revision. A file
+    # still listed after processing (its delete failed) is not recognized
+    # again; only the delete is retried. Put it on a persistent volume.
+    LEDGER_PATH: Optional[Path] = None
+
+    # --- Spool Settings ---
+    # Disk space (bytes) the local working files of in-flight jobs may use;
+    # new downloads wait while it is exhausted. 0 disables the limit.
+    SPOOL_QUOTA_BYTES: int = 2 * 1024 * 1024 * 1024
+    # Keep working files on tmpfs (/dev/shm) instead of LOCAL_BUF_DIR.
+    SPOOL_USE_TMPFS: bool = False
 
     # --- Constants and Computed Paths ---
     BASE_DIR: Path = Path(__file__).resolve().parent.parent  # Project root
@@ -99,30 +246,86 @@ class Settings(BaseSettings):
         else:
             raise ValueError("Invalid STORAGE_PROVIDER. Must be 'dropbox' or 'gdrive'.")
 
+    def _resolve_dropbox_refresh_token(self) -> str:
+        """Returns the Dropbox refresh token from the environment or the token file."""
+        env_token = os.getenv("DROPBOX_REFRESH_TOKEN")
+        if env_token:
+            logging.debug("Using Dropbox token from environment variable.")
+            return env_token
+        elif self.TOKEN_STORAGE_FILE.is_file():
+            self.DROPBOX_REFRESH_TOKEN_FILE = (
+                self.TOKEN_STORAGE_FILE.read_text().strip()
+            )
+            logging.info(f"Loaded Dropbox refresh token from {self.TOKEN_STORAGE_FILE}")
+            return self.DROPBOX_REFRESH_TOKEN_FILE
+        else:
+            raise ValueError(
+                "Dropbox refresh token not found in DROPBOX_REFRESH_TOKEN env var or in .dropbox.token file. "
+                "Please run `python src/auth.py` to generate one."
+            )
+
+    def _validate_routes(self) -> None:
+        names = [route.name for route in self.ROUTES]
+        if len(names) != len(set(names)):
+            raise ValueError("Route names in ROUTES must be unique.")
+
+        resolved_routes = []
+        for route in self.ROUTES:
+            if route.provider == "dropbox":
+                if not route.dropbox_app_key or not route.dropbox_app_secret:
+                    raise ValueError(
+                        f"Route '{route.name}': for Dropbox, dropbox_app_key and dropbox_app_secret must be set."
+                    )
+                if route.source is None or not route.dest or not route.failed:
+                    raise ValueError(
+                        f"Route '{route.name}': source (can be empty for root), dest and failed must be set."
+                    )
+                if not route.dropbox_refresh_token:
+                    # Fall back to the shared token (env var or .dropbox.token file)
+                    route = dataclasses.replace(
+                        route,
+                        dropbox_refresh_token=self._resolve_dropbox_refresh_token(),
+                    )
+            elif route.provider == "gdrive":
+                if not all(
+                    [
+                        route.gdrive_credentials_json,
+                        route.gdrive_token_json,
+                        route.source,
+                        route.dest,
+                        route.failed,
+                    ]
+                ):
+                    raise ValueError(
+                        f"Route '{route.name}': for Google Drive, credentials, token and all folder IDs must be set."
+                    )
+            else:
+                raise ValueError(
+                    f"Route '{route.name}': invalid provider. Must be 'dropbox' or 'gdrive'."
+                )
+            resolved_routes.append(route)
+        self.ROUTES = resolved_routes
+
     def model_post_init(self, __context: Any) -> None:
         """Load Dropbox token from file if it exists and run validations."""
+        if any(
+            dpi <= 0 for dpi in self.PDF_DPI_LADDER
+        ) or self.PDF_DPI_LADDER != sorted(set(self.PDF_DPI_LADDER)):
+            raise ValueError(
+                "PDF_DPI_LADDER must list distinct positive DPIs in ascending order."
+            )
+
+        # A route list replaces the single-provider settings entirely.
+        if self.ROUTES:
+            self._validate_routes()
+            return
+
         # Ensure base directories are set first
         self._set_provider_folders()
 
         # Centralize Dropbox token resolution and validation
         if self.STORAGE_PROVIDER == "dropbox":
-            env_token = os.getenv("DROPBOX_REFRESH_TOKEN")
-            if env_token:
-                self.DROPBOX_REFRESH_TOKEN = env_token
-                logging.debug("Using Dropbox token from environment variable.")
-            elif self.TOKEN_STORAGE_FILE.is_file():
-                self.DROPBOX_REFRESH_TOKEN_FILE = (
-                    self.TOKEN_STORAGE_FILE.read_text().strip()
-                )
-                self.DROPBOX_REFRESH_TOKEN = self.DROPBOX_REFRESH_TOKEN_FILE
-                logging.info(
-                    f"Loaded Dropbox refresh token from {self.TOKEN_STORAGE_FILE}"
-                )
-            else:
-                raise ValueError(
-                    "Dropbox refresh token not found in DROPBOX_REFRESH_TOKEN env var or in .dropbox.token file. "
-                    "Please run `python src/auth.py` to generate one."
-                )
+            self.DROPBOX_REFRESH_TOKEN = self._resolve_dropbox_refresh_token()
 
     @property
     def FONT_PATH(self) -> Path:
@@ -142,7 +345,21 @@ def get_settings() -> Settings:
     settings = Settings()
     logging.info("--- Loaded Application Settings ---")
     for key, value in settings.model_dump().items():
-        if any(s in key.lower() for s in ["key", "secret", "token"]):
+        if key == "ROUTES":
+            # Routes carry credentials, so only their folders are logged.
+            for route in value:
+                logging.info(
+                    f"ROUTE {route['name']} ({route['provider']}): "
+                    f"{route['source']!r} -> {route['dest']!r}, failed: {route['failed']!r}"
+                )
+        elif key == "RECOGNITION_ENDPOINTS":
+            # Endpoints may carry their own API keys.
+            for endpoint in value:
+                logging.info(
+                    f"ENDPOINT {endpoint['name']}: {endpoint['base_url']!r}, "
+                    f"weight: {endpoint['weight']}, concurrency: {endpoint['concurrency']}"
+                )
+        elif any(s in key.lower() for s in ["key", "secret", "token"]):
             logging.info(f"{key}: **********")
         else:
             logging.info(f"{key}: {value}")
@@ -1,13 +1,43 @@
 # dbox.py
 import dropbox
-from dropbox.files import WriteMode, CommitInfo, FileMetadata as DropboxFileMetadata
+from dropbox.files import (
+    WriteMode,
+    CommitInfo,
+    DeleteArg,
+    RelocationPath,
+    FileMetadata as DropboxFileMetadata,
+)
 from dropbox.exceptions import ApiError
+import hashlib
+import io
 import logging
 import os
+import threading
+import time
+from datetime import timezone
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Tuple
 from .config import get_settings
+from .exceptions import PermanentError, TransientError
 from .storage.base import StorageClient
+from .storage.cache import get_metadata_cache
 from .storage.dto import FileMetadata  # Our custom DTO
 
+# Dropbox accepts at most 1000 entries per batch call.
+BATCH_MAX_ENTRIES = 1000
+# Async batch jobs are polled with exponential backoff up to this interval...
+BATCH_POLL_INTERVAL = 0.5
+BATCH_POLL_MAX_INTERVAL = 5.0
+# ...and given up on (to be retried next cycle) after this many seconds.
+BATCH_POLL_TIMEOUT = 300.0
+
+
+def _batch_entry_error(action: str, path: str, failure) -> Exception:
+    """Wraps the failure of one batch entry in the app's error types."""
+    message = f"Failed to {action} '{path}' in a batch: {failure}"
+    if failure.is_too_many_write_operations():
+        return TransientError(message)
+    return PermanentError(message)
+
 
 class DropboxClient(StorageClient):
     """
@@ -16,13 +46,29 @@ class DropboxClient(StorageClient):
 
     def __init__(self, app_key, app_secret, refresh_token):
         try:
-            self.dbx = dropbox.Dropbox(
+            # One HTTP session (a thread-safe connection pool with keep-alive)
+            # is shared by all threads, sized so every worker gets a connection.
+            self._session = dropbox.create_session(
+                max_connections=max(8, get_settings().WORKER_COUNT)
+            )
+            # The root client owns the refresh token; it is the only one that
+            # refreshes the access token. Worker threads get their own clients.
+            self._root = dropbox.Dropbox(
                 app_key=app_key,
                 app_secret=app_secret,
                 oauth2_refresh_token=refresh_token,
+                session=self._session,
             )
+            self._token_lock = threading.Lock()
+            self._local = threading.local()
             # Verify successful authentication by requesting current user info
-            self.dbx.users_get_current_account()
+            self._root.users_get_current_account()
+            # Paths are only unique per account, so cache keys are namespaced
+            # by a digest of the credentials.
+            self.cache = get_metadata_cache()
+            self._cache_namespace = hashlib.sha256(
+                f"{app_key}:{refresh_token}".encode("utf-8")
+            ).hexdigest()[:16]
             logging.info("Dropbox client initialized successfully.")
         except Exception as e:
             logging.error(
@@ -30,110 +76,165 @@ class DropboxClient(StorageClient):
             )
             raise
 
-    def list_files(self, folder_id: str):
+    @property
+    def dbx(self) -> dropbox.Dropbox:
+        """
+        The Dropbox client of the calling thread. The access token is refreshed
+        once, under a lock, and handed to the per-thread clients, which share
+        the connection pool but no mutable state.
+        """
+        with self._token_lock:
+            self._root.check_and_refresh_access_token()
+            # The SDK has no public accessor for the current access token.
+            access_token = self._root._oauth2_access_token
+        local = self._local
+        if getattr(local, "access_token", None) != access_token:
+            local.dbx = dropbox.Dropbox(
+                oauth2_access_token=access_token, session=self._session
+            )
+            local.access_token = access_token
+        return local.dbx
+
+    def list_files(self, folder_id: str) -> Iterator[FileMetadata]:
         """
-        Returns a list of all files in the specified Dropbox directory,
-        handling pagination automatically.
+        Yields the PDF files in the specified Dropbox directory, one listing
+        page at a time, so callers can start on the first page while the
+        rest is fetched. Folders and other files are skipped before they are
+        converted.
         """
         try:
             logging.info(f"Listing files in Dropbox path: '{folder_id}'")
             result = self.dbx.files_list_folder(folder_id)  # Non-recursive
-            all_entries = result.entries
-            while result.has_more:
+            while True:
+                for entry in result.entries:
+                    if isinstance(
+                        entry, DropboxFileMetadata
+                    ) and entry.name.lower().endswith(".pdf"):
+                        yield self._to_dto(entry)
+                if not result.has_more:
+                    return
                 logging.info("Found more files, continuing listing...")
                 result = self.dbx.files_list_folder_continue(result.cursor)
-                all_entries.extend(result.entries)
-
-            # Convert Dropbox metadata to our standardized DTO
-            file_dtos = []
-            for entry in all_entries:
-                if isinstance(entry, DropboxFileMetadata):
-                    file_dtos.append(
-                        FileMetadata(
-                            id=entry.path_display,
-                            name=entry.name,
-                            path=entry.path_display,
-                            folder_id=os.path.dirname(entry.path_display),
-                        )
-                    )
-            return file_dtos
         except ApiError as e:
             logging.error(f"Failed to list files in Dropbox path '{folder_id}': {e}")
-            return []
+
+    @staticmethod
+    def _to_dto(entry: DropboxFileMetadata) -> FileMetadata:
+        """Converts Dropbox file metadata to our standardized DTO."""
+        return FileMetadata(
+            id=entry.path_display,
+            name=entry.name,
+            path=entry.path_display,
+            folder_id=os.path.dirname(entry.path_display),
+            size=entry.size,
+            # The SDK returns naive datetimes in UTC
+            modified=entry.server_modified.replace(tzinfo=timezone.utc)
+            if entry.server_modified
+            else None,
+            content_hash=entry.content_hash,
+            revision=entry.rev,
+        )
 
     def download_file(self, file_id: str, local_path: str):
         """Downloads a file from Dropbox to the local filesystem."""
         try:
-            logging.info(f"Downloading {file_id} to {local_path}...")
+            logging.info("Downloading %s to %s...", file_id, local_path)
             self.dbx.files_download_to_file(str(local_path), file_id)
         except ApiError as e:
             logging.error(f"Failed to download file '{file_id}': {e}")
             raise
 
-    def upload_file(self, local_path: str, folder_id: str, filename: str):
-        """Uploads a local file to Dropbox using chunked uploading for efficiency."""
-        settings = get_settings()
-        chunk_size = settings.DROPBOX_UPLOAD_CHUNK_SIZE
+    def download_bytes(self, file_id: str) -> bytes:
+        """Downloads a file from Dropbox into memory."""
+        try:
+            logging.info("Downloading %s into memory...", file_id)
+            _, response = self.dbx.files_download(file_id)
+            try:
+                return response.content
+            finally:
+                response.close()
+        except ApiError as e:
+            logging.error(f"Failed to download file '{file_id}': {e}")
+            raise
+
+    def upload_file(self, local_path: str, folder_id: str, filename: str) -> str:
+        """
+        Uploads a local file to Dropbox using chunked uploading for efficiency.
+        Returns the path of the uploaded file.
+        """
         remote_path = f"{folder_id}/{filename}".replace(
             "//", "/"
         )  # Handle root folder case
 
         file_size = local_path.stat().st_size
+        with open(local_path, "rb") as f:
+            self._upload_stream(f, file_size, remote_path, local_path)
+        return remote_path
+
+    def upload_bytes(self, data: bytes, folder_id: str, filename: str) -> str:
+        """Uploads in-memory content to Dropbox. Returns the uploaded file's path."""
+        remote_path = f"{folder_id}/{filename}".replace("//", "/")
+        self._upload_stream(io.BytesIO(data), len(data), remote_path, "memory")
+        return remote_path
+
+    def _upload_stream(self, f: BinaryIO, file_size: int, remote_path: str, source):
+        """Uploads a binary stream, in chunks if it is larger than a chunk."""
+        settings = get_settings()
+        chunk_size = settings.DROPBOX_UPLOAD_CHUNK_SIZE
+
         if file_size < chunk_size:
             # If file is smaller than chunk size, use a single upload
-            with open(local_path, "rb") as f:
-                try:
-                    logging.info(
-                        f"Uploading {local_path} to {remote_path} (single upload)..."
-                    )
-                    self.dbx.files_upload(
-                        f.read(), remote_path, mode=WriteMode("overwrite")
-                    )
-                except ApiError as e:
-                    logging.error(f"Failed to upload file to '{remote_path}': {e}")
-                    raise
+            try:
+                logging.info(
+                    "Uploading %s to %s (single upload)...", source, remote_path
+                )
+                self.dbx.files_upload(
+                    f.read(), remote_path, mode=WriteMode("overwrite")
+                )
+            except ApiError as e:
+                logging.error(f"Failed to upload file to '{remote_path}': {e}")
+                raise
         else:
             # Use chunked upload for larger files
-            with open(local_path, "rb") as f:
-                try:
-                    logging.info(
-                        f"Starting chunked upload for {local_path} to {remote_path}..."
-                    )
-                    upload_session_start_result = self.dbx.files_upload_session_start(
-                        f.read(chunk_size)
-                    )
-                    cursor = dropbox.files.UploadSessionCursor(
-                        session_id=upload_session_start_result.session_id,
-                        offset=f.tell(),
-                    )
-                    commit_info = CommitInfo(
-                        path=remote_path, mode=WriteMode("overwrite")
-                    )
-
-                    while f.tell() < file_size:
-                        next_chunk = f.read(chunk_size)
-                        if (file_size - f.tell()) <= chunk_size:
-                            # Last chunk
-                            logging.info(f"Uploading final chunk for {remote_path}...")
-                            self.dbx.files_upload_session_finish(
-                                next_chunk, cursor, commit_info
-                            )
-                        else:
-                            # Middle chunk
-                            logging.info(
-                                f"Uploading chunk for {remote_path} (offset: {f.tell()})..."
-                            )
-                            self.dbx.files_upload_session_append_v2(next_chunk, cursor)
-                            cursor.offset = f.tell()
-                    logging.info(f"Chunked upload completed for {remote_path}.")
-                except ApiError as e:
-                    logging.error(
-                        f"Failed to upload file to '{remote_path}' using chunked upload: {e}"
-                    )
-                    raise
+            try:
+                logging.info(
+                    "Starting chunked upload for %s to %s...", source, remote_path
+                )
+                upload_session_start_result = self.dbx.files_upload_session_start(
+                    f.read(chunk_size)
+                )
+                cursor = dropbox.files.UploadSessionCursor(
+                    session_id=upload_session_start_result.session_id,
+                    offset=f.tell(),
+                )
+                commit_info = CommitInfo(path=remote_path, mode=WriteMode("overwrite"))
 
-    def move_file(self, file_id: str, to_folder_id: str):
-        """Moves a file within Dropbox."""
+                while f.tell() < file_size:
+                    next_chunk = f.read(chunk_size)
+                    if (file_size - f.tell()) <= chunk_size:
+                        # Last chunk
+                        logging.info("Uploading final chunk for %s...", remote_path)
+                        self.dbx.files_upload_session_finish(
+                            next_chunk, cursor, commit_info
+                        )
+                    else:
+                        # Middle chunk
+                        logging.info(
+                            "Uploading chunk for %s (offset: %d)...",
+                            remote_path,
+                            f.tell(),
+                        )
+                        self.dbx.files_upload_session_append_v2(next_chunk, cursor)
+                        cursor.offset = f.tell()
+                logging.info("Chunked upload completed for %s.", remote_path)
+            except ApiError as e:
+                logging.error(
+                    f"Failed to upload file to '{remote_path}' using chunked upload: {e}"
+                )
+                raise
+
+    def move_file(self, file_id: str, to_folder_id: str, from_folder_id=None):
+        """Moves a file within Dropbox. Paths identify files, so from_folder_id is unused."""
         try:
             filename = os.path.basename(file_id)
             to_path = f"{to_folder_id}/{filename}".replace("//", "/")
@@ -143,6 +244,30 @@ class DropboxClient(StorageClient):
             logging.error(f"Failed to move file from '{file_id}' to '{to_path}': {e}")
             raise
 
+    def copy_file(self, file_id: str, to_folder_id: str, filename: str) -> str:
+        """
+        Copies a file within Dropbox, replacing a file of the same name in the
+        destination. Returns the path of the copy. A file that is already at
+        the destination is only checked to still exist.
+        """
+        to_path = f"{to_folder_id}/{filename}".replace("//", "/")
+        try:
+            if to_path.lower() == file_id.lower():
+                self.dbx.files_get_metadata(file_id)
+                return file_id
+            logging.info(f"Copying {file_id} to {to_path}...")
+            try:
+                self.dbx.files_copy_v2(file_id, to_path)
+            except ApiError as e:
+                if not (e.error.is_to() and e.error.get_to().is_conflict()):
+                    raise
+                self.dbx.files_delete_v2(to_path)
+                self.dbx.files_copy_v2(file_id, to_path)
+            return to_path
+        except ApiError as e:
+            logging.error(f"Failed to copy file from '{file_id}' to '{to_path}': {e}")
+            raise
+
     def delete_file(self, file_id: str):
         """Deletes a file or folder in Dropbox."""
         try:
@@ -152,6 +277,106 @@ class DropboxClient(StorageClient):
             logging.error(f"Failed to delete path '{file_id}': {e}")
             raise
 
+    def _wait_for_batch(self, launch, check: Callable):
+        """
+        Returns the result of a batch call, polling its async job to completion
+        if Dropbox did not finish it synchronously.
+        """
+        if launch.is_complete():
+            return launch.get_complete()
+        if not launch.is_async_job_id():
+            raise TransientError(f"Unexpected Dropbox batch launch result: {launch}")
+
+        job_id = launch.get_async_job_id()
+        deadline = time.monotonic() + BATCH_POLL_TIMEOUT
+        interval = BATCH_POLL_INTERVAL
+        while True:
+            status = check(job_id)
+            if status.is_complete():
+                return status.get_complete()
+            # Only the delete job status has a failed state.
+            if getattr(status, "is_failed", lambda: False)():
+                raise TransientError(
+                    f"Dropbox batch job {job_id} failed: {status.get_failed()}"
+                )
+            if time.monotonic() >= deadline:
+                raise TransientError(
+                    f"Dropbox batch job {job_id} did not finish in {BATCH_POLL_TIMEOUT:.0f} seconds."
+                )
+            time.sleep(interval)
+            interval = min(interval * 2, BATCH_POLL_MAX_INTERVAL)
+
+    def delete_files(self, file_ids: Iterable[str]) -> Dict[str, Optional[Exception]]:
+        """
+        Deletes several files with `files_delete_batch`, polling the async job
+        and reporting the outcome of every entry. Paths that are already gone
+        count as deleted.
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        outcomes: Dict[str, Optional[Exception]] = {}
+        for start in range(0, len(file_ids), BATCH_MAX_ENTRIES):
+            chunk = file_ids[start : start + BATCH_MAX_ENTRIES]
+            try:
+                logging.info(f"Deleting {len(chunk)} file(s) in a batch...")
+                launch = self.dbx.files_delete_batch(
+                    [DeleteArg(path) for path in chunk]
+                )
+                result = self._wait_for_batch(launch, self.dbx.files_delete_batch_check)
+            except Exception as e:
+                logging.error(f"Failed to delete a batch of {len(chunk)} file(s): {e}")
+                outcomes.update({path: e for path in chunk})
+                continue
+
+            for path, entry in zip(chunk, result.entries):
+                error = None
+                if entry.is_failure():
+                    failure = entry.get_failure()
+                    if (
+                        failure.is_path_lookup()
+                        and failure.get_path_lookup().is_not_found()
+                    ):
+                        logging.warning(f"Path '{path}' not found. Nothing to delete.")
+                    else:
+                        error = _batch_entry_error("delete", path, failure)
+                        logging.error(str(error))
+                outcomes[path] = error
+        return outcomes
+
+    def move_files(
+        self, moves: Iterable[Tuple[str, str, Optional[str]]]
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        Moves several files with `files_move_batch_v2`, polling the async job
+        and reporting the outcome of every entry.
+        """
+        relocations = [
+            (file_id, f"{to_folder_id}/{os.path.basename(file_id)}".replace("//", "/"))
+            for file_id, to_folder_id, _ in moves
+        ]
+        outcomes: Dict[str, Optional[Exception]] = {}
+        for start in range(0, len(relocations), BATCH_MAX_ENTRIES):
+            chunk = relocations[start : start + BATCH_MAX_ENTRIES]
+            try:
+                logging.info(f"Moving {len(chunk)} file(s) in a batch...")
+                launch = self.dbx.files_move_batch_v2(
+                    [RelocationPath(from_path, to_path) for from_path, to_path in chunk]
+                )
+                result = self._wait_for_batch(
+                    launch, self.dbx.files_move_batch_check_v2
+                )
+            except Exception as e:
+                logging.error(f"Failed to move a batch of {len(chunk)} file(s): {e}")
+                outcomes.update({from_path: e for from_path, _ in chunk})
+                continue
+
+            for (from_path, to_path), entry in zip(chunk, result.entries):
+                error = None
+                if entry.is_failure():
+                    error = _batch_entry_error("move", from_path, entry.get_failure())
+                    logging.error(str(error))
+                outcomes[from_path] = error
+        return outcomes
+
     def verify_folder_exists(self, folder_id: str):
         """
         Verifies if a folder exists.
@@ -163,7 +388,12 @@ class DropboxClient(StorageClient):
                 logging.info("Dropbox root folder '' specified, which always exists.")
                 return
 
+            cache_key = ("dropbox", self._cache_namespace, "folder", folder_id.lower())
+            if self.cache.get(cache_key):
+                return
+
             self.dbx.files_get_metadata(folder_id)
+            self.cache.set(cache_key, True)
             logging.info(f"Dropbox folder '{folder_id}' exists.")
         except ApiError as e:
             if e.error.is_path() and e.error.get_path().is_not_found():
@@ -0,0 +1,99 @@
+# dedup.py
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import get_settings
+
+
+class DedupIndex:
+    """
+    Remembers the recognized output of every processed source file by the
+    provider's content hash, in a small SQLite database, so that a file with
+    the same content can reuse that output instead of being downloaded and
+    recognized again.
+
+    Keys are scoped by route, since output IDs are only valid within the
+    route's storage account. Outputs are overwritten in place when a file of
+    the same name is processed again, so an output ID belongs to the content
+    recorded last for it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS outputs ("
+                " hash_key TEXT PRIMARY KEY,"
+                " output_id TEXT NOT NULL,"
+                " processed_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS outputs_output_id ON outputs (output_id)"
+            )
+
+    @staticmethod
+    def _key(route_name: str, content_hash: str) -> str:
+        return f"{route_name}:{content_hash}"
+
+    def lookup(self, route_name: str, content_hash: str) -> Optional[str]:
+        """Returns the output ID recorded for this content, if any."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT output_id FROM outputs WHERE hash_key = ?",
+                (self._key(route_name, content_hash),),
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, route_name: str, content_hash: str, output_id: str):
+        """
+        Records (or replaces) the output produced for this content. Other
+        content recorded for the same output is dropped: the output now holds
+        this content's text.
+        """
+        prefix = self._key(route_name, "")
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM outputs WHERE output_id = ? AND substr(hash_key, 1, ?) = ?",
+                (output_id, len(prefix), prefix),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO outputs (hash_key, output_id, processed_at)"
+                " VALUES (?, ?, ?)",
+                (self._key(route_name, content_hash), output_id, time.time()),
+            )
+
+    def forget(self, route_name: str, content_hash: str):
+        """Drops the entry for this content, e.g. when its output is gone."""
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM outputs WHERE hash_key = ?",
+                (self._key(route_name, content_hash),),
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_dedup_index: Optional[DedupIndex] = None
+_dedup_index_lock = threading.Lock()
+
+
+def get_dedup_index() -> Optional[DedupIndex]:
+    """Returns the shared dedup index, or None if DEDUP_INDEX_PATH is not set."""
+    global _dedup_index
+    path = get_settings().DEDUP_INDEX_PATH
+    if path is None:
+        return None
+    with _dedup_index_lock:
+        if _dedup_index is None:
+            _dedup_index = DedupIndex(path)
+            logging.info(f"Using the duplicate index at {path}.")
+    return _dedup_index
@@ -0,0 +1,160 @@
+# endpoints.py
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Smoothing factor of the per-endpoint latency and error-rate averages.
+EWMA_ALPHA = 0.2
+# Requests an endpoint must have served before it can be ejected.
+MIN_REQUESTS_FOR_EJECTION = 5
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """
+    One OpenAI-compatible recognition host. Requests are spread across
+    endpoints in proportion to `weight`, with at most `concurrency` in flight
+    on each. `api_key` defaults to OPENAI_API_KEY.
+    """
+
+    name: str
+    base_url: str
+    api_key: Optional[str] = None
+    weight: float = 1.0
+    concurrency: int = 4
+
+
+def recognition_capacity(settings) -> int:
+    """
+    The number of recognition requests that may be in flight: the sum of the
+    endpoints' concurrency, or RECOGNITION_CONCURRENCY with a single endpoint.
+    """
+    if settings.RECOGNITION_ENDPOINTS:
+        return sum(endpoint.concurrency for endpoint in settings.RECOGNITION_ENDPOINTS)
+    return settings.RECOGNITION_CONCURRENCY
+
+
+class EndpointState:
+    """Load and passive health of one endpoint, guarded by the pool's lock."""
+
+    def __init__(self, endpoint: Endpoint):
+        self.endpoint = endpoint
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        # Requests since the endpoint was (re-)admitted.
+        self.admitted_requests = 0
+        self.latency_ewma: Optional[float] = None
+        self.error_rate = 0.0
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    def is_ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def load(self) -> float:
+        """Weighted outstanding requests, counting the one about to be sent."""
+        return (self.outstanding + 1) / self.endpoint.weight
+
+
+class EndpointPool:
+    """
+    Spreads recognition requests over several endpoints, sending each to the
+    healthy endpoint with the fewest outstanding requests relative to its
+    weight (ties go to the lower latency average). An endpoint whose error
+    rate average exceeds `max_error_rate` is ejected for `ejection_seconds`
+    and then re-admitted with a clean record. If every endpoint is ejected,
+    they are used anyway rather than failing all requests.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        max_error_rate: float,
+        ejection_seconds: float,
+    ):
+        if not endpoints:
+            raise ValueError("An endpoint pool needs at least one endpoint.")
+        self.max_error_rate = max_error_rate
+        self.ejection_seconds = ejection_seconds
+        self._states = [EndpointState(endpoint) for endpoint in endpoints]
+        self._available = threading.Condition()
+
+    def _choose(self) -> Optional[EndpointState]:
+        now = time.monotonic()
+        free = [
+            state
+            for state in self._states
+            if state.outstanding < state.endpoint.concurrency
+        ]
+        healthy = [state for state in free if not state.is_ejected(now)]
+        if not healthy and all(state.is_ejected(now) for state in self._states):
+            healthy = free  # Better a poor endpoint than none at all.
+        if not healthy:
+            return None
+        return min(healthy, key=lambda state: (state.load(), state.latency_ewma or 0.0))
+
+    def acquire(self) -> EndpointState:
+        """Picks an endpoint for a request, waiting while all are at capacity."""
+        with self._available:
+            while True:
+                state = self._choose()
+                if state is not None:
+                    state.outstanding += 1
+                    state.requests += 1
+                    state.admitted_requests += 1
+                    return state
+                # Wake up when an ejection ends even if nothing is released.
+                self._available.wait(timeout=1.0)
+
+    def release(self, state: EndpointState, latency: float, failed: bool):
+        """Records the outcome of a request sent to `state`'s endpoint."""
+        with self._available:
+            state.outstanding -= 1
+            if failed:
+                state.errors += 1
+            else:
+                state.latency_ewma = (
+                    latency
+                    if state.latency_ewma is None
+                    else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * state.latency_ewma
+                )
+            state.error_rate = EWMA_ALPHA * failed + (1 - EWMA_ALPHA) * state.error_rate
+            if (
+                failed
+                and state.admitted_requests >= MIN_REQUESTS_FOR_EJECTION
+                and state.error_rate > self.max_error_rate
+                and not state.is_ejected(time.monotonic())
+            ):
+                self._eject(state)
+            self._available.notify()
+
+    def _eject(self, state: EndpointState):
+        state.ejected_until = time.monotonic() + self.ejection_seconds
+        state.ejections += 1
+        # Re-admitted endpoints start over, so old errors do not eject them again.
+        state.error_rate = 0.0
+        state.admitted_requests = 0
+        logging.warning(
+            f"Ejecting recognition endpoint {state.endpoint.name} for "
+            f"{self.ejection_seconds}s after repeated errors."
+        )
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """Per-endpoint request counts and health, for logging."""
+        now = time.monotonic()
+        with self._available:
+            return {
+                state.endpoint.name: {
+                    "requests": state.requests,
+                    "errors": state.errors,
+                    "outstanding": state.outstanding,
+                    "latency_ewma": state.latency_ewma,
+                    "error_rate": round(state.error_rate, 3),
+                    "ejected": state.is_ejected(now),
+                    "ejections": state.ejections,
+                }
+                for state in self._states
+            }
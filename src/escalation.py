@@ -0,0 +1,67 @@
+# escalation.py
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from .config import get_settings
+
+
+def dpi_ladder() -> List[int]:
+    """The DPIs a page may be rasterized at, lowest first."""
+    settings = get_settings()
+    return list(settings.PDF_DPI_LADDER) or [settings.PDF_DPI]
+
+
+def escalation_reason(text: Optional[str]) -> Optional[str]:
+    """
+    Returns why a recognition result looks poor enough to retry the page at a
+    higher DPI, or None if it looks fine.
+    """
+    settings = get_settings()
+    stripped = (text or "").strip()
+    if len(stripped) < settings.ESCALATION_MIN_CHARS:
+        return "short"
+    lowered = stripped.lower()
+    for marker in settings.ESCALATION_MARKERS:
+        if marker.lower() in lowered:
+            return "marker"
+    if settings.ESCALATION_PATTERN and re.search(settings.ESCALATION_PATTERN, stripped):
+        return "pattern"
+    return None
+
+
+class EscalationStats:
+    """Counts how many pages needed a higher DPI, and why."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.escalated = 0
+        self.final_dpi: Counter = Counter()
+        self.reasons: Counter = Counter()
+
+    def record(self, final_dpi: int, reasons: List[str]):
+        """Records a recognized page, its final DPI and its escalation reasons."""
+        with self._lock:
+            self.pages += 1
+            self.escalated += bool(reasons)
+            self.final_dpi[final_dpi] += 1
+            self.reasons.update(reasons)
+
+    def summary(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "pages": self.pages,
+                "escalated": self.escalated,
+                "final_dpi": dict(sorted(self.final_dpi.items())),
+                "reasons": dict(self.reasons),
+            }
+
+
+_stats = EscalationStats()
+
+
+def get_escalation_stats() -> EscalationStats:
+    """Returns the process-wide escalation statistics."""
+    return _stats
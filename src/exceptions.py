@@ -11,3 +11,9 @@ class TransientError(Exception):
     """A temporary error (e.g., a network failure) that might resolve on a retry."""
 
     pass
+
+
+class CircuitOpenError(TransientError):
+    """A call was rejected because the circuit breaker of its dependency is open."""
+
+    pass
@@ -1,16 +1,86 @@
 # gdrive.py
+import functools
 import logging
 import json
+import threading
 import io
+import mimetypes
 
 from .storage.base import StorageClient
+from .storage.cache import get_metadata_cache
 from .storage.dto import FileMetadata  # Custom DTO
-from typing import List
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
-from .exceptions import PermanentError
+from googleapiclient.http import (
+    HttpRequest,
+    MediaFileUpload,
+    MediaIoBaseDownload,
+    MediaIoBaseUpload,
+)
+from .circuit_breaker import is_outage_error
+from .exceptions import PermanentError, TransientError
+
+
+@functools.lru_cache(maxsize=None)
+def _drive_discovery_document() -> str:
+    """
+    Returns the Drive v3 discovery document bundled with googleapiclient.
+    It is read from disk once per process, so building a service never
+    fetches the document over the network.
+    """
+    document = discovery_cache.get_static_doc("drive", "v3")
+    if document is None:
+        raise RuntimeError("Bundled Google Drive v3 discovery document not found.")
+    return document
+
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+PDF_MIME_TYPE = "application/pdf"
+
+
+class DriveBatch:
+    """
+    Collects Drive API requests and sends them as HTTP batch requests, so that
+    many metadata operations cost one round trip per `MAX_BATCH_SIZE` requests.
+    """
+
+    MAX_BATCH_SIZE = 100  # Drive API limit for a single batch request
+
+    def __init__(self, service):
+        self._service = service
+        self._requests: List[Tuple[str, HttpRequest]] = []
+
+    def add(self, request_id: str, request: HttpRequest):
+        """Queues a request; `request_id` keys its entry in the results."""
+        self._requests.append((request_id, request))
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def execute(self) -> Dict[str, Tuple[Optional[dict], Optional[Exception]]]:
+        """
+        Sends all queued requests and returns {request_id: (response, error)},
+        where exactly one of response and error is set for each request.
+        """
+        results: Dict[str, Tuple[Optional[dict], Optional[Exception]]] = {}
+
+        def callback(request_id, response, exception):
+            results[request_id] = (response, exception)
+
+        for start in range(0, len(self._requests), self.MAX_BATCH_SIZE):
+            batch = self._service.new_batch_http_request(callback=callback)
+            for request_id, request in self._requests[
+                start : start + self.MAX_BATCH_SIZE
+            ]:
+                batch.add(request, request_id=request_id)
+            batch.execute()
+        self._requests = []
+        return results
 
 
 class GoogleDriveClient(StorageClient):
@@ -38,68 +108,178 @@ class GoogleDriveClient(StorageClient):
                     "client_id or client_secret not found in GDRIVE_CREDENTIALS_JSON. Using existing from token_json if available."
                 )
 
-            self.service = build("drive", "v3", credentials=creds)
-            self.folder_ids_cache = {}  # Initialize cache
+            # The credentials are shared by the per-thread services and
+            # refreshed under a lock, so workers never refresh concurrently.
+            self._credentials = creds
+            self._refresh_lock = threading.Lock()
+            self._local = threading.local()
+
+            # Refresh an expired access token up front, so the first API call
+            # of the workflow does not pay for it. Building the service also
+            # validates the credentials.
+            self._refresh_credentials()
+            self._local.service = self._build_service()
+            # Shared TTL cache for folder checks, name->ID maps and parent lists
+            self.cache = get_metadata_cache()
             logging.info("Google Drive client initialized successfully.")
         except Exception as e:
             logging.error(f"Failed to initialize Google Drive client. Error: {e}")
             raise
 
+    def _refresh_credentials(self):
+        with self._refresh_lock:
+            if not self._credentials.valid and self._credentials.refresh_token:
+                logging.info("Refreshing Google Drive access token...")
+                self._credentials.refresh(Request())
+
+    def _build_service(self):
+        # Each service gets its own authorized httplib2 transport.
+        return build_from_document(
+            _drive_discovery_document(), credentials=self._credentials
+        )
+
+    @property
+    def service(self):
+        """
+        The Drive service of the calling thread. httplib2 transports are not
+        thread-safe, so every worker thread gets its own service, built on
+        first use from the bundled discovery document.
+        """
+        self._refresh_credentials()
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._local.service = self._build_service()
+        return service
+
+    def _load_name_map(self, folder_id: str) -> Dict[str, str]:
+        """Lists a folder once and returns a map of file name to file ID."""
+        names: Dict[str, str] = {}
+        page_token = None
+        while True:
+            response = (
+                self.service.files()
+                .list(
+                    q=f"'{folder_id}' in parents and trashed=false",
+                    fields="nextPageToken, files(id, name)",
+                    pageSize=1000,
+                    pageToken=page_token,
+                )
+                .execute()
+            )
+            for item in response.get("files", []):
+                names.setdefault(item["name"], item["id"])
+                self.cache.set(("gdrive", "parents", item["id"]), [folder_id])
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return names
+
     def _find_file_id_by_name(self, filename: str, folder_id: str) -> str | None:
         """
-        Finds a file's ID by its name in a specific folder.
+        Finds a file's ID by its name in a specific folder, using a cached
+        name->ID map of the folder, so repeated lookups cost no API calls.
         """
         try:
-            query = f"name='{filename}' and '{folder_id}' in parents and trashed=false"
-            response = (
-                self.service.files().list(q=query, fields="files(id, name)").execute()
+            names = self.cache.get_or_load(
+                ("gdrive", "names", folder_id),
+                lambda: self._load_name_map(folder_id),
             )
-            files = response.get("files", [])
-            return files[0]["id"] if files else None
+            return names.get(filename)
         except HttpError as e:
             logging.error(f"Error finding file '{filename}': {e}")
             return None
 
-    def list_files(self, folder_id: str) -> List[FileMetadata]:
+    def _remember_file(self, file_id: str, filename: str, folder_id: str):
+        """Records a file this client created in the cached folder metadata."""
+        self.cache.update(
+            ("gdrive", "names", folder_id),
+            lambda names: names.__setitem__(filename, file_id),
+        )
+        self.cache.set(("gdrive", "parents", file_id), [folder_id])
+
+    def _forget_file(self, file_id: str):
+        """Drops a file this client deleted or moved from the cached metadata."""
+
+        def drop(names: Dict[str, str]):
+            for name in [n for n, i in names.items() if i == file_id]:
+                del names[name]
+
+        for parent_id in self.cache.peek(("gdrive", "parents", file_id)) or []:
+            self.cache.update(("gdrive", "names", parent_id), drop)
+        self.cache.invalidate(("gdrive", "parents", file_id))
+
+    def list_files(self, folder_id: str) -> Iterator[FileMetadata]:
         """
-        Lists all files in a given Google Drive folder ID.
+        Yields the PDF files in a given Google Drive folder ID, one listing
+        page at a time. Only PDFs are requested (a mimeType query), with just
+        the fields the DTO needs.
         """
         self.verify_folder_exists(folder_id)
         try:
             logging.info(f"Listing files in Google Drive folder ID: '{folder_id}'")
-            response = (
-                self.service.files()
-                .list(
-                    q=f"'{folder_id}' in parents and trashed=false",
-                    fields="files(id, name)",
+            page_token = None
+            while True:
+                response = (
+                    self.service.files()
+                    .list(
+                        q=f"'{folder_id}' in parents and mimeType='{PDF_MIME_TYPE}' "
+                        "and trashed=false",
+                        fields="nextPageToken, "
+                        "files(id, name, size, modifiedTime, md5Checksum, version)",
+                        pageSize=1000,
+                        pageToken=page_token,
+                    )
+                    .execute()
                 )
-                .execute()
-            )
-            files = response.get("files", [])
-            # Convert the raw API response to a list of FileMetadata DTOs
-            return [
-                FileMetadata(
-                    id=item["id"],
-                    name=item["name"],
-                    path=item["id"],  # For GDrive, ID is the most reliable path
-                    folder_id=folder_id,
-                )
-                for item in files
-            ]
+                for item in response.get("files", []):
+                    # Parents are known from the listing, so a later move needs no lookup
+                    self.cache.set(("gdrive", "parents", item["id"]), [folder_id])
+                    yield self._to_dto(item, folder_id)
+                page_token = response.get("nextPageToken")
+                if not page_token:
+                    return
         except Exception as e:
             logging.error(
                 f"Failed to list files in Google Drive folder ID '{folder_id}': {e}"
             )
-            return []
+            # An outage must not look like an empty folder to the circuit breaker.
+            if is_outage_error(e):
+                raise TransientError(
+                    f"Google Drive is unavailable while listing folder ID '{folder_id}': {e}"
+                ) from e
+
+    @staticmethod
+    def _to_dto(item: dict, folder_id: str) -> FileMetadata:
+        """Converts a Drive API file resource to our standardized DTO."""
+        modified = item.get("modifiedTime")
+        return FileMetadata(
+            id=item["id"],
+            name=item["name"],
+            path=item["id"],  # For GDrive, ID is the most reliable path
+            folder_id=folder_id,
+            size=int(item["size"]) if item.get("size") is not None else None,
+            modified=datetime.fromisoformat(modified) if modified else None,
+            content_hash=item.get("md5Checksum"),
+            revision=item.get("version"),
+        )
 
     def download_file(self, file_id: str, local_path: str):
         """
         Downloads a file from Google Drive to the local filesystem using its file ID.
         """
+        logging.info("Downloading file with ID '%s' to %s...", file_id, local_path)
+        with io.FileIO(str(local_path), "wb") as fh:
+            self._download_to(fh, file_id)
+
+    def download_bytes(self, file_id: str) -> bytes:
+        """Downloads a file from Google Drive into memory."""
+        logging.info("Downloading file with ID '%s' into memory...", file_id)
+        buffer = io.BytesIO()
+        self._download_to(buffer, file_id)
+        return buffer.getvalue()
+
+    def _download_to(self, fh, file_id: str):
         try:
-            logging.info(f"Downloading file with ID '{file_id}' to {local_path}...")
             request = self.service.files().get_media(fileId=file_id)
-            fh = io.FileIO(str(local_path), "wb")
             downloader = MediaIoBaseDownload(fh, request)
             done = False
             while not done:
@@ -114,35 +294,91 @@ class GoogleDriveClient(StorageClient):
                 logging.error(f"Failed to download file with ID '{file_id}': {e}")
                 raise
 
-    def upload_file(self, local_path: str, folder_id: str, filename: str):
+    def upload_file(self, local_path: str, folder_id: str, filename: str) -> str:
         """
         Uploads a local file to a specified folder in Google Drive.
+        Returns the ID of the uploaded file.
+        """
+        return self._upload_media(
+            lambda: MediaFileUpload(str(local_path), resumable=True),
+            folder_id,
+            filename,
+            local_path,
+        )
+
+    def upload_bytes(self, data: bytes, folder_id: str, filename: str) -> str:
         """
+        Uploads in-memory content to a specified folder in Google Drive.
+        Returns the ID of the uploaded file.
+        """
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        return self._upload_media(
+            lambda: MediaIoBaseUpload(io.BytesIO(data), mimetype, resumable=True),
+            folder_id,
+            filename,
+            "memory",
+        )
+
+    def _upload_media(self, make_media, folder_id: str, filename: str, source) -> str:
         # We assume folder_id is a valid ID and exists, as it's verified in main_workflow.
 
-        # Check if a file with the same name already exists to avoid duplicates
+        # An existing file with the same name is overwritten in place, with a
+        # single update call, instead of being deleted and re-created.
         existing_file_id = self._find_file_id_by_name(filename, folder_id)
-        if existing_file_id:
-            logging.info(
-                f"File '{filename}' already exists in folder {folder_id}. Deleting before upload."
-            )
-            self.delete_file(existing_file_id)
 
         try:
-            file_metadata = {"name": filename, "parents": [folder_id]}
-            media = MediaFileUpload(str(local_path), resumable=True)
-
-            logging.info(
-                f"Uploading {local_path} to folder ID {folder_id} with name {filename}..."
-            )
-            self.service.files().create(
-                body=file_metadata, media_body=media, fields="id"
-            ).execute()
+            if existing_file_id and self._overwrite(
+                existing_file_id, make_media(), filename
+            ):
+                file_id = existing_file_id
+            else:
+                logging.info(
+                    f"Uploading {source} to folder ID {folder_id} with name {filename}..."
+                )
+                file_metadata = {"name": filename, "parents": [folder_id]}
+                created = (
+                    self.service.files()
+                    .create(body=file_metadata, media_body=make_media(), fields="id")
+                    .execute()
+                )
+                file_id = created["id"]
+                self._remember_file(file_id, filename, folder_id)
             logging.info(f"Successfully uploaded {filename} to folder ID: {folder_id}.")
+            return file_id
         except HttpError as e:
+            # The cached name map may be stale (e.g. the file was removed by
+            # someone else); reload it on the next attempt.
+            self.cache.invalidate(("gdrive", "names", folder_id))
             logging.error(f"Failed to upload file to folder ID '{folder_id}': {e}")
             raise
 
+    def _overwrite(self, file_id: str, media, filename: str) -> bool:
+        """
+        Overwrites the content of a file found in the cached name map. Returns
+        False if the file turns out to be trashed or deleted since it was
+        cached, in which case it is dropped from the cache and the caller
+        creates a new file instead.
+        """
+        logging.info(f"File '{filename}' already exists. Overwriting it.")
+        try:
+            updated = (
+                self.service.files()
+                .update(fileId=file_id, media_body=media, fields="id, trashed")
+                .execute()
+            )
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+            updated = {"trashed": True}
+        if not updated.get("trashed"):
+            return True
+        logging.warning(
+            f"File '{filename}' ({file_id}) was removed since it was cached; "
+            "uploading a new file instead."
+        )
+        self._forget_file(file_id)
+        return False
+
     def delete_file(self, file_id: str):
         """
         Deletes a file from Google Drive by its file ID.
@@ -150,8 +386,10 @@ class GoogleDriveClient(StorageClient):
         try:
             logging.info(f"Deleting file with ID '{file_id}'...")
             self.service.files().delete(fileId=file_id).execute()
+            self._forget_file(file_id)
         except HttpError as e:
             if e.resp.status == 404:
+                self._forget_file(file_id)
                 logging.warning(
                     f"File with ID '{file_id}' not found. Nothing to delete."
                 )
@@ -160,29 +398,87 @@ class GoogleDriveClient(StorageClient):
                 logging.error(f"Failed to delete file with ID '{file_id}': {e}")
                 raise
 
-    def move_file(self, file_id: str, to_folder_id: str):
+    def copy_file(self, file_id: str, to_folder_id: str, filename: str) -> str:
         """
-        Moves a file to a different folder in Google Drive.
+        Copies a file into a folder in Google Drive, replacing a file of the
+        same name there. Returns the ID of the copy. A file that is already at
+        the destination is only checked to still exist.
         """
         try:
-            logging.info(f"Moving file ID '{file_id}' to folder ID '{to_folder_id}'...")
-            # Retrieve the existing parents to remove them
-            file = (
+            logging.info(
+                f"Copying file ID '{file_id}' to folder ID '{to_folder_id}'..."
+            )
+            existing_file_id = self._find_file_id_by_name(filename, to_folder_id)
+            if existing_file_id == file_id:
+                # The cached name map may be stale; make sure it was not removed.
+                found = (
+                    self.service.files().get(fileId=file_id, fields="trashed").execute()
+                )
+                if found.get("trashed"):
+                    raise PermanentError(f"File ID '{file_id}' is in the trash.")
+                return file_id
+            copied = (
                 self.service.files()
-                .get(fileId=file_id, fields="parents, name")
+                .copy(
+                    fileId=file_id,
+                    body={"name": filename, "parents": [to_folder_id]},
+                    fields="id",
+                )
                 .execute()
             )
-            previous_parents = ",".join(file.get("parents"))
-            current_filename = file.get("name")
-
-            # Move the file by updating its parents
-            self.service.files().update(
-                fileId=file_id,
-                addParents=to_folder_id,
-                removeParents=previous_parents,
-                body={"name": current_filename},  # Keep the original filename
-                fields="id, parents",
-            ).execute()
+            if existing_file_id:
+                self.service.files().delete(fileId=existing_file_id).execute()
+                self._forget_file(existing_file_id)
+            self._remember_file(copied["id"], filename, to_folder_id)
+            return copied["id"]
+        except HttpError as e:
+            self.cache.invalidate(("gdrive", "names", to_folder_id))
+            logging.error(
+                f"Failed to copy file ID '{file_id}' to folder ID '{to_folder_id}': {e}"
+            )
+            raise
+
+    def move_file(
+        self, file_id: str, to_folder_id: str, from_folder_id: Optional[str] = None
+    ):
+        """
+        Moves a file to a different folder in Google Drive.
+        If the current parent folder is known, the move is a single API call.
+        """
+        try:
+            logging.info(f"Moving file ID '{file_id}' to folder ID '{to_folder_id}'...")
+            if from_folder_id is None:
+                cached_parents = self.cache.get(("gdrive", "parents", file_id))
+                if cached_parents:
+                    from_folder_id = ",".join(cached_parents)
+            if from_folder_id is not None:
+                self.service.files().update(
+                    fileId=file_id,
+                    addParents=to_folder_id,
+                    removeParents=from_folder_id,
+                    fields="id, parents",
+                ).execute()
+            else:
+                # Retrieve the existing parents to remove them
+                file = (
+                    self.service.files()
+                    .get(fileId=file_id, fields="parents, name")
+                    .execute()
+                )
+                previous_parents = ",".join(file.get("parents"))
+                current_filename = file.get("name")
+
+                # Move the file by updating its parents
+                self.service.files().update(
+                    fileId=file_id,
+                    addParents=to_folder_id,
+                    removeParents=previous_parents,
+                    body={"name": current_filename},  # Keep the original filename
+                    fields="id, parents",
+                ).execute()
+            self._forget_file(file_id)
+            self.cache.invalidate(("gdrive", "names", to_folder_id))
+            self.cache.set(("gdrive", "parents", file_id), [to_folder_id])
             logging.info(
                 f"Successfully moved file ID '{file_id}' to folder ID '{to_folder_id}'."
             )
@@ -192,37 +488,156 @@ class GoogleDriveClient(StorageClient):
             )
             raise
 
+    def delete_files(self, file_ids: Iterable[str]) -> Dict[str, Optional[Exception]]:
+        """
+        Deletes several files with batched requests.
+        Files that no longer exist count as deleted.
+        """
+        batch = DriveBatch(self.service)
+        for file_id in file_ids:
+            batch.add(file_id, self.service.files().delete(fileId=file_id))
+        logging.info(f"Deleting {len(batch)} file(s) in a batch...")
+
+        outcomes = {}
+        for file_id, (_, error) in batch.execute().items():
+            if isinstance(error, HttpError) and error.resp.status == 404:
+                logging.warning(
+                    f"File with ID '{file_id}' not found. Nothing to delete."
+                )
+                error = None
+            if error is None:
+                self._forget_file(file_id)
+            else:
+                logging.error(f"Failed to delete file with ID '{file_id}': {error}")
+            outcomes[file_id] = error
+        return outcomes
+
+    def move_files(
+        self, moves: Iterable[Tuple[str, str, Optional[str]]]
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        Moves several files with batched requests. Each move is a
+        (file_id, to_folder_id, from_folder_id) tuple; unknown source folders
+        (None) are looked up first, in one batch for all of them.
+        """
+        moves = list(moves)
+        outcomes: Dict[str, Optional[Exception]] = {}
+
+        parents = {}
+        for file_id, _, from_folder_id in moves:
+            if from_folder_id is None:
+                cached_parents = self.cache.get(("gdrive", "parents", file_id))
+                if cached_parents:
+                    from_folder_id = ",".join(cached_parents)
+            if from_folder_id is not None:
+                parents[file_id] = from_folder_id
+        lookups = DriveBatch(self.service)
+        for file_id, _, _ in moves:
+            if file_id not in parents:
+                lookups.add(
+                    file_id, self.service.files().get(fileId=file_id, fields="parents")
+                )
+        for file_id, (response, error) in lookups.execute().items():
+            if error is not None:
+                outcomes[file_id] = error
+            else:
+                parents[file_id] = ",".join(response.get("parents", []))
+
+        updates = DriveBatch(self.service)
+        for file_id, to_folder_id, _ in moves:
+            if file_id in parents:
+                updates.add(
+                    file_id,
+                    self.service.files().update(
+                        fileId=file_id,
+                        addParents=to_folder_id,
+                        removeParents=parents[file_id],
+                        fields="id, parents",
+                    ),
+                )
+        logging.info(f"Moving {len(moves)} file(s) in a batch...")
+        destinations = {file_id: to_folder_id for file_id, to_folder_id, _ in moves}
+        for file_id, (_, error) in updates.execute().items():
+            outcomes[file_id] = error
+            if error is None:
+                self._forget_file(file_id)
+                self.cache.invalidate(("gdrive", "names", destinations[file_id]))
+                self.cache.set(("gdrive", "parents", file_id), [destinations[file_id]])
+
+        for file_id, error in outcomes.items():
+            if error is not None:
+                logging.error(f"Failed to move file ID '{file_id}': {error}")
+        return outcomes
+
+    def verify_folders_exist(self, folder_ids: Iterable[str]):
+        """
+        Verifies several folders with one batch request.
+
+        Raises:
+            PermanentError: If any ID does not exist or is not a folder.
+            TransientError: If Drive is unavailable.
+        """
+        batch = DriveBatch(self.service)
+        for folder_id in dict.fromkeys(folder_ids):
+            if self.cache.get(("gdrive", "folder", folder_id)):
+                continue
+            batch.add(
+                folder_id,
+                self.service.files().get(fileId=folder_id, fields="id, mimeType"),
+            )
+        for folder_id, (response, error) in batch.execute().items():
+            self._check_folder(folder_id, response, error)
+
     def verify_folder_exists(self, folder_id: str):
         """
         Verifies if a folder with a given ID exists and is actually a folder.
 
         Raises:
             PermanentError: If the ID does not exist, or if the item is not a folder.
+            TransientError: If Drive is unavailable.
         """
+        if self.cache.get(("gdrive", "folder", folder_id)):
+            return
         try:
             file = (
                 self.service.files()
                 .get(fileId=folder_id, fields="id, mimeType")
                 .execute()
             )
-            if file.get("mimeType") == "application/vnd.google-apps.folder":
-                logging.info(
-                    f"Google Drive folder with ID '{folder_id}' exists and is a folder."
-                )
-                return
-            else:
-                raise PermanentError(
-                    f"Google Drive ID '{folder_id}' exists but is not a folder."
-                )
         except HttpError as e:
-            if e.resp.status == 404:
+            self._check_folder(folder_id, None, e)
+        else:
+            self._check_folder(folder_id, file, None)
+
+    def _check_folder(
+        self, folder_id: str, file: Optional[dict], error: Optional[Exception]
+    ):
+        """
+        Raises a PermanentError unless the metadata lookup found a folder, or a
+        TransientError if Drive was unavailable.
+        Verified folders are cached, so later checks cost no API calls.
+        """
+        if error is not None:
+            if isinstance(error, HttpError) and error.resp.status == 404:
                 raise PermanentError(
                     f"Google Drive folder with ID '{folder_id}' not found. Please check your configuration."
                 )
-            else:
-                logging.error(
-                    f"Failed to verify Google Drive folder ID '{folder_id}': {e}"
-                )
-                raise PermanentError(
-                    f"API error while verifying folder ID '{folder_id}': {e}"
-                )
+            logging.error(
+                f"Failed to verify Google Drive folder ID '{folder_id}': {error}"
+            )
+            if is_outage_error(error):
+                raise TransientError(
+                    f"Google Drive is unavailable while verifying folder ID '{folder_id}': {error}"
+                ) from error
+            raise PermanentError(
+                f"API error while verifying folder ID '{folder_id}': {error}"
+            )
+        if file.get("mimeType") == FOLDER_MIME_TYPE:
+            self.cache.set(("gdrive", "folder", folder_id), True)
+            logging.info(
+                f"Google Drive folder with ID '{folder_id}' exists and is a folder."
+            )
+            return
+        raise PermanentError(
+            f"Google Drive ID '{folder_id}' exists but is not a folder."
+        )
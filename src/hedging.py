@@ -0,0 +1,213 @@
+# hedging.py
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from .config import get_settings
+from .endpoints import recognition_capacity
+
+T = TypeVar("T")
+
+# Latencies kept per model for the hedge delay percentile.
+LATENCY_WINDOW = 200
+# No hedging until this many latencies of a model have been observed.
+MIN_SAMPLES = 20
+# Hedges that may be sent before the budget has earned any allowance.
+BUDGET_BURST = 2.0
+
+
+class HedgeCancelled(Exception):
+    """Raised by a copy of a hedged call that lost before sending its request."""
+
+
+class HedgeAttempt:
+    """
+    One copy of a hedged call. `cancelled` is set once the other copy has
+    won, so a copy still waiting for capacity gives up instead of sending a
+    paid request whose result would be discarded.
+
+    The call reports the latency of its request with `record_latency`, so
+    time spent queued for local capacity does not inflate the hedge delay.
+    """
+
+    def __init__(self, tracker: Optional["LatencyTracker"] = None):
+        self.cancelled = threading.Event()
+        self._tracker = tracker
+
+    def record_latency(self, seconds: float):
+        if self._tracker is not None:
+            self._tracker.record(seconds)
+
+    def check(self):
+        """Raises HedgeCancelled if the other copy has already won."""
+        if self.cancelled.is_set():
+            raise HedgeCancelled("The other copy of a hedged call already won.")
+
+
+class LatencyTracker:
+    """A sliding window of recent call latencies."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Returns the p-th percentile (0-100) of the window, or None if too small."""
+        with self._lock:
+            if len(self._latencies) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * p / 100))
+        return ordered[index]
+
+
+class HedgeBudget:
+    """
+    Caps hedges at a fraction of primary requests. Each request earns `ratio`
+    of a hedge, up to a small burst; each hedge spends one.
+    """
+
+    def __init__(self, ratio: float, burst: float = BUDGET_BURST):
+        self._lock = threading.Lock()
+        self.ratio = ratio
+        self.burst = burst
+        self._allowance = burst
+
+    def on_request(self):
+        with self._lock:
+            self._allowance = min(self.burst, self._allowance + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._allowance < 1:
+                return False
+            self._allowance -= 1
+            return True
+
+
+class Hedger:
+    """
+    Runs calls with a hedge: when a call has not finished within the
+    HEDGE_PERCENTILE of recent latencies for its key, a duplicate is started
+    and the first to succeed wins. The loser is cancelled if it has not
+    started yet, and told through its HedgeAttempt otherwise, so that it gives
+    up if it has not sent its request; a request already on the wire is left
+    to finish and its result is discarded.
+    """
+
+    def __init__(
+        self, percentile: float, budget_ratio: float, min_delay: float, workers: int
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.budget = HedgeBudget(budget_ratio)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="hedge"
+        )
+        self._lock = threading.Lock()
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._stats = {"requests": 0, "hedged": 0, "hedge_wins": 0}
+
+    def _tracker(self, key: str) -> LatencyTracker:
+        with self._lock:
+            if key not in self._trackers:
+                self._trackers[key] = LatencyTracker()
+            return self._trackers[key]
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """How long to wait before hedging a call for `key`, or None for no hedge."""
+        delay = self._tracker(key).percentile(self.percentile)
+        if delay is None:
+            return None
+        return max(delay, self.min_delay)
+
+    def _submit(
+        self, key: str, call: Callable[[HedgeAttempt], T]
+    ) -> Tuple[Future, HedgeAttempt]:
+        attempt = HedgeAttempt(self._tracker(key))
+        return self._executor.submit(call, attempt), attempt
+
+    def run(
+        self,
+        key: str,
+        call: Callable[[HedgeAttempt], T],
+        hedge_slots: Optional[threading.Semaphore] = None,
+    ) -> T:
+        """
+        Runs `call(attempt)`, hedging it if it is slow for `key` and the budget
+        allows. `call` should `attempt.check()` right before its request and
+        `attempt.record_latency()` after it. With `hedge_slots`, the hedge
+        needs a free slot of its own (e.g. the model's concurrency limit) and
+        is skipped otherwise.
+        """
+        self._count("requests")
+        self.budget.on_request()
+        primary, primary_attempt = self._submit(key, call)
+        delay = self.hedge_delay(key)
+        if delay is None:
+            return primary.result()
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        if hedge_slots is not None and not hedge_slots.acquire(blocking=False):
+            logging.debug("No free slot to hedge slow %s request.", key)
+            return primary.result()
+        if not self.budget.try_spend():
+            if hedge_slots is not None:
+                hedge_slots.release()
+            return primary.result()
+
+        logging.info("Hedging slow %s request after %.2fs...", key, delay)
+        self._count("hedged")
+        hedge, hedge_attempt = self._submit(key, call)
+        if hedge_slots is not None:
+            hedge.add_done_callback(lambda _: hedge_slots.release())
+        attempts = {primary: primary_attempt, hedge: hedge_attempt}
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if f.exception() is None), None)
+            if winner is None and pending:
+                continue  # One failed; the other may still succeed.
+            for loser in pending:
+                attempts[loser].cancelled.set()
+                loser.cancel()
+            if winner is None:
+                return primary.result()
+            if winner is hedge:
+                self._count("hedge_wins")
+            return winner.result()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """Returns the process-wide hedger, creating it on first use from the settings."""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            settings = get_settings()
+            _hedger = Hedger(
+                percentile=settings.HEDGE_PERCENTILE,
+                budget_ratio=settings.HEDGE_BUDGET,
+                min_delay=settings.HEDGE_MIN_DELAY_SECONDS,
+                # A primary and a hedge for every worker's in-flight call.
+                workers=2 * max(settings.WORKER_COUNT, recognition_capacity(settings)),
+            )
+    return _hedger
@@ -0,0 +1,158 @@
+# leases.py
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+from filelock import FileLock, Timeout
+
+
+class LeaseManager:
+    """
+    File leases shared between replicas through a common lock directory.
+
+    A lease is a small JSON file naming its owner and its expiry time. Leases
+    are claimed, renewed and released under a `filelock` guard. A background
+    heartbeat renews held leases, and a lease whose owner stops renewing it
+    (e.g. a crashed replica) expires after `ttl_seconds`.
+
+    Expiry uses wall-clock time, so replicas sharing a directory must have
+    reasonably synchronized clocks (well within the TTL).
+    """
+
+    def __init__(self, lock_dir: Path, ttl_seconds: float, lock_timeout: float = 5):
+        self.lock_dir = Path(lock_dir)
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # One guard for the whole directory: lease operations are tiny, and a
+        # single lock file avoids leaving a lock file behind for every lease.
+        self._guard = FileLock(
+            str(self.lock_dir / ".leases.lock"), timeout=lock_timeout
+        )
+        self._held: Dict[str, Path] = {}
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def _lease_path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return self.lock_dir / f"{digest}.lease"
+
+    @staticmethod
+    def _read(path: Path) -> Optional[dict]:
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            # A torn or unreadable lease is treated as expired.
+            logging.warning(f"Ignoring unreadable lease file {path}: {e}")
+            return None
+
+    def _write(self, path: Path, key: str):
+        lease = {
+            "key": key,
+            "owner": self.owner,
+            "expires_at": time.time() + self.ttl_seconds,
+        }
+        tmp_path = path.parent / f"{path.name}.{self.owner}.tmp"
+        tmp_path.write_text(json.dumps(lease))
+        os.replace(tmp_path, path)
+
+    def _is_held_by_other(self, lease: Optional[dict]) -> bool:
+        return (
+            lease is not None
+            and lease.get("owner") != self.owner
+            and lease.get("expires_at", 0) > time.time()
+        )
+
+    def try_acquire(self, key: str) -> bool:
+        """
+        Claims the lease for `key`. Returns False if another replica holds an
+        unexpired lease on it or the lock directory is busy.
+        """
+        path = self._lease_path(key)
+        try:
+            with self._guard:
+                lease = self._read(path)
+                if self._is_held_by_other(lease):
+                    return False
+                if lease is not None and lease.get("owner") != self.owner:
+                    logging.warning(
+                        f"Taking over expired lease on '{key}' from {lease.get('owner')}."
+                    )
+                self._write(path, key)
+        except Timeout:
+            logging.warning(f"Timed out waiting for the lease lock for '{key}'.")
+            return False
+
+        with self._held_lock:
+            self._held[key] = path
+            self._ensure_heartbeat()
+        return True
+
+    def release(self, key: str):
+        """Releases a lease held by this replica."""
+        with self._held_lock:
+            path = self._held.pop(key, None)
+        if path is None:
+            return
+        try:
+            with self._guard:
+                lease = self._read(path)
+                if lease is not None and lease.get("owner") == self.owner:
+                    path.unlink(missing_ok=True)
+        except Timeout:
+            # The lease simply expires after its TTL.
+            logging.warning(f"Timed out releasing the lease for '{key}'.")
+
+    def renew_all(self):
+        """Extends the expiry of every lease held by this replica."""
+        with self._held_lock:
+            held = dict(self._held)
+        if not held:
+            return
+        try:
+            with self._guard:
+                for key, path in held.items():
+                    with self._held_lock:
+                        if key not in self._held:
+                            continue  # Released since the snapshot was taken
+                    if self._is_held_by_other(self._read(path)):
+                        logging.error(
+                            f"Lease on '{key}' was taken over by another replica."
+                        )
+                        with self._held_lock:
+                            self._held.pop(key, None)
+                        continue
+                    self._write(path, key)
+        except Timeout:
+            logging.warning("Timed out renewing leases; will retry on next heartbeat.")
+
+    def _ensure_heartbeat(self):
+        if self._heartbeat is not None and self._heartbeat.is_alive():
+            return
+        self._heartbeat = threading.Thread(
+            target=self._heartbeat_loop, name="lease-heartbeat", daemon=True
+        )
+        self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        # Renew well before expiry, so one missed heartbeat does not lose a lease.
+        while not self._stop.wait(self.ttl_seconds / 3):
+            self.renew_all()
+
+    def close(self):
+        """Stops the heartbeat and releases all held leases."""
+        self._stop.set()
+        with self._held_lock:
+            keys = list(self._held)
+        for key in keys:
+            self.release(key)
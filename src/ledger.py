@@ -0,0 +1,95 @@
+# ledger.py
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import get_settings
+from .storage.dto import FileMetadata
+
+
+def file_revision(entry: FileMetadata) -> str:
+    """
+    The version of a source file a ledger entry applies to: the provider's
+    revision, or the modification time if the provider reports none.
+    """
+    if entry.revision:
+        return entry.revision
+    return entry.modified.isoformat() if entry.modified else ""
+
+
+class ProcessedLedger:
+    """
+    A durable record of source files whose output has been uploaded, kept in
+    SQLite so that it survives restarts. A file that is still listed after it
+    was processed (because deleting it failed) is recognized by its ID and
+    revision, and only the delete is retried.
+
+    Entries are keyed by (route, file ID, revision), the table's primary key,
+    so lookups stay indexed however many entries accumulate. A modified file
+    has a new revision and is processed again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._db:
+            # WAL keeps readers and the writer of other replicas from blocking
+            # each other on a shared volume.
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS processed ("
+                " route TEXT NOT NULL,"
+                " file_id TEXT NOT NULL,"
+                " revision TEXT NOT NULL,"
+                " output_id TEXT,"
+                " completed_at REAL NOT NULL,"
+                " PRIMARY KEY (route, file_id, revision))"
+            )
+
+    def is_processed(self, route_name: str, entry: FileMetadata) -> bool:
+        """Whether this revision of the file already has an uploaded output."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM processed"
+                " WHERE route = ? AND file_id = ? AND revision = ?",
+                (route_name, entry.id, file_revision(entry)),
+            ).fetchone()
+        return row is not None
+
+    def record(
+        self, route_name: str, entry: FileMetadata, output_id: Optional[str] = None
+    ):
+        """Records that this revision of the file has been processed."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO processed"
+                " (route, file_id, revision, output_id, completed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (route_name, entry.id, file_revision(entry), output_id, time.time()),
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_ledger: Optional[ProcessedLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Optional[ProcessedLedger]:
+    """Returns the shared processed-file ledger, or None if LEDGER_PATH is not set."""
+    global _ledger
+    path = get_settings().LEDGER_PATH
+    if path is None:
+        return None
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = ProcessedLedger(path)
+            logging.info(f"Using the processed-file ledger at {path}.")
+    return _ledger
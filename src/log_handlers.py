@@ -0,0 +1,73 @@
+# log_handlers.py
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import List, Optional
+
+# The background writer of the queue logging mode, if running.
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler that leaves formatting to the listener thread. The stock
+    handler formats every record in the logging thread before queueing it;
+    here the caller only pays for creating the record. Log arguments should
+    therefore not be mutated after the call, which holds for the strings and
+    numbers logged by this app.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def start_queue_logging(handlers: List[logging.Handler]) -> logging.Handler:
+    """
+    Starts a background thread that passes queued records to `handlers`, and
+    returns the handler that queues them. Replaces any earlier listener.
+    """
+    global _listener
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+        _listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+    return DeferredQueueHandler(log_queue)
+
+
+def stop_queue_logging():
+    """Writes out the queued records and stops the background writer."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+# Flush queued records when the process exits normally.
+atexit.register(stop_queue_logging)
@@ -1,19 +1,58 @@
 # main.py
 import logging
+import threading
 import time
-from typing import Optional, Tuple
-import dropbox
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from .config import get_settings
-from .dbox import DropboxClient
-from .gdrive import GoogleDriveClient
+from .routes import Route, default_route, resolve_routes
+from .scheduler import CostModel, FairScheduler, run_scheduled
 from .storage.base import StorageClient
+from .storage.breaker import CircuitBreakingStorageClient
+from .storage.cache import get_metadata_cache
+from .storage.deferred import DeferredOperations
+from .storage.dto import FileMetadata
 from .exceptions import PermanentError, TransientError
-from .processing import process_single_file
+from .cascade import get_model_usage
+from .circuit_breaker import get_recognition_breaker, get_storage_breaker
+from .dedup import get_dedup_index
+from .escalation import get_escalation_stats
+from .hedging import get_hedger
+from .leases import LeaseManager
+from .ledger import file_revision, get_ledger
+from .polling import RunResult, get_poller
+from .log_handlers import JsonFormatter, start_queue_logging, stop_queue_logging
+from .profiling import enable_profiling, profile_file, write_profile_reports
+from .spool import get_spool_manager
+from .usage import get_usage_meter, get_usage_store
+from .webhooks import start_webhook_server
+
+if TYPE_CHECKING:
+    from .gdrive import GoogleDriveClient
+
+# Shared by all workflow runs of this process (see get_lease_manager).
+_lease_manager: Optional[LeaseManager] = None
+_lease_manager_lock = threading.Lock()
+
+# Page-count estimates for scheduling, calibrated by every processed file.
+_cost_model = CostModel()
+
+# Provider clients and the processing pipeline pull in heavy third-party
+# packages (dropbox, googleapiclient, openai, pdf2image, reportlab), so they
+# are imported lazily: only the configured provider is ever loaded.
 
 
 def setup_logging():
-    """Configures logging to file and console explicitly."""
+    """
+    Configures logging to file and console explicitly. The file is rotated
+    by size. With LOG_QUEUE, records are written by a background thread, so
+    logging calls do not wait on disk or console I/O.
+    """
     settings = get_settings()
     log_level_name = settings.LOG_LEVEL.upper()
 
@@ -22,27 +61,46 @@ def setup_logging():
     root_logger.setLevel(log_level_name)
 
     # Clear any existing handlers to prevent duplicate logs on re-runs or implicit configs
-    if root_logger.handlers:
-        for handler in root_logger.handlers:
-            root_logger.removeHandler(handler)
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    stop_queue_logging()
 
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        )
 
     # Add StreamHandler (for console output)
     stream_handler = logging.StreamHandler()
     stream_handler.setFormatter(formatter)
-    root_logger.addHandler(stream_handler)
+    handlers: List[logging.Handler] = [stream_handler]
 
-    # Add FileHandler
+    # Add a file handler that rotates app.log by size
+    file_error = None
     try:
-        file_handler = logging.FileHandler(settings.LOG_FILE)
+        file_handler = RotatingFileHandler(
+            settings.LOG_FILE,
+            maxBytes=settings.LOG_MAX_BYTES,
+            backupCount=settings.LOG_BACKUP_COUNT,
+        )
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
     except IOError as e:
+        file_error = e
+
+    if settings.LOG_QUEUE:
+        root_logger.addHandler(start_queue_logging(handlers))
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
+
+    if file_error is not None:
         # Log to console if file logging fails (e.g., permissions)
-        root_logger.error(f"Failed to set up file logging to {settings.LOG_FILE}: {e}")
+        root_logger.error(
+            "Failed to set up file logging to %s: %s", settings.LOG_FILE, file_error
+        )
 
     # Reducing "noise" from third-party libraries
     logging.getLogger("dropbox").setLevel(logging.WARNING)
@@ -50,12 +108,16 @@ def setup_logging():
     logging.getLogger("googleapiclient").setLevel(logging.WARNING)
 
 
-def _init_gdrive_client(settings) -> Optional[GoogleDriveClient]:
+def _init_gdrive_client(
+    credentials_json: str, token_json: str
+) -> Optional["GoogleDriveClient"]:
     """Initializes and returns a GoogleDriveClient."""
     try:
+        from .gdrive import GoogleDriveClient
+
         storage_client = GoogleDriveClient(
-            credentials_json=settings.GDRIVE_CREDENTIALS_JSON,
-            token_json=settings.GDRIVE_TOKEN_JSON,
+            credentials_json=credentials_json,
+            token_json=token_json,
         )
         return storage_client
     except Exception as e:
@@ -65,27 +127,20 @@ def _init_gdrive_client(settings) -> Optional[GoogleDriveClient]:
         return None
 
 
-def initialize_storage_client(
-    settings,
-) -> Tuple[Optional[StorageClient], Optional[str], Optional[str], Optional[str]]:
-    """
-    Initializes and returns the appropriate storage client based on settings.
-
-    Returns a tuple of (storage_client, source_path, dest_path, failed_path).
-    """
+def initialize_route_client(route: Route) -> Optional[StorageClient]:
+    """Initializes and returns the storage client for a route."""
     storage_client: Optional[StorageClient] = None
-    source_path, dest_path, failed_path = None, None, None
 
-    if settings.STORAGE_PROVIDER == "dropbox":
-        logging.info("Using Dropbox storage provider.")
-        source_path = settings.DROPBOX_SOURCE_DIR
-        dest_path = settings.DROPBOX_DEST_DIR
-        failed_path = settings.DROPBOX_FAILED_DIR
+    if route.provider == "dropbox":
+        logging.info(f"Using Dropbox storage provider for route '{route.name}'.")
+        import dropbox
+        from .dbox import DropboxClient
+
         try:
             storage_client = DropboxClient(
-                app_key=settings.DROPBOX_APP_KEY,
-                app_secret=settings.DROPBOX_APP_SECRET,
-                refresh_token=settings.DROPBOX_REFRESH_TOKEN,
+                app_key=route.dropbox_app_key,
+                app_secret=route.dropbox_app_secret,
+                refresh_token=route.dropbox_refresh_token,
             )
             logging.info("Dropbox client initialized successfully.")
         except dropbox.exceptions.AuthError as e:
@@ -100,25 +155,94 @@ def initialize_storage_client(
             )
             storage_client = None
 
-    elif settings.STORAGE_PROVIDER == "gdrive":
-        logging.info("Using Google Drive storage provider.")
-        source_path = settings.GDRIVE_SOURCE_FOLDER_ID
-        dest_path = settings.GDRIVE_DEST_FOLDER_ID
-        failed_path = settings.GDRIVE_FAILED_FOLDER_ID
-        storage_client = _init_gdrive_client(settings)
+    elif route.provider == "gdrive":
+        logging.info(f"Using Google Drive storage provider for route '{route.name}'.")
+        storage_client = _init_gdrive_client(
+            route.gdrive_credentials_json, route.gdrive_token_json
+        )
+
+    else:
+        logging.critical(f"Unknown STORAGE_PROVIDER: {route.provider}")
+
+    return storage_client
+
+
+def initialize_storage_client(
+    settings,
+) -> Tuple[Optional[StorageClient], Optional[str], Optional[str], Optional[str]]:
+    """
+    Initializes and returns the appropriate storage client based on settings.
+
+    Returns a tuple of (storage_client, source_path, dest_path, failed_path).
+    """
+    route = default_route(settings)
+    return initialize_route_client(route), route.source, route.dest, route.failed
+
+
+def _warm_up_recognition():
+    """Loads the processing pipeline and creates the recognition API client."""
+    from .processing import process_single_file  # noqa: F401
+    from .recognition import get_endpoint_client, get_openai_client
 
+    endpoints = get_settings().RECOGNITION_ENDPOINTS
+    if endpoints:
+        for endpoint in endpoints:
+            get_endpoint_client(endpoint)
     else:
-        logging.critical(f"Unknown STORAGE_PROVIDER: {settings.STORAGE_PROVIDER}")
+        get_openai_client()
+
+
+def warm_up_clients(routes: List[Route]) -> List[Optional[StorageClient]]:
+    """
+    Initializes the storage clients of all routes (including their auth checks
+    or token refreshes) in parallel, while the recognition pipeline is loaded
+    and its client created.
+
+    Returns one client per route, in order; None where initialization failed.
+    """
+    start_time = time.monotonic()
+    with ThreadPoolExecutor(
+        max_workers=len(routes) + 1, thread_name_prefix="warm-up"
+    ) as executor:
+        recognition_future = executor.submit(_warm_up_recognition)
+        storage_clients = list(executor.map(initialize_route_client, routes))
+        try:
+            recognition_future.result()
+        except Exception as e:
+            # Not fatal here: the error resurfaces on the first recognition call.
+            logging.error(f"Failed to warm up the recognition client. Error: {e}")
+    logging.info(f"Client warm-up took {time.monotonic() - start_time:.2f} seconds.")
+    return storage_clients
+
 
-    return storage_client, source_path, dest_path, failed_path
+@dataclass(frozen=True)
+class FileJob:
+    """A single source file queued for processing on a route."""
+
+    route: Route
+    storage_client: StorageClient
+    entry: FileMetadata
+    # Set when DEFER_STORAGE_OPS is on: the route's deletes and moves for the run
+    deferred: Optional[DeferredOperations] = None
 
 
 def _quarantine_file(
-    storage_client: StorageClient, file_id: str, file_name: str, failed_folder_id: str
+    storage_client: StorageClient,
+    file_id: str,
+    file_name: str,
+    failed_folder_id: str,
+    from_folder_id: Optional[str] = None,
+    deferred: Optional[DeferredOperations] = None,
 ):
-    """Moves a file to the quarantine folder and logs the outcome."""
+    """
+    Moves a file to the quarantine folder and logs the outcome, or queues the
+    move on `deferred` to be submitted in a batch at the end of the run.
+    """
+    if deferred is not None:
+        deferred.move(file_id, failed_folder_id, from_folder_id, file_name)
+        return
     try:
-        storage_client.move_file(file_id, failed_folder_id)
+        storage_client.move_file(file_id, failed_folder_id, from_folder_id)
         logging.warning(
             f"Moved failed file {file_name} to quarantine folder {failed_folder_id}."
         )
@@ -129,75 +253,405 @@ def _quarantine_file(
         )
 
 
-def main_workflow():
-    logging.info("Starting workflow...")
-    settings = get_settings()
+def _poll_key(route_name: str, entry: FileMetadata) -> Tuple[str, str, str]:
+    """Identifies a version of a source file for the adaptive poller."""
+    return route_name, entry.id, file_revision(entry)
 
-    storage_client, source_path, dest_path, failed_path = initialize_storage_client(
-        settings
-    )
 
-    # 3. If client initialization failed, exit the workflow for this run.
-    if storage_client is None:
+def _queue_route_files(
+    route: Route,
+    storage_client: StorageClient,
+    scheduler: FairScheduler,
+    deferred: Optional[DeferredOperations] = None,
+) -> int:
+    """
+    Verifies the folders of a route and queues its PDF files on the scheduler.
+    Returns the number of queued files.
+    """
+    # Check necessary folders exist
+    try:
+        # An empty string is a valid path for Dropbox (root), so we check for None
+        storage_client.verify_folders_exist(
+            path
+            for path in [route.source, route.dest, route.failed]
+            if path is not None
+        )
+    except Exception as e:  # Catch any error during folder verification
         logging.critical(
-            f"Could not establish a connection to {settings.STORAGE_PROVIDER}."
+            f"A configured folder for {route.provider} route '{route.name}' does not exist or is inaccessible. Skipping route. Error: {e}"
         )
+        return 0
+
+    queued = 0
+    get_poller().record_listing()
+    for entry in storage_client.list_files(route.source):
+        # A simple check for PDF files based on name
+        if entry.name.lower().endswith(".pdf"):
+            get_poller().record_listed(_poll_key(route.name, entry))
+            scheduler.add(
+                route.name,
+                FileJob(route, storage_client, entry, deferred),
+                cost=_cost_model.estimate_pages(entry.size),
+                submitted_at=entry.modified.timestamp() if entry.modified else None,
+            )
+            queued += 1
+        else:
+            logging.warning(f"Skipping non-PDF or folder entry: {entry.name}")
+    logging.info(f"Found {queued} files to process on route '{route.name}'.")
+    return queued
+
+
+def get_lease_manager() -> Optional[LeaseManager]:
+    """
+    Returns the process-wide lease manager, creating it on first use, or None
+    if LEASE_DIR is not configured. It outlives workflow runs, so this replica
+    keeps one owner identity and one heartbeat.
+    """
+    global _lease_manager
+    settings = get_settings()
+    if settings.LEASE_DIR is None:
+        return None
+    with _lease_manager_lock:
+        if _lease_manager is None:
+            _lease_manager = LeaseManager(
+                settings.LEASE_DIR,
+                ttl_seconds=settings.LEASE_TTL_SECONDS,
+                lock_timeout=settings.LOCK_TIMEOUT,
+            )
+            logging.info(
+                f"File leases enabled in {settings.LEASE_DIR} (owner {_lease_manager.owner})."
+            )
+    return _lease_manager
+
+
+def _process_file_job(route_name: str, job: FileJob):
+    """
+    Processes one queued file under a lease, if leases are enabled, so that
+    replicas sharing a source folder never process the same file twice.
+    """
+    if get_recognition_breaker().rejecting():
+        # No point downloading a file that cannot be recognized; it stays in
+        # the source folder for a later run.
+        logging.info(f"Skipping {job.entry.name}: the recognition API circuit is open.")
         return
 
-    # Check necessary folders exist
+    lease_manager = get_lease_manager()
+    if lease_manager is None:
+        _run_file_job(route_name, job)
+        return
+
+    lease_key = f"{route_name}:{job.entry.id}"
+    if not lease_manager.try_acquire(lease_key):
+        logging.info(
+            f"Skipping {job.entry.name}: it is being processed by another replica."
+        )
+        return
     try:
-        for path in [source_path, dest_path, failed_path]:
-            # An empty string is a valid path for Dropbox (root), so we check for None
-            if path is not None:
-                storage_client.verify_folder_exists(path)
-    except Exception as e:  # Catch any error during folder verification
-        logging.critical(
-            f"A configured folder for {settings.STORAGE_PROVIDER} does not exist or is inaccessible. Aborting workflow. Error: {e}"
+        _run_file_job(route_name, job)
+    finally:
+        if job.deferred is not None:
+            # Keep the lease until the file has actually left the source folder.
+            job.deferred.call_after_flush(lambda: lease_manager.release(lease_key))
+        else:
+            lease_manager.release(lease_key)
+
+
+def _reuse_duplicate_output(route_name: str, job: FileJob) -> bool:
+    """
+    Resolves a file whose content was processed before on this route: the
+    earlier output is copied under this file's name and the source deleted,
+    without downloading or recognizing it. Returns False if the file must be
+    processed normally (no index, unknown content, or the output is gone).
+    """
+    entry, storage_client = job.entry, job.storage_client
+    dedup_index = get_dedup_index()
+    if dedup_index is None or not entry.content_hash:
+        return False
+    output_id = dedup_index.lookup(route_name, entry.content_hash)
+    if output_id is None:
+        return False
+
+    try:
+        copy_id = storage_client.copy_file(
+            output_id, job.route.dest, f"recognized_{entry.name}"
+        )
+    except Exception as e:
+        logging.warning(
+            f"Could not reuse the earlier output of {entry.name} ({output_id}); "
+            f"processing it again. Error: {e}"
         )
-        return  # Exit main_workflow if a configured folder is missing or inaccessible
+        if not isinstance(e, TransientError):
+            dedup_index.forget(route_name, entry.content_hash)
+        return False
+
+    if copy_id:
+        # The copy may have overwritten the output of other content.
+        dedup_index.record(route_name, entry.content_hash, copy_id)
+    ledger = get_ledger()
+    if ledger is not None:
+        ledger.record(route_name, entry, copy_id)
+    _delete_source(job)
+    get_poller().record_progress(_poll_key(route_name, entry))
+    logging.info(f"{entry.name} duplicates an earlier file; reused its output.")
+    return True
+
+
+def _delete_source(job: FileJob):
+    """Deletes a source file that needs no processing; a failure is only logged."""
+    if job.deferred is not None:
+        job.deferred.delete(job.entry.id, job.entry.name)
+        return
+    try:
+        job.storage_client.delete_file(job.entry.id)
+    except Exception as e:
+        logging.warning(f"Could not delete source file {job.entry.name}. Error: {e}")
 
-    files_to_process = storage_client.list_files(source_path)
-    if not files_to_process:
-        logging.info("No new files to process.")
+
+def _run_file_job(route_name: str, job: FileJob):
+    """Processes one queued file and routes failures to retry or quarantine."""
+    from .processing import process_single_file
+
+    entry, storage_client, failed_path = job.entry, job.storage_client, job.route.failed
+    if entry.modified is not None:
+        get_poller().record_pickup(time.time() - entry.modified.timestamp())
+    ledger = get_ledger()
+    if ledger is not None and ledger.is_processed(route_name, entry):
+        logging.info(
+            f"{entry.name} was already processed; retrying only the delete of the source."
+        )
+        _delete_source(job)
         return
+    if _reuse_duplicate_output(route_name, job):
+        return
+    logging.info(f"--- Processing file: {entry.name} (route '{route_name}') ---")
+    start_time = time.monotonic()
+    try:
+        with profile_file(entry.name):
+            result = process_single_file(
+                storage_client,
+                entry,
+                job.route.dest,
+                delete_source=job.deferred is None,
+            )
+        if job.deferred is not None:
+            job.deferred.delete(entry.id, entry.name)
+        if ledger is not None:
+            ledger.record(route_name, entry, result.output_id)
+        dedup_index = get_dedup_index()
+        if dedup_index is not None and entry.content_hash and result.output_id:
+            dedup_index.record(route_name, entry.content_hash, result.output_id)
+        usage_store = get_usage_store()
+        if usage_store is not None:
+            usage_store.record_file(route_name, entry.name, result.pages, result.usage)
+        _cost_model.observe(entry.size, result.pages)
+        get_poller().record_progress(_poll_key(route_name, entry))
+        duration = time.monotonic() - start_time
+        logging.info(
+            f"Finished processing {entry.name}. Took {duration:.2f} seconds, "
+            f"{result.usage.prompt_tokens} prompt + {result.usage.completion_tokens} "
+            f"completion tokens over {result.pages} page(s), cost {result.usage.cost:.4f}. "
+            f"Pages per model: {dict(Counter(result.page_models))}, "
+            f"{result.escalated_pages} re-recognized at a higher DPI."
+        )
 
-    logging.info(f"Found {len(files_to_process)} files to process.")
-    for entry in files_to_process:
-        # A simple check for PDF files based on name
-        if entry.name.lower().endswith(".pdf"):
-            logging.info(f"--- Processing file: {entry.name} ---")
-            start_time = time.monotonic()
-            try:
-                process_single_file(storage_client, entry, dest_path)
-                duration = time.monotonic() - start_time
-                logging.info(
-                    f"Finished processing {entry.name}. Took {duration:.2f} seconds."
-                )
+    except PermanentError as e:
+        duration = time.monotonic() - start_time
+        logging.error(
+            f"PERMANENT ERROR processing file {entry.name} after {duration:.2f} seconds. Moving to quarantine. Error: {e}",
+            exc_info=True,
+        )
+        _quarantine_file(
+            storage_client,
+            entry.id,
+            entry.name,
+            failed_path,
+            entry.folder_id,
+            job.deferred,
+        )
+        get_poller().record_progress(_poll_key(route_name, entry))
 
-            except PermanentError as e:
-                duration = time.monotonic() - start_time
-                logging.error(
-                    f"PERMANENT ERROR processing file {entry.name} after {duration:.2f} seconds. Moving to quarantine. Error: {e}",
-                    exc_info=True,
-                )
-                _quarantine_file(storage_client, entry.id, entry.name, failed_path)
+    except TransientError as e:
+        duration = time.monotonic() - start_time
+        logging.warning(
+            f"TRANSIENT ERROR processing file {entry.name} after {duration:.2f} seconds. Will retry on next run. Error: {e}",
+            exc_info=True,
+        )
 
-            except TransientError as e:
-                duration = time.monotonic() - start_time
-                logging.warning(
-                    f"TRANSIENT ERROR processing file {entry.name} after {duration:.2f} seconds. Will retry on next run. Error: {e}",
-                    exc_info=True,
-                )
+    except Exception as e:
+        duration = time.monotonic() - start_time
+        logging.critical(
+            f"UNHANDLED CRITICAL ERROR processing file {entry.name} after {duration:.2f} seconds. Moving to quarantine as a precaution. Error: {e}",
+            exc_info=True,
+        )
+        _quarantine_file(
+            storage_client,
+            entry.id,
+            entry.name,
+            failed_path,
+            entry.folder_id,
+            job.deferred,
+        )
+        get_poller().record_progress(_poll_key(route_name, entry))
 
-            except Exception as e:
-                duration = time.monotonic() - start_time
-                logging.critical(
-                    f"UNHANDLED CRITICAL ERROR processing file {entry.name} after {duration:.2f} seconds. Moving to quarantine as a precaution. Error: {e}",
-                    exc_info=True,
-                )
-                _quarantine_file(storage_client, entry.id, entry.name, failed_path)
+
+def _flush_deferred_operations(deferred_ops: Dict[str, DeferredOperations]):
+    """Submits the batched deletes and moves of each route and reports failures."""
+    for route_name, deferred in deferred_ops.items():
+        pending = len(deferred)
+        try:
+            outcomes = deferred.flush()
+        except Exception as e:
+            logging.error(
+                f"Failed to submit the storage operations of route '{route_name}': {e}",
+                exc_info=True,
+            )
+            continue
+        if not pending:
+            continue
+        failed = [file_id for file_id, error in outcomes.items() if error is not None]
+        if failed:
+            logging.error(
+                f"{len(failed)} of {pending} storage operation(s) failed on route '{route_name}'; "
+                f"the affected files stay in the source folder and will be retried: {failed}"
+            )
         else:
-            logging.warning(f"Skipping non-PDF or folder entry: {entry.name}")
+            logging.info(
+                f"Submitted {pending} storage operation(s) in batches on route '{route_name}'."
+            )
+
+
+def main_workflow() -> RunResult:
+    """
+    Lists the source folders of all routes and processes the PDF files found.
+    Returns how many files were found and how many of them were started.
+    """
+    logging.info("Starting workflow...")
+    settings = get_settings()
+    routes = resolve_routes(settings)
+
+    if get_recognition_breaker().rejecting():
+        logging.warning(
+            "The recognition API circuit is open; not pulling new files this run."
+        )
+        return RunResult()
+
+    storage_clients = warm_up_clients(routes)
+    listed: List[Tuple[Route, StorageClient]] = []
+
+    # Files are interleaved across routes. Storage clients give every worker
+    # thread its own transport, so several files of a route can be in flight.
+    scheduler = FairScheduler(
+        max_in_flight_per_route=settings.ROUTE_CONCURRENCY,
+        policy=settings.SCHEDULING_POLICY,
+        aging_rate=settings.SCHEDULING_AGING_PAGES_PER_MINUTE,
+    )
+    deferred_ops: Dict[str, DeferredOperations] = {}
+    for route, storage_client in zip(routes, storage_clients):
+        # If client initialization failed, skip the route for this run.
+        if storage_client is None:
+            logging.critical(
+                f"Could not establish a connection to {route.provider} for route '{route.name}'."
+            )
+            continue
+        breaker = get_storage_breaker(route.name)
+        if breaker.rejecting():
+            logging.warning(
+                f"The storage circuit of route '{route.name}' is open. Skipping route."
+            )
+            continue
+        storage_client = CircuitBreakingStorageClient(storage_client, breaker)
+        if settings.DEFER_STORAGE_OPS:
+            deferred_ops[route.name] = DeferredOperations(storage_client)
+        listed.append((route, storage_client))
+
+    # Listings are streamed into the scheduler by a separate thread, so the
+    # first files start while large folders are still being paged through.
+    listing_done = threading.Event()
+
+    def list_routes():
+        try:
+            for route, storage_client in listed:
+                try:
+                    _queue_route_files(
+                        route, storage_client, scheduler, deferred_ops.get(route.name)
+                    )
+                except Exception as e:
+                    logging.critical(
+                        f"Failed to list the source folder of route '{route.name}': {e}",
+                        exc_info=True,
+                    )
+        finally:
+            listing_done.set()
+
+    lister = threading.Thread(target=list_routes, name="listing", daemon=True)
+    lister.start()
+    try:
+        started = run_scheduled(
+            scheduler,
+            _process_file_job,
+            settings.WORKER_COUNT,
+            settings.MAX_FILES_PER_RUN,
+            listing_done,
+        )
+    finally:
+        lister.join()
+        # Also on failure: leases of deferred files are released by the flush.
+        _flush_deferred_operations(deferred_ops)
+
+    found = started + scheduler.pending
+    progressed = get_poller().take_progress()
+    if not found:
+        logging.info("No new files to process.")
+        return RunResult()
+
+    logging.info(
+        f"Started {started} of {found} file(s) found across {len(routes)} route(s) "
+        f"with {settings.WORKER_COUNT} worker(s)."
+    )
+
+    wait_stats = scheduler.wait_stats()
+    logging.info(
+        f"Workflow run processed {wait_stats['count']} file(s). Queue wait: "
+        f"mean {wait_stats['mean']:.2f}s, max {wait_stats['max']:.2f}s."
+    )
+    cache_stats = get_metadata_cache().stats()
+    logging.info(
+        f"Metadata cache: {cache_stats['hits']} hit(s), "
+        f"{cache_stats['misses']} miss(es), {cache_stats['entries']} entries."
+    )
+    if settings.RECOGNITION_CASCADE:
+        logging.info(f"Pages recognized per model so far: {get_model_usage()}.")
+    if settings.RECOGNITION_ENDPOINTS:
+        from .recognition import get_endpoint_pool
+
+        logging.info(f"Recognition endpoints: {get_endpoint_pool().stats()}.")
+    if settings.HEDGE_REQUESTS:
+        logging.info(f"Hedged recognition requests so far: {get_hedger().stats()}.")
+    if settings.PDF_DPI_LADDER:
+        escalation = get_escalation_stats().summary()
+        logging.info(
+            f"DPI escalation: {escalation['escalated']} of {escalation['pages']} page(s) "
+            f"escalated so far. Final DPI: {escalation['final_dpi']}, reasons: {escalation['reasons']}."
+        )
+    meter = get_usage_meter()
+    logging.info(f"Token usage per model so far: {meter.stats()}.")
+    if meter.budget is not None:
+        logging.info(
+            f"Token budget: {meter.budget.spent()} of {meter.budget.tokens_per_hour} "
+            f"tokens used in the last hour; recognition throttled for "
+            f"{meter.budget.throttled_seconds:.0f}s so far."
+        )
+    usage_store = get_usage_store()
+    if usage_store is not None:
+        today = datetime.now(timezone.utc).date().isoformat()
+        logging.info(f"Usage today per route: {usage_store.daily_usage(today)}.")
+    polling = get_poller().stats()
+    logging.info(
+        f"Polling: {polling['listings']} folder listing(s) in {polling['runs']} "
+        f"previous run(s). Pickup latency: mean {polling['pickup_mean']:.1f}s, "
+        f"max {polling['pickup_max']:.1f}s over {polling['pickups']} file(s)."
+    )
+    return RunResult(found=found, started=started, progressed=progressed)
 
 
 def main():
@@ -209,9 +663,19 @@ def main():
     parser.add_argument(
         "--run-once", action="store_true", help="Run the workflow once and then exit."
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile CPU time per pipeline stage and peak memory per file, "
+        "writing reports next to the log file after each run.",
+    )
     args = parser.parse_args()
 
     setup_logging()
+    if args.profile:
+        enable_profiling()
+    # Sets up the spool and removes job directories left behind by a crash.
+    get_spool_manager()
 
     if args.run_once:
         logging.info("Starting application in single-run mode.")
@@ -222,24 +686,35 @@ def main():
                 f"An unexpected error occurred during the single run: {e}",
                 exc_info=True,
             )
+        write_profile_reports(get_settings().LOG_FILE.parent)
         logging.info("Single run finished.")
     else:
+        poller = get_poller()
+        trigger = start_webhook_server(resolve_routes(get_settings()))
         logging.info(
-            f"Starting application in infinite loop mode. Sleep interval: {get_settings().LOOP_SLEEP_SECONDS} seconds."
+            f"Starting application in infinite loop mode. Sleep interval: "
+            f"{poller.min_interval}-{poller.max_interval} seconds."
         )
         while True:
+            result = RunResult()
             try:
-                main_workflow()
+                result = main_workflow()
             except Exception as e:
                 # This provides a top-level catch to prevent the entire loop from crashing.
                 logging.critical(
                     f"An unexpected error occurred in the main loop: {e}", exc_info=True
                 )
-
-            logging.info(
-                f"Workflow run finished. Sleeping for {get_settings().LOOP_SLEEP_SECONDS} seconds."
-            )
-            time.sleep(get_settings().LOOP_SLEEP_SECONDS)
+            write_profile_reports(get_settings().LOG_FILE.parent)
+
+            delay = poller.next_delay(result)
+            if not delay:
+                logging.info("Workflow run left files queued. Starting the next run.")
+                continue
+            logging.info(f"Workflow run finished. Sleeping for {delay:g} seconds.")
+            if trigger is None:
+                time.sleep(delay)
+            elif trigger.wait(delay):
+                logging.info("Woken up by a storage notification.")
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 # pdf_utils.py
 import logging
+from typing import BinaryIO, Union
 from .config import get_settings
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, PageBreak
@@ -8,10 +9,11 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
 
-def create_reflowed_pdf(page_contents: list[str], pdf_path: str):
+def create_reflowed_pdf(page_contents: list[str], pdf_path: Union[str, BinaryIO]):
     """
     Saves a list of text contents (one per page) to a multi-page PDF,
     reflowing the text to fit the page width and adding page breaks.
+    `pdf_path` may also be a writable binary buffer (e.g. io.BytesIO).
     """
     settings = get_settings()
     font_name = "DejaVuSans"
@@ -34,7 +36,9 @@ def create_reflowed_pdf(page_contents: list[str], pdf_path: str):
         font_name = "Helvetica"
 
     # Basic setup for the document
-    doc = SimpleDocTemplate(str(pdf_path), pagesize=letter)
+    doc = SimpleDocTemplate(
+        pdf_path if hasattr(pdf_path, "write") else str(pdf_path), pagesize=letter
+    )
     styles = getSampleStyleSheet()
     # Create a custom style that uses our font
     custom_style = ParagraphStyle(
@@ -62,4 +66,7 @@ def create_reflowed_pdf(page_contents: list[str], pdf_path: str):
             flowables.append(PageBreak())
 
     doc.build(flowables)
-    logging.info(f"Reflowed PDF created at {pdf_path}")
+    if hasattr(pdf_path, "write"):
+        logging.info("Reflowed PDF created in memory")
+    else:
+        logging.info(f"Reflowed PDF created at {pdf_path}")
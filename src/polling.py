@@ -0,0 +1,126 @@
+# polling.py
+import threading
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional, Set
+
+from .config import get_settings
+
+
+@dataclass
+class RunResult:
+    """
+    What one workflow run found in the source folders and started, and how
+    many files made progress: new since the previous listing, or gone from
+    the source folder (processed, reused or quarantined).
+    """
+
+    found: int = 0
+    started: int = 0
+    progressed: int = 0
+
+
+class AdaptivePoller:
+    """
+    Chooses the sleep between workflow runs. After a run with progress the
+    interval drops to `min_interval`, and every other run multiplies it by
+    `backoff`, up to `max_interval`. Files that are listed again and again
+    because they keep failing transiently are not progress, so their retries
+    back off too. A run with progress that left queued files behind
+    (MAX_FILES_PER_RUN) is followed immediately by the next one.
+
+    Also counts folder listings and the pickup latency of files: the time from
+    their last modification (upload) to the start of their processing.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, backoff: float):
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max_interval
+        self.backoff = max(backoff, 1.0)
+        self.interval = self.min_interval
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._listings = 0
+        self._pickups = 0
+        self._pickup_total = 0.0
+        self._pickup_max = 0.0
+        self._progressed: Set[Hashable] = set()
+        self._listed: Set[Hashable] = set()
+        self._previously_listed: Set[Hashable] = set()
+
+    def next_delay(self, result: RunResult) -> float:
+        """Returns the seconds to sleep after a run with this result."""
+        with self._lock:
+            self._runs += 1
+            if result.progressed and result.found > result.started:
+                self.interval = self.min_interval
+                return 0.0
+            if result.progressed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+            return self.interval
+
+    def record_listing(self):
+        with self._lock:
+            self._listings += 1
+
+    def record_listed(self, key: Hashable):
+        """Records a listed file; one not listed by the previous run is progress."""
+        with self._lock:
+            self._listed.add(key)
+            if key not in self._previously_listed:
+                self._progressed.add(key)
+
+    def record_progress(self, key: Hashable):
+        """Records a file that left the source folder."""
+        with self._lock:
+            self._progressed.add(key)
+
+    def take_progress(self) -> int:
+        """
+        Returns how many files progressed in the run that just ended, and
+        starts counting the next one.
+        """
+        with self._lock:
+            progressed, self._progressed = len(self._progressed), set()
+            self._previously_listed, self._listed = self._listed, set()
+            return progressed
+
+    def record_pickup(self, latency: float):
+        with self._lock:
+            latency = max(latency, 0.0)  # Clock skew with the provider.
+            self._pickups += 1
+            self._pickup_total += latency
+            self._pickup_max = max(self._pickup_max, latency)
+
+    def stats(self) -> Dict[str, float]:
+        """Run and listing counts and pickup latency (seconds), for logging."""
+        with self._lock:
+            return {
+                "runs": self._runs,
+                "listings": self._listings,
+                "interval": self.interval,
+                "pickups": self._pickups,
+                "pickup_mean": self._pickup_total / self._pickups
+                if self._pickups
+                else 0.0,
+                "pickup_max": self._pickup_max,
+            }
+
+
+_poller: Optional[AdaptivePoller] = None
+_poller_lock = threading.Lock()
+
+
+def get_poller() -> AdaptivePoller:
+    """Returns the poller shared by the main loop and the workflow runs."""
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            settings = get_settings()
+            _poller = AdaptivePoller(
+                settings.POLL_MIN_SECONDS,
+                settings.LOOP_SLEEP_SECONDS,
+                settings.POLL_BACKOFF,
+            )
+    return _poller
@@ -1,9 +1,15 @@
 # processing.py
+import io
 import logging
 import os
 import openai
-from pdf2image import convert_from_path, exceptions as pdf2image_exceptions
-from typing import List
+from dataclasses import dataclass, field, replace
+from pdf2image import (
+    convert_from_bytes,
+    convert_from_path,
+    exceptions as pdf2image_exceptions,
+)
+from typing import Callable, List, Optional, Tuple
 from pathlib import Path
 from PIL.Image import Image
 
@@ -11,22 +17,85 @@ from .config import get_settings
 from .storage.base import StorageClient
 from .storage.dto import FileMetadata
 from .exceptions import PermanentError, TransientError
-from .recognition import image_to_base64, recognize
+from .escalation import dpi_ladder, escalation_reason, get_escalation_stats
+from .recognition import RecognitionResult, image_to_base64, recognize_page
 from .pdf_utils import create_reflowed_pdf
+from .profiling import profile_stage
+from .sharding import Shard, plan_shards, run_shards, shard_page_count
+from .spool import get_spool_manager, spool_reservation
+from .tiling import map_bands, split_bands, stitch_texts
+from .usage import TokenUsage
 
 
-def _download_and_convert(
-    storage_client: StorageClient, file_id: str, local_pdf_path: Path
-) -> List[Image]:
-    """Downloads a PDF and converts it to a list of images."""
+@dataclass
+class FileResult:
+    """The outcome of successfully processing a single file."""
+
+    pages: int  # Page count of the source document
+    escalated_pages: int = 0  # Pages re-recognized at a higher DPI
+    # The model that produced each page's text, in page order
+    page_models: List[str] = field(default_factory=list)
+    # The ID or path of the uploaded result PDF
+    output_id: Optional[str] = None
+    # Tokens spent on recognition, across all pages, models and DPI retries
+    usage: TokenUsage = field(default_factory=TokenUsage)
+
+
+# Renders one page (1-based page number) of the downloaded PDF at a given DPI.
+RenderPage = Callable[[int, int], Image]
+
+
+def _page_renderer(convert: Callable[..., List[Image]], pdf) -> RenderPage:
+    """Returns a RenderPage for `pdf` (a path or bytes) using a pdf2image converter."""
+
+    def render(page_number: int, dpi: int) -> Image:
+        return _rasterize(
+            lambda: convert(pdf, dpi=dpi, first_page=page_number, last_page=page_number)
+        )[0]
+
+    return render
+
+
+def _download_file(storage_client: StorageClient, file_id: str, local_pdf_path: Path):
     try:
-        storage_client.download_file(file_id, local_pdf_path)
+        with profile_stage("download"):
+            storage_client.download_file(file_id, local_pdf_path)
     except Exception as e:
         raise TransientError(f"API error during download: {e}") from e
 
+
+def _download_bytes(storage_client: StorageClient, file_id: str) -> bytes:
+    try:
+        with profile_stage("download"):
+            return storage_client.download_bytes(file_id)
+    except Exception as e:
+        raise TransientError(f"API error during download: {e}") from e
+
+
+def _recognize_document(
+    convert: Callable[..., List[Image]], pdf, file_name: str
+) -> Tuple[List[RecognitionResult], int]:
+    """
+    Converts a downloaded PDF (a path or bytes) with a pdf2image converter at
+    the lowest DPI of the ladder and recognizes its pages, in shards if it is
+    large enough. Returns the results in page order and the number of pages
+    escalated to a higher DPI.
+    """
+    page_count = shard_page_count(pdf)
+    if page_count:
+        return _recognize_sharded(convert, pdf, file_name, page_count)
+
+    logging.info("Converting PDF %s to images...", file_name)
+    pages = _rasterize(lambda: convert(pdf, dpi=dpi_ladder()[0]))
+    logging.info("%s has %d page(s).", file_name, len(pages))
+    return _recognize_pages(pages, _page_renderer(convert, pdf))
+
+
+def _rasterize(convert: Callable[[], List[Image]]) -> List[Image]:
+    """Runs a pdf2image conversion, mapping its failures to PermanentError."""
     try:
-        logging.info(f"Converting PDF {local_pdf_path.name} to images...")
-        pages = convert_from_path(str(local_pdf_path), dpi=get_settings().PDF_DPI)
+        with profile_stage("convert"):
+            pages = convert()
         if not pages:
             raise PermanentError("PDF conversion resulted in 0 pages.")
         return pages
@@ -39,28 +108,122 @@ def _download_and_convert(
         raise PermanentError(f"PDF conversion failed: {e}") from e
 
 
-def _recognize_pages(pages: List[Image]) -> List[str]:
-    """Recognizes text from a list of images."""
-    recognized_texts = []
-    for i, page in enumerate(pages):
-        logging.info(f"Recognizing page {i + 1}/{len(pages)}...")
-        try:
-            img_b64 = image_to_base64(page)
-            text = recognize(img_b64)
-            recognized_texts.append(text)
-        except openai.APIConnectionError as e:
-            raise TransientError("Recognition API connection error") from e
-        except openai.RateLimitError as e:
-            raise TransientError("Recognition API rate limit exceeded") from e
-        except openai.BadRequestError as e:
-            raise PermanentError(
-                f"Recognition API bad request (invalid image?): {e}"
-            ) from e
-        except openai.AuthenticationError as e:
-            raise PermanentError(
-                f"Recognition API authentication error (check API key): {e}"
-            ) from e
-    return recognized_texts
+def _recognize_pages(
+    pages: List[Image],
+    render_page: Optional[RenderPage] = None,
+    first_page: int = 1,
+    page_count: Optional[int] = None,
+) -> Tuple[List[RecognitionResult], int]:
+    """
+    Recognizes text from a list of images, each through the model cascade.
+    With a DPI ladder, a page whose result looks poor is re-rasterized with
+    `render_page` at the next DPI and recognized again. Returns the results
+    and the number of pages escalated to a higher DPI.
+
+    `pages` may be a slice of the document starting at page `first_page`,
+    out of `page_count` pages in total.
+    """
+    page_count = page_count or len(pages)
+    ladder = dpi_ladder()
+    stats = get_escalation_stats()
+    results = []
+    escalated = 0
+    for i, page in enumerate(pages, start=first_page - 1):
+        logging.info("Recognizing page %d/%d...", i + 1, page_count)
+        result = _recognize_image(page)
+        dpi, reasons = ladder[0], []
+        if render_page is not None:
+            for next_dpi in ladder[1:]:
+                reason = escalation_reason(result.text)
+                if reason is None:
+                    break
+                logging.info(
+                    "Page %d result looks poor (%s); retrying at %d DPI...",
+                    i + 1,
+                    reason,
+                    next_dpi,
+                )
+                dpi = next_dpi
+                reasons.append(reason)
+                spent = result.usage
+                result = _recognize_image(render_page(i + 1, dpi))
+                result = replace(result, usage=spent + result.usage)
+        stats.record(dpi, reasons)
+        escalated += bool(reasons)
+        results.append(result)
+    return results, escalated
+
+
+def _recognize_image(image: Image) -> RecognitionResult:
+    """
+    Recognizes text from one page image, mapping API errors to the app's
+    errors. Dense pages are recognized in parallel horizontal bands when
+    tiling is enabled.
+    """
+    bands = split_bands(image)
+    if bands is None:
+        return _recognize_band(image)
+    logging.info("Dense page; recognizing it in %d bands...", len(bands))
+    results = map_bands(bands, _recognize_band)
+    # The band that went furthest down the model cascade names the model.
+    furthest = max(results, key=lambda result: len(result.escalations))
+    return RecognitionResult(
+        stitch_texts([result.text for result in results]),
+        furthest.model,
+        furthest.escalations,
+        sum((result.usage for result in results), TokenUsage()),
+    )
+
+
+def _recognize_band(image: Image) -> RecognitionResult:
+    try:
+        with profile_stage("encode"):
+            img_base64 = image_to_base64(image)
+        with profile_stage("recognize"):
+            return recognize_page(img_base64)
+    except openai.APIConnectionError as e:
+        raise TransientError("Recognition API connection error") from e
+    except openai.RateLimitError as e:
+        raise TransientError("Recognition API rate limit exceeded") from e
+    except openai.BadRequestError as e:
+        raise PermanentError(
+            f"Recognition API bad request (invalid image?): {e}"
+        ) from e
+    except openai.AuthenticationError as e:
+        raise PermanentError(
+            f"Recognition API authentication error (check API key): {e}"
+        ) from e
+
+
+def _recognize_sharded(
+    convert: Callable[..., List[Image]], pdf, file_name: str, page_count: int
+) -> Tuple[List[RecognitionResult], int]:
+    """
+    Recognizes a large PDF in page-range shards of SHARD_PAGES pages, which
+    are rasterized and recognized in parallel and retried individually.
+    """
+    shards = plan_shards(page_count, get_settings().SHARD_PAGES)
+    logging.info(
+        f"Splitting {file_name} ({page_count} pages) into {len(shards)} shard(s)."
+    )
+    render_page = _page_renderer(convert, pdf)
+
+    def process_shard(shard: Shard) -> Tuple[List[RecognitionResult], int]:
+        pages = _rasterize(
+            lambda: convert(
+                pdf,
+                dpi=dpi_ladder()[0],
+                first_page=shard.first_page,
+                last_page=shard.last_page,
+            )
+        )
+        return _recognize_pages(pages, render_page, shard.first_page, page_count)
+
+    results, escalated = [], 0
+    for shard_results, shard_escalated in run_shards(shards, process_shard):
+        results.extend(shard_results)
+        escalated += shard_escalated
+    return results, escalated
 
 
 def _create_and_upload_pdf(
@@ -68,19 +231,51 @@ def _create_and_upload_pdf(
     recognized_texts: List[str],
     result_pdf_path: Path,
     destination_path: str,
-):
-    """Creates a result PDF and uploads it to storage."""
-    create_reflowed_pdf(recognized_texts, result_pdf_path)
+) -> str:
+    """Creates a result PDF and uploads it to storage. Returns its ID or path."""
+    with profile_stage("render_pdf"):
+        create_reflowed_pdf(recognized_texts, result_pdf_path)
     try:
-        storage_client.upload_file(
-            local_path=result_pdf_path,
-            folder_id=destination_path,
-            filename=result_pdf_path.name,
-        )
+        with profile_stage("upload"):
+            return storage_client.upload_file(
+                local_path=result_pdf_path,
+                folder_id=destination_path,
+                filename=result_pdf_path.name,
+            )
+    except Exception as e:
+        raise TransientError(f"API error during upload: {e}") from e
+
+
+def _create_and_upload_pdf_in_memory(
+    storage_client: StorageClient,
+    recognized_texts: List[str],
+    filename: str,
+    destination_path: str,
+) -> str:
+    """Renders the result PDF into memory and uploads it from there."""
+    buffer = io.BytesIO()
+    with profile_stage("render_pdf"):
+        create_reflowed_pdf(recognized_texts, buffer)
+    try:
+        with profile_stage("upload"):
+            return storage_client.upload_bytes(
+                buffer.getvalue(), folder_id=destination_path, filename=filename
+            )
     except Exception as e:
         raise TransientError(f"API error during upload: {e}") from e
 
 
+def _delete_source_file(storage_client: StorageClient, file_entry: FileMetadata):
+    """Deletes the processed source file; a failure is only logged."""
+    try:
+        storage_client.delete_file(file_entry.id)
+        logging.info(f"Successfully processed and deleted {file_entry.name}")
+    except Exception as e:
+        logging.warning(
+            f"Could not delete original file {file_entry.name} after processing. Error: {e}"
+        )
+
+
 def _cleanup_local_files(paths: List[Path]):
     """Removes temporary local files."""
     logging.info("Cleaning up local files...")
@@ -90,37 +285,93 @@ def _cleanup_local_files(paths: List[Path]):
 
 
 def process_single_file(
-    storage_client: StorageClient, file_entry: FileMetadata, destination_path: str
-):
+    storage_client: StorageClient,
+    file_entry: FileMetadata,
+    destination_path: str,
+    delete_source: bool = True,
+    work_dir: Optional[Path] = None,
+) -> FileResult:
     """
     Full processing cycle for a single file with detailed error handling.
     This function orchestrates the download, conversion, recognition, and upload.
+
+    With `delete_source=False` the source file is left in place, for callers
+    that delete it themselves (e.g. in a batch at the end of the run).
+    Files up to IN_MEMORY_MAX_BYTES are processed in memory. Larger files are
+    written to `work_dir`, or by default to a fresh spool job directory, which
+    may wait for space under the spool quota.
     """
-    settings = get_settings()
-    local_pdf_path = settings.LOCAL_BUF_DIR / file_entry.name
-    result_pdf_path = settings.LOCAL_BUF_DIR / f"recognized_{file_entry.name}"
+    if work_dir is None:
+        threshold = get_settings().IN_MEMORY_MAX_BYTES
+        if file_entry.size and file_entry.size <= threshold:
+            return _process_in_memory(
+                storage_client, file_entry, destination_path, delete_source
+            )
+        with get_spool_manager().job_dir(spool_reservation(file_entry.size)) as job_dir:
+            return process_single_file(
+                storage_client, file_entry, destination_path, delete_source, job_dir
+            )
+
+    local_pdf_path = work_dir / file_entry.name
+    result_pdf_path = work_dir / f"recognized_{file_entry.name}"
 
     try:
-        # 1. Download and Convert
-        pages = _download_and_convert(storage_client, file_entry.id, local_pdf_path)
+        # 1. Download
+        _download_file(storage_client, file_entry.id, local_pdf_path)
 
-        # 2. Recognize Text
-        recognized_texts = _recognize_pages(pages)
+        # 2. Convert and Recognize Text
+        results, escalated = _recognize_document(
+            convert_from_path, str(local_pdf_path), file_entry.name
+        )
+        recognized_texts = [result.text for result in results]
 
         # 3. Create and Upload PDF
-        _create_and_upload_pdf(
+        output_id = _create_and_upload_pdf(
             storage_client, recognized_texts, result_pdf_path, destination_path
         )
 
         # 4. Delete Original File
-        try:
-            storage_client.delete_file(file_entry.id)
-            logging.info(f"Successfully processed and deleted {file_entry.name}")
-        except Exception as e:
-            logging.warning(
-                f"Could not delete original file {file_entry.name} after processing. Error: {e}"
-            )
+        if delete_source:
+            _delete_source_file(storage_client, file_entry)
+
+        return FileResult(
+            pages=len(results),
+            escalated_pages=escalated,
+            page_models=[result.model for result in results],
+            output_id=output_id,
+            usage=sum((result.usage for result in results), TokenUsage()),
+        )
 
     finally:
         # 5. Clean up local files
         _cleanup_local_files([local_pdf_path, result_pdf_path])
+
+
+def _process_in_memory(
+    storage_client: StorageClient,
+    file_entry: FileMetadata,
+    destination_path: str,
+    delete_source: bool,
+) -> FileResult:
+    """The processing cycle of `process_single_file`, without working files."""
+    data = _download_bytes(storage_client, file_entry.id)
+    results, escalated = _recognize_document(convert_from_bytes, data, file_entry.name)
+    recognized_texts = [result.text for result in results]
+
+    output_id = _create_and_upload_pdf_in_memory(
+        storage_client,
+        recognized_texts,
+        f"recognized_{file_entry.name}",
+        destination_path,
+    )
+
+    if delete_source:
+        _delete_source_file(storage_client, file_entry)
+
+    return FileResult(
+        pages=len(results),
+        escalated_pages=escalated,
+        page_models=[result.model for result in results],
+        output_id=output_id,
+        usage=sum((result.usage for result in results), TokenUsage()),
+    )
@@ -0,0 +1,166 @@
+# profiling.py
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Rows in the summary's function and allocation tables.
+TOP_N = 25
+# Frames kept per traced allocation.
+TRACEMALLOC_FRAMES = 10
+
+
+class StageProfiler:
+    """
+    Collects CPU profiles per pipeline stage and peak traced memory per file.
+
+    Stages are profiled with cProfile using per-thread CPU time, so time spent
+    waiting on the network does not count. cProfile only sees the thread that
+    enabled it, so each stage block gets its own profile, merged into the
+    stage's totals when the block ends. Nested stages count towards the
+    outermost one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._totals: Dict[str, List[float]] = {}  # stage -> [calls, wall, cpu]
+        self._files: List[Tuple[str, float, int]] = []  # (name, seconds, peak)
+        self._files_in_flight = 0
+        self.started = datetime.now()
+
+    @contextmanager
+    def stage(self, name: str):
+        if getattr(self._local, "stage", None) is not None:
+            yield
+            return
+        self._local.stage = name
+        profile = cProfile.Profile(time.thread_time)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            self._local.stage = None
+            with self._lock:
+                if name in self._stats:
+                    self._stats[name].add(profile)
+                else:
+                    self._stats[name] = pstats.Stats(profile)
+                totals = self._totals.setdefault(name, [0, 0.0, 0.0])
+                totals[0] += 1
+                totals[1] += wall
+                totals[2] += cpu
+
+    @contextmanager
+    def file(self, name: str):
+        """
+        Records the peak traced memory while a file is processed. The peak is
+        process-wide, so it includes files processed at the same time; it is
+        exact with WORKER_COUNT=1.
+        """
+        with self._lock:
+            if self._files_in_flight == 0:
+                tracemalloc.reset_peak()
+            self._files_in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            with self._lock:
+                self._files_in_flight -= 1
+                self._files.append((name, time.perf_counter() - started, peak))
+
+    def write_reports(self, directory: Path) -> Optional[Path]:
+        """
+        Writes one pstats file per stage and a text summary into `directory`,
+        then starts over. Returns the summary path, or None if nothing ran.
+        """
+        with self._lock:
+            stats, totals, files = self._stats, self._totals, self._files
+            self._stats, self._totals, self._files = {}, {}, []
+        if not totals and not files:
+            return None
+
+        prefix = f"profile-{datetime.now():%Y%m%d-%H%M%S}"
+        out = io.StringIO()
+        out.write(f"Profile of the run started {self.started:%Y-%m-%d %H:%M:%S}\n\n")
+        out.write("Stage            calls      wall s       cpu s\n")
+        for name, (calls, wall, cpu) in sorted(
+            totals.items(), key=lambda item: -item[1][2]
+        ):
+            out.write(f"{name:<14} {calls:>7} {wall:>11.2f} {cpu:>11.2f}\n")
+
+        for name, stage_stats in stats.items():
+            stage_stats.dump_stats(directory / f"{prefix}.{name}.pstats")
+            out.write(
+                f"\n--- Top {TOP_N} functions in stage '{name}' by CPU time ---\n"
+            )
+            stage_stats.stream = out
+            stage_stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_N)
+
+        out.write("\n--- Peak traced memory per file ---\n")
+        for name, seconds, peak in sorted(files, key=lambda item: -item[2]):
+            out.write(f"{peak / 2**20:>9.1f} MiB {seconds:>9.2f} s  {name}\n")
+
+        snapshot = tracemalloc.take_snapshot()
+        out.write(f"\n--- Top {TOP_N} live allocation sites ---\n")
+        for stat in snapshot.statistics("lineno")[:TOP_N]:
+            out.write(f"{stat}\n")
+
+        summary_path = directory / f"{prefix}.txt"
+        summary_path.write_text(out.getvalue())
+        self.started = datetime.now()
+        return summary_path
+
+
+_profiler: Optional[StageProfiler] = None
+
+
+def enable_profiling():
+    """Turns on stage profiling and allocation tracing for this process."""
+    global _profiler
+    if _profiler is None:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        _profiler = StageProfiler()
+        logging.info("Profiling enabled; reports are written after each run.")
+
+
+@contextmanager
+def profile_stage(name: str):
+    """Profiles the enclosed block as pipeline stage `name` when profiling is on."""
+    if _profiler is None:
+        yield
+        return
+    with _profiler.stage(name):
+        yield
+
+
+@contextmanager
+def profile_file(name: str):
+    """Records peak traced memory for the enclosed file when profiling is on."""
+    if _profiler is None:
+        yield
+        return
+    with _profiler.file(name):
+        yield
+
+
+def write_profile_reports(directory: Path):
+    """Writes the reports collected since the last call, if profiling is on."""
+    if _profiler is None:
+        return
+    summary_path = _profiler.write_reports(directory)
+    if summary_path is not None:
+        logging.info(f"Profile reports written to {summary_path}.")
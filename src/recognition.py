@@ -2,13 +2,57 @@
 import base64
 import io
 import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import openai
 from openai import OpenAI
+
+from .cascade import CascadeModel, record_model_usage, resolve_cascade
+from .circuit_breaker import get_recognition_breaker
 from .config import get_settings
+from .endpoints import Endpoint, EndpointPool, recognition_capacity
+from .escalation import escalation_reason
+from .hedging import HedgeAttempt, HedgeCancelled, get_hedger
+from .usage import TokenUsage, completion_usage, get_usage_meter
 
 # Global variable to hold the client instance.
 # Using a private-like name to discourage direct access.
 _client: OpenAI | None = None
 
+# Clients and load balancer of RECOGNITION_ENDPOINTS, when configured.
+_endpoint_clients: Dict[str, OpenAI] = {}
+_endpoint_pool: EndpointPool | None = None
+
+# Recognition concurrency budget shared by all workers and routes.
+_recognition_slots: threading.BoundedSemaphore | None = None
+_recognition_slots_lock = threading.Lock()
+# Per-model concurrency budgets of the cascade tiers, keyed by model name.
+_model_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+# A cascade escalation rule looks at a model's result and returns why the page
+# should go to the next model, or None to accept the result.
+EscalationRule = Callable[[str], Optional[str]]
+
+_escalation_rules: Dict[str, EscalationRule] = {
+    "quality": escalation_reason,  # The ESCALATION_* heuristics
+    "never": lambda text: None,
+}
+
+
+@dataclass(frozen=True)
+class RecognitionResult:
+    """The recognized text of a page and the model that produced it."""
+
+    text: str
+    model: str
+    # Why the page passed through earlier models, in order
+    escalations: Tuple[str, ...] = ()
+    # Tokens of every request made for the page, across all models
+    usage: TokenUsage = TokenUsage()
+
 
 def get_openai_client() -> OpenAI:
     """
@@ -26,6 +70,73 @@ def get_openai_client() -> OpenAI:
     return _client
 
 
+def get_endpoint_pool() -> EndpointPool | None:
+    """
+    Returns the load balancer of RECOGNITION_ENDPOINTS, or None when requests
+    go to OPENAI_BASE_URL only.
+    """
+    global _endpoint_pool
+    settings = get_settings()
+    if not settings.RECOGNITION_ENDPOINTS:
+        return None
+    with _recognition_slots_lock:
+        if _endpoint_pool is None:
+            _endpoint_pool = EndpointPool(
+                settings.RECOGNITION_ENDPOINTS,
+                max_error_rate=settings.ENDPOINT_MAX_ERROR_RATE,
+                ejection_seconds=settings.ENDPOINT_EJECTION_SECONDS,
+            )
+    return _endpoint_pool
+
+
+def get_endpoint_client(endpoint: Endpoint) -> OpenAI:
+    """Returns the cached client of one of RECOGNITION_ENDPOINTS."""
+    with _recognition_slots_lock:
+        if endpoint.name not in _endpoint_clients:
+            logging.info(f"Initializing OpenAI client for endpoint {endpoint.name}.")
+            _endpoint_clients[endpoint.name] = OpenAI(
+                base_url=endpoint.base_url,
+                api_key=endpoint.api_key or get_settings().OPENAI_API_KEY,
+            )
+        return _endpoint_clients[endpoint.name]
+
+
+def get_recognition_slots() -> threading.BoundedSemaphore:
+    """
+    Returns the semaphore that bounds in-flight recognition API calls across
+    all workers, creating it on first use from RECOGNITION_CONCURRENCY (or the
+    endpoints' combined concurrency with RECOGNITION_ENDPOINTS).
+    """
+    global _recognition_slots
+    with _recognition_slots_lock:
+        if _recognition_slots is None:
+            _recognition_slots = threading.BoundedSemaphore(
+                recognition_capacity(get_settings())
+            )
+    return _recognition_slots
+
+
+def _get_model_slots(tier: CascadeModel) -> threading.BoundedSemaphore:
+    with _recognition_slots_lock:
+        if tier.name not in _model_slots:
+            _model_slots[tier.name] = threading.BoundedSemaphore(tier.concurrency)
+        return _model_slots[tier.name]
+
+
+def register_escalation_rule(name: str, rule: EscalationRule):
+    """Makes a custom rule available to CASCADE_ESCALATION_RULE."""
+    _escalation_rules[name] = rule
+
+
+def get_escalation_rule(name: str) -> EscalationRule:
+    try:
+        return _escalation_rules[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown cascade escalation rule '{name}'. Available: {sorted(_escalation_rules)}."
+        ) from None
+
+
 def image_to_base64(img):
     """Encodes a PIL image object into a Base64 string."""
     buffered = io.BytesIO()
@@ -33,38 +144,206 @@ def image_to_base64(img):
     return base64.b64encode(buffered.getvalue()).decode()
 
 
-def recognize(img_base64: str) -> str:
+def _is_endpoint_failure(error: Exception) -> bool:
+    """
+    Whether an error reflects on the endpoint's health rather than the
+    request. Used by the endpoint pool and the recognition circuit breaker.
+    """
+    if isinstance(error, openai.APIConnectionError):  # Includes timeouts
+        return True
+    return isinstance(error, openai.APIStatusError) and (
+        error.status_code >= 500 or error.status_code == 429
+    )
+
+
+def _create_completion(max_retries: Optional[int] = None, **request):
+    """
+    Sends a chat completion request, through the endpoint pool if configured.
+    `max_retries` overrides the client's retries of failed requests.
+    """
+
+    def with_retries(client: OpenAI) -> OpenAI:
+        if max_retries is None:
+            return client
+        return client.with_options(max_retries=max_retries)
+
+    pool = get_endpoint_pool()
+    if pool is None:
+        return with_retries(get_openai_client()).chat.completions.create(**request)
+
+    state = pool.acquire()
+    started = time.monotonic()
+    failed = True
+    try:
+        completion = with_retries(
+            get_endpoint_client(state.endpoint)
+        ).chat.completions.create(**request)
+        failed = False
+        return completion
+    except Exception as e:
+        failed = _is_endpoint_failure(e)
+        raise
+    finally:
+        pool.release(state, time.monotonic() - started, failed)
+
+
+def recognize(
+    img_base64: str,
+    model: Optional[str] = None,
+    timeout: Optional[float] = None,
+    usage: Optional[List[TokenUsage]] = None,
+    timeout_escalates: bool = False,
+    attempt: Optional[HedgeAttempt] = None,
+) -> str:
     """
     Sends an image to the recognition API.
 
     :param img_base64: Base64 encoded image.
+    :param model: The model to use. Defaults to RECOGNITION_MODEL.
+    :param timeout: The request timeout in seconds. Defaults to the client's.
+    :param usage: If given, the token usage of the request is appended to it.
+    :param attempt: The copy of a hedged call this request is, if hedged. It
+        is abandoned (HedgeCancelled) if the other copy wins while this one
+        waits for the budget or a recognition slot.
+    :param timeout_escalates: Whether a timeout hands the page to a stronger
+        cascade tier. Such timeouts are routing, not outages, so they do not
+        count against the recognition circuit breaker, and the request is not
+        retried: the next tier is tried after one `timeout`.
     :return: Recognized text.
     """
     settings = get_settings()
-    client = get_openai_client()
+    model = model or settings.RECOGNITION_MODEL
+    options = {"timeout": timeout} if timeout else {}
+    if timeout_escalates:
+        options["max_retries"] = 0
+    meter = get_usage_meter()
+    if meter.budget is not None:
+        meter.budget.wait()
+    if attempt is not None:
+        attempt.check()
 
+    # Fails fast with CircuitOpenError while the recognition API is down.
+    breaker = get_recognition_breaker()
+    breaker.before_call()
     try:
-        logging.info("Sending image to recognition API...")
-        completion = client.chat.completions.create(
-            model=settings.RECOGNITION_MODEL,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": settings.RECOGNITION_PROMPT},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{img_base64}"
+        with get_recognition_slots():
+            if attempt is not None:
+                attempt.check()
+            logging.info("Sending image to recognition API...")
+            started = time.monotonic()
+            completion = _create_completion(
+                model=model,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": settings.RECOGNITION_PROMPT},
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:image/jpeg;base64,{img_base64}"
+                                },
                             },
-                        },
-                    ],
-                }
-            ],
-        )
-        logging.info("Recognition successful.")
-        return completion.choices[0].message.content
+                        ],
+                    }
+                ],
+                **options,
+            )
+    except HedgeCancelled:
+        breaker.record_cancelled()
+        raise
     except Exception as e:
-        logging.error(f"Recognition API call failed: {e}", exc_info=True)
+        if _is_endpoint_failure(e) and not (
+            timeout_escalates and isinstance(e, openai.APITimeoutError)
+        ):
+            breaker.record_failure(e)
+        else:
+            breaker.record_success()
+        logging.error("Recognition API call failed: %s", e, exc_info=True)
         # Re-raise the error for the main loop to handle
         raise
+    breaker.record_success()
+    if attempt is not None:
+        attempt.record_latency(time.monotonic() - started)
+    request_usage = completion_usage(completion, model, settings.TOKEN_PRICES)
+    meter.record(model, request_usage)
+    if usage is not None:
+        usage.append(request_usage)
+    logging.info(
+        "Recognition successful (%d prompt + %d completion tokens).",
+        request_usage.prompt_tokens,
+        request_usage.completion_tokens,
+    )
+    return completion.choices[0].message.content
+
+
+def _call_model(
+    img_base64: str,
+    tier: CascadeModel,
+    hedge: bool,
+    usage: List[TokenUsage],
+    is_last: bool = True,
+) -> str:
+    """
+    Calls one cascade tier, through the hedger when hedging is enabled. The
+    caller holds a slot of the tier's model; a hedge is only sent if another
+    one is free. The usage of every request sent, including losing hedges,
+    goes to `usage`.
+    Timeouts of tiers other than the last escalate the page (see recognize).
+    """
+
+    def call(attempt: Optional[HedgeAttempt] = None):
+        return recognize(
+            img_base64,
+            tier.name,
+            tier.timeout_seconds,
+            usage,
+            timeout_escalates=not is_last,
+            attempt=attempt,
+        )
+
+    if not hedge:
+        return call()
+    # The caller holds a model slot for the primary; a hedge needs its own.
+    return get_hedger().run(tier.name, call, _get_model_slots(tier))
+
+
+def recognize_page(img_base64: str) -> RecognitionResult:
+    """
+    Recognizes an image with the model cascade. Each tier is tried in order
+    under its own concurrency limit and timeout; a page moves on to the next
+    tier when CASCADE_ESCALATION_RULE rejects the result or the request times
+    out. The last tier's result is always accepted.
+    """
+    settings = get_settings()
+    tiers = resolve_cascade(settings)
+    rule = get_escalation_rule(settings.CASCADE_ESCALATION_RULE)
+    escalations = []
+    usage: List[TokenUsage] = []
+    for i, tier in enumerate(tiers):
+        is_last = i == len(tiers) - 1
+        try:
+            # The model slot is taken first, so pages queued for a busy model
+            # do not hold shared slots that other models could use.
+            with _get_model_slots(tier):
+                text = _call_model(
+                    img_base64, tier, settings.HEDGE_REQUESTS, usage, is_last
+                )
+        except openai.APITimeoutError:
+            if is_last:
+                raise
+            reason = "timeout"
+        else:
+            reason = None if is_last else rule(text)
+            if reason is None:
+                record_model_usage(tier.name)
+                return RecognitionResult(
+                    text, tier.name, tuple(escalations), sum(usage, TokenUsage())
+                )
+        logging.info(
+            "Escalating page from model %s to %s (%s)...",
+            tier.name,
+            tiers[i + 1].name,
+            reason,
+        )
+        escalations.append(reason)
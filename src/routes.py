@@ -0,0 +1,69 @@
+# routes.py
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass(frozen=True)
+class Route:
+    """
+    A single processing route: one storage provider account together with the
+    source, destination and failed folders it serves. One process can serve
+    many routes (see `Settings.ROUTES`).
+    """
+
+    name: str
+    provider: str  # "dropbox" or "gdrive"
+    source: Optional[str]
+    dest: Optional[str]
+    failed: Optional[str]
+
+    # --- Dropbox credentials ---
+    dropbox_app_key: Optional[str] = None
+    dropbox_app_secret: Optional[str] = None
+    dropbox_refresh_token: Optional[str] = None
+
+    # --- Google Drive credentials ---
+    gdrive_credentials_json: Optional[str] = None
+    gdrive_token_json: Optional[str] = None
+
+
+def default_route(settings) -> Route:
+    """Builds the single route described by the provider-specific settings."""
+    if settings.STORAGE_PROVIDER == "dropbox":
+        return Route(
+            name="dropbox",
+            provider="dropbox",
+            source=settings.DROPBOX_SOURCE_DIR,
+            dest=settings.DROPBOX_DEST_DIR,
+            failed=settings.DROPBOX_FAILED_DIR,
+            dropbox_app_key=settings.DROPBOX_APP_KEY,
+            dropbox_app_secret=settings.DROPBOX_APP_SECRET,
+            dropbox_refresh_token=settings.DROPBOX_REFRESH_TOKEN,
+        )
+    if settings.STORAGE_PROVIDER == "gdrive":
+        return Route(
+            name="gdrive",
+            provider="gdrive",
+            source=settings.GDRIVE_SOURCE_FOLDER_ID,
+            dest=settings.GDRIVE_DEST_FOLDER_ID,
+            failed=settings.GDRIVE_FAILED_FOLDER_ID,
+            gdrive_credentials_json=settings.GDRIVE_CREDENTIALS_JSON,
+            gdrive_token_json=settings.GDRIVE_TOKEN_JSON,
+        )
+    return Route(
+        name=settings.STORAGE_PROVIDER,
+        provider=settings.STORAGE_PROVIDER,
+        source=None,
+        dest=None,
+        failed=None,
+    )
+
+
+def resolve_routes(settings) -> List[Route]:
+    """
+    Returns the routes this process serves: the configured `ROUTES` list, or
+    the single route described by the provider-specific settings.
+    """
+    if settings.ROUTES:
+        return list(settings.ROUTES)
+    return [default_route(settings)]
@@ -0,0 +1,212 @@
+# scheduler.py
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SCHEDULING_POLICIES = ("fifo", "sjf")
+# How often run_scheduled looks for new jobs while they are still being listed.
+JOB_POLL_SECONDS = 0.05
+
+
+class CostModel:
+    """
+    Estimates the cost of a file, in pages, from its size in bytes.
+
+    The bytes-per-page ratio starts from a rough default and is calibrated
+    with an exponentially weighted moving average of the page counts observed
+    after download.
+    """
+
+    def __init__(
+        self,
+        bytes_per_page: float = 100_000,
+        unknown_size_pages: float = 5.0,
+        smoothing: float = 0.2,
+    ):
+        self.bytes_per_page = bytes_per_page
+        self.unknown_size_pages = unknown_size_pages
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+
+    def estimate_pages(self, size: Optional[int]) -> float:
+        """Returns the estimated page count of a file of `size` bytes."""
+        if not size:
+            return self.unknown_size_pages
+        with self._lock:
+            return max(1.0, size / self.bytes_per_page)
+
+    def observe(self, size: Optional[int], pages: int):
+        """Calibrates the model with the real page count of a processed file."""
+        if not size or not pages:
+            return
+        with self._lock:
+            self.bytes_per_page += self.smoothing * (size / pages - self.bytes_per_page)
+
+
+class FairScheduler:
+    """
+    Round-robin scheduler over per-route job queues.
+
+    Each call to `next_job` serves the next route in turn that has queued work
+    and is below its in-flight limit, so a large backlog on one route cannot
+    starve the others.
+
+    Within a route, jobs are ordered by `policy`:
+      - "fifo": in the order they were added.
+      - "sjf": shortest job first by estimated cost, with aging. A job's
+        priority is `cost - aging_rate * age_in_minutes`, so a large job waiting
+        long enough eventually overtakes newer small ones.
+    """
+
+    def __init__(
+        self,
+        max_in_flight_per_route: int = 1,
+        policy: str = "fifo",
+        aging_rate: float = 1.0,
+    ):
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(
+                f"Invalid scheduling policy '{policy}'. Must be one of {SCHEDULING_POLICIES}."
+            )
+        self.max_in_flight_per_route = max_in_flight_per_route
+        self.policy = policy
+        self.aging_rate = aging_rate
+        self._queues: "OrderedDict[str, List[Tuple[float, int, float, Any]]]" = (
+            OrderedDict()
+        )
+        self._in_flight: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._wait_times: List[float] = []
+        self._lock = threading.Lock()
+
+    def _priority(self, cost: float, submitted_at: float, sequence: int) -> float:
+        if self.policy == "fifo":
+            return sequence
+        # The aging term is `aging_rate * (now - submitted_at) / 60`. Its `now`
+        # part is the same for every queued job, so it can be dropped and the
+        # priority stays fixed while the job waits in the heap.
+        return cost + self.aging_rate * submitted_at / 60
+
+    def add(
+        self,
+        route_name: str,
+        job: Any,
+        cost: float = 0.0,
+        submitted_at: Optional[float] = None,
+    ):
+        """
+        Queues a job for a route.
+
+        :param cost: The estimated cost of the job (e.g. its page count).
+        :param submitted_at: When the work became available (epoch seconds),
+            used for aging. Defaults to now.
+        """
+        now = time.time()
+        with self._lock:
+            sequence = next(self._sequence)
+            priority = self._priority(
+                cost, submitted_at if submitted_at is not None else now, sequence
+            )
+            heapq.heappush(
+                self._queues.setdefault(route_name, []),
+                (priority, sequence, time.monotonic(), job),
+            )
+            self._in_flight.setdefault(route_name, 0)
+
+    def next_job(self) -> Optional[Tuple[str, Any]]:
+        """
+        Returns the next (route_name, job) pair to run, or None if no route
+        currently has an eligible job.
+        """
+        with self._lock:
+            for _ in range(len(self._queues)):
+                route_name, queue = next(iter(self._queues.items()))
+                # Rotate the route to the back, so the next call starts elsewhere.
+                self._queues.move_to_end(route_name)
+                if queue and self._in_flight[route_name] < self.max_in_flight_per_route:
+                    self._in_flight[route_name] += 1
+                    _, _, queued_at, job = heapq.heappop(queue)
+                    self._wait_times.append(time.monotonic() - queued_at)
+                    return route_name, job
+            return None
+
+    def task_done(self, route_name: str):
+        """Marks a job previously returned by `next_job` as finished."""
+        with self._lock:
+            self._in_flight[route_name] -= 1
+
+    @property
+    def pending(self) -> int:
+        """The number of queued jobs that have not been started yet."""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def wait_stats(self) -> Dict[str, float]:
+        """Returns the count, mean and max queue wait (seconds) of started jobs."""
+        with self._lock:
+            waits = list(self._wait_times)
+        if not waits:
+            return {"count": 0, "mean": 0.0, "max": 0.0}
+        return {"count": len(waits), "mean": sum(waits) / len(waits), "max": max(waits)}
+
+
+def run_scheduled(
+    scheduler: FairScheduler,
+    handler: Callable[[str, Any], None],
+    max_workers: int,
+    max_jobs: int = 0,
+    listing_done: Optional[threading.Event] = None,
+) -> int:
+    """
+    Runs the queued jobs through `handler(route_name, job)` on a thread pool,
+    dispatching in the order chosen by the scheduler. Exceptions raised by the
+    handler are logged and do not stop the remaining jobs.
+
+    With `max_jobs`, at most that many jobs are started; the rest stay queued.
+    With `listing_done`, jobs may still be added while this runs: an empty
+    queue only ends the run once the event is set.
+    Returns the number of jobs started.
+    """
+    started = 0
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="worker"
+    ) as executor:
+        in_flight = {}
+        while True:
+            # Read before dispatching: once set, no job can be added behind us.
+            listing = listing_done is not None and not listing_done.is_set()
+            while len(in_flight) < max_workers and not (
+                max_jobs and started >= max_jobs
+            ):
+                scheduled = scheduler.next_job()
+                if scheduled is None:
+                    break
+                route_name, job = scheduled
+                in_flight[executor.submit(handler, route_name, job)] = route_name
+                started += 1
+
+            if not in_flight:
+                if not listing or (max_jobs and started >= max_jobs):
+                    break
+                listing_done.wait(JOB_POLL_SECONDS)
+                continue
+
+            done, _ = wait(
+                in_flight,
+                timeout=JOB_POLL_SECONDS if listing else None,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                route_name = in_flight.pop(future)
+                scheduler.task_done(route_name)
+                if future.exception() is not None:
+                    logging.critical(
+                        f"Unhandled error in a job for route '{route_name}': {future.exception()}",
+                        exc_info=future.exception(),
+                    )
+    return started
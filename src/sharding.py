@@ -0,0 +1,101 @@
+# sharding.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, TypeVar, Union
+
+from pdf2image import pdfinfo_from_bytes, pdfinfo_from_path
+
+from .config import get_settings
+from .exceptions import PermanentError, TransientError
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Shard:
+    """A contiguous, 1-based, inclusive page range of a document."""
+
+    index: int
+    first_page: int
+    last_page: int
+
+
+def plan_shards(page_count: int, shard_pages: int) -> List[Shard]:
+    """Splits `page_count` pages into shards of at most `shard_pages` pages."""
+    return [
+        Shard(index, first, min(first + shard_pages - 1, page_count))
+        for index, first in enumerate(range(1, page_count + 1, shard_pages))
+    ]
+
+
+def shard_page_count(pdf: Union[str, bytes]) -> Optional[int]:
+    """
+    Returns the page count of a downloaded PDF (a path or bytes), as reported
+    by pdfinfo, if it is large enough to be sharded (SHARD_MIN_PAGES), or None
+    to process it in one piece.
+    """
+    settings = get_settings()
+    if not settings.SHARD_MIN_PAGES:
+        return None
+    pdfinfo = pdfinfo_from_bytes if isinstance(pdf, bytes) else pdfinfo_from_path
+    try:
+        page_count = int(pdfinfo(pdf)["Pages"])
+    except Exception as e:
+        raise PermanentError(f"Could not read the page count of the PDF: {e}") from e
+    return page_count if page_count >= settings.SHARD_MIN_PAGES else None
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_shard_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool shared by the shards of all documents. It has
+    WORKER_COUNT threads, so one large document can keep as many pages in
+    flight as all workers together, within RECOGNITION_CONCURRENCY.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_settings().WORKER_COUNT, thread_name_prefix="shard"
+            )
+    return _executor
+
+
+def _run_with_retry(
+    shard: Shard, process_shard: Callable[[Shard], T], attempts: int
+) -> T:
+    for attempt in range(1, attempts + 1):
+        try:
+            return process_shard(shard)
+        except TransientError as e:
+            if attempt == attempts:
+                raise
+            logging.warning(
+                f"Shard {shard.index + 1} (pages {shard.first_page}-{shard.last_page}) "
+                f"failed (attempt {attempt}/{attempts}); retrying. Error: {e}"
+            )
+
+
+def run_shards(shards: List[Shard], process_shard: Callable[[Shard], T]) -> List[T]:
+    """
+    Runs `process_shard` for every shard in parallel and returns the results
+    in shard order. A shard failing with a TransientError is retried on its
+    own, up to SHARD_MAX_ATTEMPTS times, without redoing the other shards.
+    """
+    attempts = get_settings().SHARD_MAX_ATTEMPTS
+    executor = get_shard_executor()
+    futures = [
+        executor.submit(_run_with_retry, shard, process_shard, attempts)
+        for shard in shards
+    ]
+    try:
+        return [future.result() for future in futures]
+    finally:
+        # After a failure, shards that have not started yet are not needed.
+        for future in futures:
+            future.cancel()
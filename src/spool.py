@@ -0,0 +1,140 @@
+# spool.py
+import logging
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from filelock import FileLock, Timeout
+
+from .config import get_settings
+
+# tmpfs location used when SPOOL_USE_TMPFS is enabled.
+TMPFS_SPOOL_DIR = Path("/dev/shm/remrec-spool")
+# Disk space reserved for a file whose size the provider did not report.
+UNKNOWN_SIZE_RESERVATION = 10 * 1024 * 1024
+
+
+class SpoolManager:
+    """
+    Hands out a unique working directory per job under a spool root.
+
+    Each job directory is guarded by a lock file held for the job's lifetime,
+    so directories left behind by a crashed process can be told apart from
+    those in use and removed at startup. Jobs reserve disk space up front;
+    while the quota is exhausted, new jobs wait (throttling downloads) until
+    running jobs release their space.
+    """
+
+    def __init__(self, root: Path, quota_bytes: int = 0):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes = quota_bytes  # 0 disables the quota
+        self._reserved = 0
+        self._active = 0
+        self._space = threading.Condition()
+
+    def cleanup_orphans(self) -> int:
+        """
+        Removes job directories whose lock is not held by a live process.
+        Returns the number of directories removed.
+        """
+        removed = 0
+        for lock_path in self.root.glob("job-*.lock"):
+            lock = FileLock(str(lock_path), timeout=0)
+            try:
+                with lock:
+                    job_dir = lock_path.with_suffix("")
+                    if job_dir.exists():
+                        shutil.rmtree(job_dir, ignore_errors=True)
+                        removed += 1
+                lock_path.unlink(missing_ok=True)
+            except Timeout:
+                continue  # In use by a running process
+        # Job directories whose lock file was never created or already removed
+        for job_dir in self.root.glob("job-*"):
+            if job_dir.is_dir() and not job_dir.with_suffix(".lock").exists():
+                shutil.rmtree(job_dir, ignore_errors=True)
+                removed += 1
+        if removed:
+            logging.warning(f"Removed {removed} orphaned spool directories.")
+        return removed
+
+    def _reserve(self, reserve_bytes: int):
+        with self._space:
+            # A job larger than the whole quota still runs, but alone.
+            while (
+                self.quota_bytes
+                and self._active
+                and self._reserved + reserve_bytes > self.quota_bytes
+            ):
+                logging.info(
+                    f"Spool quota reached ({self._reserved} of {self.quota_bytes} bytes reserved). Waiting..."
+                )
+                self._space.wait()
+            self._reserved += reserve_bytes
+            self._active += 1
+
+    def _release(self, reserve_bytes: int):
+        with self._space:
+            self._reserved -= reserve_bytes
+            self._active -= 1
+            self._space.notify_all()
+
+    @contextmanager
+    def job_dir(self, reserve_bytes: int = 0) -> Iterator[Path]:
+        """
+        Reserves `reserve_bytes` of the quota, waiting for space if needed,
+        and yields a fresh job directory that is removed afterwards.
+        """
+        self._reserve(reserve_bytes)
+        try:
+            job_dir = self.root / f"job-{uuid.uuid4().hex}"
+            lock_path = job_dir.with_suffix(".lock")
+            with FileLock(str(lock_path)):
+                job_dir.mkdir()
+                try:
+                    yield job_dir
+                finally:
+                    shutil.rmtree(job_dir, ignore_errors=True)
+            lock_path.unlink(missing_ok=True)
+        finally:
+            self._release(reserve_bytes)
+
+    def reserved_bytes(self) -> int:
+        with self._space:
+            return self._reserved
+
+
+def spool_reservation(size: Optional[int]) -> int:
+    """Disk space to reserve for a job: the source file plus the result PDF."""
+    return 2 * size if size else UNKNOWN_SIZE_RESERVATION
+
+
+_spool_manager: Optional[SpoolManager] = None
+_spool_manager_lock = threading.Lock()
+
+
+def get_spool_manager() -> SpoolManager:
+    """
+    Returns the process-wide spool manager. On first use, the spool root is
+    chosen and orphaned job directories from earlier runs are removed.
+    """
+    global _spool_manager
+    with _spool_manager_lock:
+        if _spool_manager is None:
+            settings = get_settings()
+            root = settings.LOCAL_BUF_DIR
+            if settings.SPOOL_USE_TMPFS:
+                if TMPFS_SPOOL_DIR.parent.is_dir():
+                    root = TMPFS_SPOOL_DIR
+                else:
+                    logging.warning(
+                        f"SPOOL_USE_TMPFS is set but {TMPFS_SPOOL_DIR.parent} does not exist. Using {root}."
+                    )
+            _spool_manager = SpoolManager(root, settings.SPOOL_QUOTA_BYTES)
+            _spool_manager.cleanup_orphans()
+            logging.info(f"Spooling files in {root}.")
+    return _spool_manager
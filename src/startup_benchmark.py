@@ -0,0 +1,81 @@
+# startup_benchmark.py
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Each probe runs in a fresh interpreter, so module caches never skew the numbers.
+PROBES = {
+    "import src.main": "import src.main",
+    "import src.dbox": "import src.dbox",
+    "import src.gdrive": "import src.gdrive",
+    "import src.processing": "import src.processing",
+    "drive discovery build": (
+        "from google.auth.credentials import AnonymousCredentials; "
+        "from googleapiclient.discovery import build_from_document; "
+        "from src.gdrive import _drive_discovery_document; "
+        "build_from_document(_drive_discovery_document(), "
+        "credentials=AnonymousCredentials())"
+    ),
+    "warm-up (real settings)": (
+        "from src.config import get_settings; "
+        "from src.main import warm_up_clients; "
+        "from src.routes import resolve_routes; "
+        "warm_up_clients(resolve_routes(get_settings()))"
+    ),
+}
+
+_TIMER = (
+    "import time; _start = time.perf_counter(); {code}; "
+    "print(time.perf_counter() - _start)"
+)
+
+
+def measure(code: str, runs: int) -> list[float]:
+    """Runs a snippet in `runs` fresh interpreters and returns the durations."""
+    durations = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", _TIMER.format(code=code)],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        durations.append(float(result.stdout.strip().splitlines()[-1]))
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure cold-start times of the application."
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per probe.")
+    parser.add_argument(
+        "--warm-up",
+        action="store_true",
+        help="Also time a real client warm-up (requires a configured .env).",
+    )
+    args = parser.parse_args()
+
+    print(f"{'probe':<26} {'median':>8} {'min':>8} {'max':>8}")
+    for name, code in PROBES.items():
+        if name.startswith("warm-up") and not args.warm_up:
+            continue
+        try:
+            durations = measure(code, args.runs)
+        except RuntimeError as e:
+            print(f"{name:<26} failed: {e}")
+            continue
+        print(
+            f"{name:<26} {statistics.median(durations):>7.3f}s "
+            f"{min(durations):>7.3f}s {max(durations):>7.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
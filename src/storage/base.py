@@ -1,6 +1,9 @@
 # storage/base.py
+import os
+import tempfile
 from abc import ABC, abstractmethod
-from typing import List
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 from .dto import FileMetadata
 
 
@@ -12,12 +15,13 @@ class StorageClient(ABC):
     """
 
     @abstractmethod
-    def list_files(self, folder_id: str) -> List[FileMetadata]:
+    def list_files(self, folder_id: str) -> Iterator[FileMetadata]:
         """
-        Lists all files in a given folder.
+        Lists the PDF files in a given folder. Providers yield files as the
+        listing pages arrive, filtering on the server where they can.
 
         :param folder_id: The ID or path of the folder to list.
-        :return: A list of FileMetadata objects.
+        :return: An iterator of FileMetadata objects.
         """
         pass
 
@@ -32,16 +36,59 @@ class StorageClient(ABC):
         pass
 
     @abstractmethod
-    def upload_file(self, local_path: str, folder_id: str, filename: str):
+    def upload_file(self, local_path: str, folder_id: str, filename: str) -> str:
         """
         Uploads a file to the storage.
 
         :param local_path: The local path of the file to upload.
         :param folder_id: The ID of the destination folder.
         :param filename: The name of the file in the destination.
+        :return: The ID or path of the uploaded file.
         """
         pass
 
+    def download_bytes(self, file_id: str) -> bytes:
+        """
+        Downloads a file into memory. Providers override this to skip the
+        filesystem; the default goes through a temporary file.
+
+        :param file_id: The ID or path of the file to download.
+        """
+        fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        try:
+            self.download_file(file_id, tmp_path)
+            return Path(tmp_path).read_bytes()
+        finally:
+            os.remove(tmp_path)
+
+    def upload_bytes(self, data: bytes, folder_id: str, filename: str) -> str:
+        """
+        Uploads in-memory content as a file. Providers override this to skip
+        the filesystem; the default goes through a temporary file.
+
+        :param data: The content of the file.
+        :param folder_id: The ID of the destination folder.
+        :param filename: The name of the file in the destination.
+        :return: The ID or path of the uploaded file.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_path = Path(tmp_dir) / filename
+            tmp_path.write_bytes(data)
+            return self.upload_file(tmp_path, folder_id, filename)
+
+    def copy_file(self, file_id: str, to_folder_id: str, filename: str) -> str:
+        """
+        Copies a file within the storage. Providers with a server-side copy
+        override this; the default downloads and re-uploads the content.
+
+        :param file_id: The ID or path of the file to copy.
+        :param to_folder_id: The ID of the destination folder.
+        :param filename: The name of the copy.
+        :return: The ID or path of the copy.
+        """
+        return self.upload_bytes(self.download_bytes(file_id), to_folder_id, filename)
+
     @abstractmethod
     def delete_file(self, file_id: str):
         """
@@ -52,15 +99,56 @@ class StorageClient(ABC):
         pass
 
     @abstractmethod
-    def move_file(self, file_id: str, to_folder_id: str):
+    def move_file(
+        self, file_id: str, to_folder_id: str, from_folder_id: Optional[str] = None
+    ):
         """
         Moves a file to a different folder.
 
         :param file_id: The original ID or path of the file.
         :param to_folder_id: The destination folder ID or path.
+        :param from_folder_id: The current folder of the file, if known. Lets
+            providers that track parents (Google Drive) skip a lookup.
         """
         pass
 
+    def delete_files(self, file_ids: Iterable[str]) -> Dict[str, Optional[Exception]]:
+        """
+        Deletes several files. Providers with a batch API override this; the
+        default issues one `delete_file` call per file.
+
+        :param file_ids: The IDs or paths of the files to delete.
+        :return: A mapping of file ID to the error it failed with, or None.
+        """
+        outcomes = {}
+        for file_id in file_ids:
+            try:
+                self.delete_file(file_id)
+                outcomes[file_id] = None
+            except Exception as e:
+                outcomes[file_id] = e
+        return outcomes
+
+    def move_files(
+        self, moves: Iterable[Tuple[str, str, Optional[str]]]
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        Moves several files. Providers with a batch API override this; the
+        default issues one `move_file` call per file.
+
+        :param moves: (file_id, to_folder_id, from_folder_id) tuples, where
+            from_folder_id may be None.
+        :return: A mapping of file ID to the error it failed with, or None.
+        """
+        outcomes = {}
+        for file_id, to_folder_id, from_folder_id in moves:
+            try:
+                self.move_file(file_id, to_folder_id, from_folder_id)
+                outcomes[file_id] = None
+            except Exception as e:
+                outcomes[file_id] = e
+        return outcomes
+
     @abstractmethod
     def verify_folder_exists(self, folder_id: str):
         """
@@ -70,3 +158,13 @@ class StorageClient(ABC):
         :param folder_id: The path or ID of the folder to verify.
         """
         pass
+
+    def verify_folders_exist(self, folder_ids: Iterable[str]):
+        """
+        Verifies that several folders exist, raising on the first that does not.
+        Providers with a batch API override this to verify them in one call.
+
+        :param folder_ids: The paths or IDs of the folders to verify.
+        """
+        for folder_id in folder_ids:
+            self.verify_folder_exists(folder_id)
@@ -0,0 +1,87 @@
+# storage/breaker.py
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from ..circuit_breaker import CircuitBreaker
+from .base import StorageClient
+from .dto import FileMetadata
+
+
+class CircuitBreakingStorageClient(StorageClient):
+    """
+    Wraps a storage client so that every call goes through a circuit breaker.
+    While the breaker is open, calls fail fast with CircuitOpenError instead
+    of waiting on an unavailable provider.
+    """
+
+    def __init__(self, client: StorageClient, breaker: CircuitBreaker):
+        self.client = client
+        self.breaker = breaker
+
+    def __getattr__(self, name):
+        # Provider-specific attributes (e.g. `cache`) of the wrapped client.
+        return getattr(self.client, name)
+
+    def _call_batch(self, fn, arg) -> Dict[str, Optional[Exception]]:
+        """Runs a batch call, counting per-file outage errors as a failure."""
+        outcomes = self.breaker.call(fn, arg)
+        outages = [
+            error
+            for error in outcomes.values()
+            if error is not None and self.breaker.is_failure(error)
+        ]
+        if outages:
+            self.breaker.record_failure(outages[0])
+        return outcomes
+
+    def list_files(self, folder_id: str) -> Iterator[FileMetadata]:
+        # Listings are lazy, so the breaker covers the iteration, not the call.
+        self.breaker.before_call()
+        error = None
+        try:
+            yield from self.client.list_files(folder_id)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.breaker.record(error)
+
+    def download_file(self, file_id: str, local_path: str):
+        return self.breaker.call(self.client.download_file, file_id, local_path)
+
+    def upload_file(self, local_path: str, folder_id: str, filename: str):
+        return self.breaker.call(
+            self.client.upload_file, local_path, folder_id, filename
+        )
+
+    def download_bytes(self, file_id: str) -> bytes:
+        return self.breaker.call(self.client.download_bytes, file_id)
+
+    def upload_bytes(self, data: bytes, folder_id: str, filename: str):
+        return self.breaker.call(self.client.upload_bytes, data, folder_id, filename)
+
+    def copy_file(self, file_id: str, to_folder_id: str, filename: str) -> str:
+        return self.breaker.call(self.client.copy_file, file_id, to_folder_id, filename)
+
+    def delete_file(self, file_id: str):
+        return self.breaker.call(self.client.delete_file, file_id)
+
+    def move_file(
+        self, file_id: str, to_folder_id: str, from_folder_id: Optional[str] = None
+    ):
+        return self.breaker.call(
+            self.client.move_file, file_id, to_folder_id, from_folder_id
+        )
+
+    def delete_files(self, file_ids: Iterable[str]) -> Dict[str, Optional[Exception]]:
+        return self._call_batch(self.client.delete_files, list(file_ids))
+
+    def move_files(
+        self, moves: Iterable[Tuple[str, str, Optional[str]]]
+    ) -> Dict[str, Optional[Exception]]:
+        return self._call_batch(self.client.move_files, list(moves))
+
+    def verify_folder_exists(self, folder_id: str):
+        return self.breaker.call(self.client.verify_folder_exists, folder_id)
+
+    def verify_folders_exist(self, folder_ids: Iterable[str]):
+        return self.breaker.call(self.client.verify_folders_exist, list(folder_ids))
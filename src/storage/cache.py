@@ -0,0 +1,98 @@
+# storage/cache.py
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from ..config import get_settings
+
+_MISSING = object()
+
+
+class MetadataCache:
+    """
+    A thread-safe cache of storage metadata whose entries expire after
+    `ttl_seconds`. Clients store what they learn from the provider (folder
+    existence, name-to-ID maps, parent lists) and update or invalidate entries
+    on their own writes. Hits and misses are counted for reporting.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value for `key`, or `default` if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value for `key`, calling `loader` to fill a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Like `get`, but without counting a hit or miss (for write-through updates)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            return default
+
+    def update(self, key: Hashable, fn: Callable[[Any], None]):
+        """
+        Applies `fn` to the cached value for `key` in place, under the cache
+        lock, so concurrent write-through updates of a shared value (e.g. a
+        name map) don't interleave. Absent or expired entries are left alone.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                fn(entry[1])
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+# Shared by all storage clients, so cached metadata survives the clients
+# that are re-created on every workflow run.
+_metadata_cache: Optional[MetadataCache] = None
+_metadata_cache_lock = threading.Lock()
+
+
+def get_metadata_cache() -> MetadataCache:
+    """Returns the shared metadata cache, creating it on first use."""
+    global _metadata_cache
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            _metadata_cache = MetadataCache(get_settings().METADATA_CACHE_TTL_SECONDS)
+    return _metadata_cache
@@ -0,0 +1,114 @@
+# storage/deferred.py
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .base import StorageClient
+
+
+class DeferredOperations:
+    """
+    Collects the source deletes and quarantine moves of one workflow cycle for
+    a storage client, and submits them together with the client's batch API
+    (`delete_files` / `move_files`) when the cycle ends.
+
+    Callbacks registered with `call_after_flush` (e.g. lease releases) run
+    once the batched operations have been submitted.
+    """
+
+    def __init__(self, storage_client: StorageClient):
+        self.storage_client = storage_client
+        self._deletes: Dict[str, str] = {}  # file_id -> file name
+        self._moves: Dict[str, Tuple[str, Optional[str], str]] = {}
+        self._after_flush: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def delete(self, file_id: str, file_name: str):
+        """Queues the deletion of a processed source file."""
+        with self._lock:
+            self._deletes[file_id] = file_name
+
+    def move(
+        self,
+        file_id: str,
+        to_folder_id: str,
+        from_folder_id: Optional[str],
+        file_name: str,
+    ):
+        """Queues the move of a failed file to the quarantine folder."""
+        with self._lock:
+            self._moves[file_id] = (to_folder_id, from_folder_id, file_name)
+
+    def call_after_flush(self, callback: Callable[[], None]):
+        with self._lock:
+            self._after_flush.append(callback)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._deletes) + len(self._moves)
+
+    @staticmethod
+    def _submit(batch_call, file_ids: List[str], arg) -> Dict[str, Optional[Exception]]:
+        """
+        Runs a batch call. If the call fails as a whole (e.g. an open circuit),
+        every file in the batch fails with its error.
+        """
+        try:
+            return batch_call(arg)
+        except Exception as e:
+            return {file_id: e for file_id in file_ids}
+
+    def flush(self) -> Dict[str, Optional[Exception]]:
+        """
+        Submits the queued operations and logs the outcome of each file.
+
+        :return: A mapping of file ID to the error its operation failed with,
+            or None. Files whose operation failed stay in the source folder
+            and are picked up again on the next run.
+        """
+        with self._lock:
+            deletes, self._deletes = self._deletes, {}
+            moves, self._moves = self._moves, {}
+            callbacks, self._after_flush = self._after_flush, []
+
+        outcomes: Dict[str, Optional[Exception]] = {}
+        try:
+            if deletes:
+                for file_id, error in self._submit(
+                    self.storage_client.delete_files, list(deletes), list(deletes)
+                ).items():
+                    outcomes[file_id] = error
+                    if error is None:
+                        logging.info(
+                            f"Successfully processed and deleted {deletes[file_id]}"
+                        )
+                    else:
+                        logging.warning(
+                            f"Could not delete original file {deletes[file_id]} after processing. Error: {error}"
+                        )
+            if moves:
+                for file_id, error in self._submit(
+                    self.storage_client.move_files,
+                    list(moves),
+                    [
+                        (file_id, to_folder_id, from_folder_id)
+                        for file_id, (to_folder_id, from_folder_id, _) in moves.items()
+                    ],
+                ).items():
+                    outcomes[file_id] = error
+                    to_folder_id, _, file_name = moves[file_id]
+                    if error is None:
+                        logging.warning(
+                            f"Moved failed file {file_name} to quarantine folder {to_folder_id}."
+                        )
+                    else:
+                        logging.critical(
+                            f"CRITICAL: Could not move failed file {file_name} to quarantine. Error: {error}"
+                        )
+        finally:
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logging.error(f"Error in a deferred-operations callback: {e}")
+        return outcomes
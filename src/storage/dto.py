@@ -1,15 +1,28 @@
 # src/storage/dto.py
-from pydantic import BaseModel
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Optional
 
 
-class FileMetadata(BaseModel):
+@dataclass(slots=True)
+class FileMetadata:
     """
     A standardized Data Transfer Object for file metadata to abstract away
     provider-specific file representations.
+
+    A slotted dataclass rather than a validated model: listings of large
+    folders create one per file, and providers convert their fields already.
     """
 
     id: str
     name: str
     path: str
     folder_id: Optional[str] = None
+    size: Optional[int] = None  # In bytes, if the provider reports it
+    modified: Optional[datetime] = None  # Timezone-aware (UTC)
+    # The provider's content hash (Dropbox content_hash, Google Drive
+    # md5Checksum), if reported. Only comparable within one provider.
+    content_hash: Optional[str] = None
+    # The provider's revision of the content (Dropbox rev, Google Drive
+    # version), if reported. Changes whenever the file is modified.
+    revision: Optional[str] = None
@@ -0,0 +1,124 @@
+# tiling.py
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from PIL.Image import Image
+
+from .config import get_settings
+from .endpoints import recognition_capacity
+
+T = TypeVar("T")
+
+# Grey levels below this count as ink.
+INK_THRESHOLD = 128
+# Ink density is measured on a thumbnail of at most this many pixels a side.
+DENSITY_SAMPLE_SIZE = 256
+# The longest run of repeated lines looked for when stitching two bands.
+MAX_OVERLAP_LINES = 8
+
+
+def ink_density(image: Image) -> float:
+    """The fraction of the page covered by ink, from a greyscale thumbnail."""
+    sample = image.convert("L")
+    sample.thumbnail((DENSITY_SAMPLE_SIZE, DENSITY_SAMPLE_SIZE))
+    histogram = sample.histogram()
+    return sum(histogram[:INK_THRESHOLD]) / max(sum(histogram), 1)
+
+
+def band_count(density: float, density_per_band: float, max_bands: int) -> int:
+    """One band per `density_per_band` of ink, between 1 and `max_bands`."""
+    if density_per_band <= 0:
+        return 1
+    return max(1, min(max_bands, math.ceil(density / density_per_band)))
+
+
+def plan_bands(height: int, bands: int, overlap: float) -> List[Tuple[int, int]]:
+    """
+    Splits `height` pixel rows into `bands` horizontal (top, bottom) ranges,
+    each extended by `overlap` times the band height into its neighbours, so
+    a line cut by one band boundary is whole in one of the bands.
+    """
+    size = height / bands
+    margin = int(size * overlap)
+    return [
+        (
+            max(0, round(i * size) - margin),
+            min(height, round((i + 1) * size) + margin),
+        )
+        for i in range(bands)
+    ]
+
+
+def split_bands(image: Image) -> Optional[List[Image]]:
+    """
+    Splits a dense page into overlapping horizontal bands, top to bottom, with
+    the band count chosen from its ink density. Returns None for pages that
+    are recognized whole (TILE_MAX_BANDS of 1 disables tiling).
+    """
+    settings = get_settings()
+    if settings.TILE_MAX_BANDS <= 1:
+        return None
+    bands = band_count(
+        ink_density(image), settings.TILE_DENSITY_PER_BAND, settings.TILE_MAX_BANDS
+    )
+    if bands == 1:
+        return None
+    width, height = image.size
+    return [
+        image.crop((0, top, width, bottom))
+        for top, bottom in plan_bands(height, bands, settings.TILE_OVERLAP)
+    ]
+
+
+def _normalize(line: str) -> str:
+    return " ".join(line.split()).lower()
+
+
+def stitch_texts(texts: List[str]) -> str:
+    """
+    Joins the texts of consecutive bands, dropping the lines at the start of
+    each band that repeat the end of the previous one (the overlap).
+    """
+    stitched: List[str] = []
+    for text in texts:
+        lines = text.strip("\n").splitlines()
+        longest = min(len(stitched), len(lines), MAX_OVERLAP_LINES)
+        repeated = 0
+        for k in range(longest, 0, -1):
+            head = [_normalize(line) for line in lines[:k]]
+            if any(head) and head == [_normalize(line) for line in stitched[-k:]]:
+                repeated = k
+                break
+        stitched.extend(lines[repeated:])
+    return "\n".join(stitched)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_tile_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool that recognizes the bands of tiled pages. It is
+    as large as the recognition capacity, which bounds the requests in flight.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=recognition_capacity(get_settings()),
+                thread_name_prefix="tile",
+            )
+    return _executor
+
+
+def map_bands(bands: List[Image], recognize_band: Callable[[Image], T]) -> List[T]:
+    """Runs `recognize_band` for every band in parallel; results in band order."""
+    futures = [get_tile_executor().submit(recognize_band, band) for band in bands]
+    try:
+        return [future.result() for future in futures]
+    finally:
+        for future in futures:
+            future.cancel()
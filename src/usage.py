@@ -0,0 +1,242 @@
+# usage.py
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .config import get_settings
+
+# Length of the sliding window of the token budget.
+BUDGET_WINDOW_SECONDS = 3600
+
+
+@dataclass(frozen=True)
+class TokenUsage:
+    """Tokens used by one or more recognition requests, and their price."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        return TokenUsage(
+            self.prompt_tokens + other.prompt_tokens,
+            self.completion_tokens + other.completion_tokens,
+            self.cost + other.cost,
+        )
+
+
+def completion_usage(
+    completion, model: str, prices: Dict[str, List[float]]
+) -> TokenUsage:
+    """
+    The TokenUsage of a chat completion. `prices` maps a model to its price
+    per million prompt and completion tokens; unknown models cost nothing.
+    Servers that report no usage count as zero tokens.
+    """
+    usage = getattr(completion, "usage", None)
+    prompt, output = (
+        value if isinstance(value, int) else 0
+        for value in (
+            getattr(usage, "prompt_tokens", None),
+            getattr(usage, "completion_tokens", None),
+        )
+    )
+    prompt_price, output_price = (list(prices.get(model) or []) + [0.0, 0.0])[:2]
+    return TokenUsage(
+        prompt, output, (prompt * prompt_price + output * output_price) / 1e6
+    )
+
+
+class TokenBudget:
+    """
+    Limits the tokens spent in any hour. `wait` blocks new requests while the
+    tokens recorded over the last BUDGET_WINDOW_SECONDS reach `tokens_per_hour`.
+    Requests in flight are not interrupted, so the budget can be overshot by
+    their tokens.
+    """
+
+    def __init__(self, tokens_per_hour: int, window: float = BUDGET_WINDOW_SECONDS):
+        self.tokens_per_hour = tokens_per_hour
+        self.window = window
+        self._spent: Deque[Tuple[float, int]] = deque()
+        self._spent_total = 0
+        self._lock = threading.Condition()
+        self.throttled_seconds = 0.0
+
+    def _expire(self, now: float):
+        while self._spent and self._spent[0][0] <= now - self.window:
+            self._spent_total -= self._spent.popleft()[1]
+
+    def record(self, tokens: int):
+        with self._lock:
+            self._spent.append((time.monotonic(), tokens))
+            self._spent_total += tokens
+
+    def spent(self) -> int:
+        """Tokens spent within the window."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._spent_total
+
+    def wait(self):
+        """
+        Returns once the budget has room for another request. A budget of 0
+        or less is disabled and never waits.
+        """
+        if self.tokens_per_hour <= 0:
+            return
+        with self._lock:
+            started = time.monotonic()
+            logged = False
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if self._spent_total < self.tokens_per_hour:
+                    break
+                if not logged:
+                    logging.warning(
+                        "Hourly token budget of %d exhausted; throttling recognition.",
+                        self.tokens_per_hour,
+                    )
+                    logged = True
+                # Room appears when the oldest spend leaves the window.
+                self._lock.wait(self._spent[0][0] + self.window - now)
+            self.throttled_seconds += time.monotonic() - started
+
+
+class UsageStore:
+    """
+    Token usage per processed file in a local SQLite database, for reports
+    per file, route and day (UTC).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS file_usage ("
+                " day TEXT NOT NULL,"
+                " finished_at REAL NOT NULL,"
+                " route TEXT NOT NULL,"
+                " file_name TEXT NOT NULL,"
+                " pages INTEGER NOT NULL,"
+                " prompt_tokens INTEGER NOT NULL,"
+                " completion_tokens INTEGER NOT NULL,"
+                " cost REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS file_usage_day ON file_usage (day, route)"
+            )
+
+    def record_file(
+        self, route_name: str, file_name: str, pages: int, usage: TokenUsage
+    ):
+        now = time.time()
+        day = datetime.fromtimestamp(now, timezone.utc).date().isoformat()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO file_usage VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    day,
+                    now,
+                    route_name,
+                    file_name,
+                    pages,
+                    usage.prompt_tokens,
+                    usage.completion_tokens,
+                    usage.cost,
+                ),
+            )
+
+    def daily_usage(self, day: str) -> Dict[str, Dict[str, float]]:
+        """Files, pages, tokens and cost per route on `day` (YYYY-MM-DD, UTC)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT route, COUNT(*), SUM(pages), SUM(prompt_tokens),"
+                " SUM(completion_tokens), SUM(cost)"
+                " FROM file_usage WHERE day = ? GROUP BY route",
+                (day,),
+            ).fetchall()
+        return {
+            route: {
+                "files": files,
+                "pages": pages,
+                "prompt_tokens": prompt,
+                "completion_tokens": output,
+                "cost": round(cost, 4),
+            }
+            for route, files, pages, prompt, output, cost in rows
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class UsageMeter:
+    """Token usage of this process per model, and the optional hourly budget."""
+
+    def __init__(self, budget: Optional[TokenBudget] = None):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._per_model: Dict[str, TokenUsage] = {}
+
+    def record(self, model: str, usage: TokenUsage):
+        with self._lock:
+            self._per_model[model] = self._per_model.get(model, TokenUsage()) + usage
+        if self.budget is not None:
+            self.budget.record(usage.total_tokens)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Tokens and cost per model so far, for logging."""
+        with self._lock:
+            return {
+                model: {
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "cost": round(usage.cost, 4),
+                }
+                for model, usage in self._per_model.items()
+            }
+
+
+_meter: Optional[UsageMeter] = None
+_store: Optional[UsageStore] = None
+_usage_lock = threading.Lock()
+
+
+def get_usage_meter() -> UsageMeter:
+    """Returns the process-wide usage meter, with TOKEN_BUDGET_PER_HOUR if positive."""
+    global _meter
+    with _usage_lock:
+        if _meter is None:
+            tokens_per_hour = get_settings().TOKEN_BUDGET_PER_HOUR
+            _meter = UsageMeter(
+                TokenBudget(tokens_per_hour) if tokens_per_hour > 0 else None
+            )
+    return _meter
+
+
+def get_usage_store() -> Optional[UsageStore]:
+    """Returns the usage store, or None if USAGE_DB_PATH is not set."""
+    global _store
+    path = get_settings().USAGE_DB_PATH
+    if path is None:
+        return None
+    with _usage_lock:
+        if _store is None:
+            _store = UsageStore(path)
+    return _store
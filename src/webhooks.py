@@ -0,0 +1,208 @@
+# webhooks.py
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .config import get_settings
+from .routes import Route
+
+# Notification bodies are tiny; anything larger is rejected unread.
+MAX_BODY_BYTES = 1024 * 1024
+# A steady stream of notifications delays a run by at most this many
+# debounce periods.
+DEBOUNCE_MAX_FACTOR = 5
+# Google Drive sends this state once when a channel is created.
+GDRIVE_SYNC_STATE = "sync"
+
+
+class WorkflowTrigger:
+    """
+    Wakes the main loop when a storage notification arrives. A burst of
+    notifications (e.g. one per page of a multi-file export) is coalesced:
+    the wake-up waits until no notification has arrived for `debounce`
+    seconds, but no longer than DEBOUNCE_MAX_FACTOR times that.
+    """
+
+    def __init__(self, debounce: float):
+        self.debounce = debounce
+        self.notifications = 0
+        self.wake_ups = 0
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._first = 0.0
+        self._last = 0.0
+
+    def notify(self, source: str):
+        with self._lock:
+            now = time.monotonic()
+            if not self._event.is_set():
+                self._first = now
+            self._last = now
+            self.notifications += 1
+            self._event.set()
+        logging.debug("Storage notification from %s.", source)
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Sleeps up to `timeout` seconds. Returns True if woken by notifications,
+        once their burst has settled. Notifications arriving while the caller
+        works are kept and end the next wait at once.
+        """
+        if not self._event.wait(timeout):
+            return False
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                remaining = (
+                    min(
+                        self._last + self.debounce,
+                        self._first + self.debounce * DEBOUNCE_MAX_FACTOR,
+                    )
+                    - now
+                )
+                if remaining <= 0:
+                    self._event.clear()
+                    self.wake_ups += 1
+                    return True
+            time.sleep(remaining)
+
+
+class WebhookReceiver:
+    """
+    Verifies storage notifications and passes them on to a WorkflowTrigger.
+
+    Dropbox signs each webhook with HMAC-SHA256 of the body under the app
+    secret (X-Dropbox-Signature). Google Drive echoes the token the channel
+    was created with (X-Goog-Channel-Token). Notifications carry no file
+    details either way; they only tell that a listing is worth doing.
+    """
+
+    def __init__(
+        self,
+        trigger: WorkflowTrigger,
+        dropbox_app_secrets: List[str],
+        gdrive_channel_token: Optional[str],
+    ):
+        self.trigger = trigger
+        self.dropbox_app_secrets = [s.encode("utf-8") for s in dropbox_app_secrets]
+        self.gdrive_channel_token = gdrive_channel_token
+
+    def dropbox(self, body: bytes, signature: Optional[str]) -> int:
+        """Handles a Dropbox webhook; returns the HTTP status to respond with."""
+        if not signature or not any(
+            hmac.compare_digest(
+                hmac.new(secret, body, hashlib.sha256).hexdigest(), signature
+            )
+            for secret in self.dropbox_app_secrets
+        ):
+            logging.warning("Rejected a Dropbox webhook with an invalid signature.")
+            return 403
+        self.trigger.notify("dropbox")
+        return 200
+
+    def gdrive(self, token: Optional[str], resource_state: Optional[str]) -> int:
+        """Handles a Google Drive push notification; returns the HTTP status."""
+        if (
+            not self.gdrive_channel_token
+            or not token
+            or not hmac.compare_digest(token, self.gdrive_channel_token)
+        ):
+            logging.warning("Rejected a Google Drive notification with a bad token.")
+            return 403
+        if resource_state != GDRIVE_SYNC_STATE:
+            self.trigger.notify("gdrive")
+        return 200
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    server: "_WebhookServer"
+
+    def _respond(self, status: int, body: bytes = b""):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("X-Content-Type-Options", "nosniff")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/dropbox":
+            self._respond(404)
+            return
+        # Dropbox verifies a webhook URI by having it echo a challenge.
+        challenge = parse_qs(url.query).get("challenge", [""])[0]
+        self._respond(200, challenge.encode("utf-8"))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._respond(413)
+            return
+        body = self.rfile.read(length)
+        receiver = self.server.receiver
+        path = urlparse(self.path).path
+        if path == "/dropbox":
+            status = receiver.dropbox(body, self.headers.get("X-Dropbox-Signature"))
+        elif path == "/gdrive":
+            status = receiver.gdrive(
+                self.headers.get("X-Goog-Channel-Token"),
+                self.headers.get("X-Goog-Resource-State"),
+            )
+        else:
+            status = 404
+        self._respond(status)
+
+    def log_message(self, format, *args):
+        logging.debug("Webhook request: " + format, *args)
+
+
+class _WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, receiver: WebhookReceiver):
+        super().__init__(address, _WebhookHandler)
+        self.receiver = receiver
+
+
+_server: Optional[_WebhookServer] = None
+
+
+def start_webhook_server(routes: List[Route]) -> Optional[WorkflowTrigger]:
+    """
+    Starts the webhook receiver on WEBHOOK_HOST:WEBHOOK_PORT in a background
+    thread and returns the trigger it wakes, or None if WEBHOOK_PORT is unset.
+    """
+    global _server
+    settings = get_settings()
+    if settings.WEBHOOK_PORT is None:
+        return None
+    trigger = WorkflowTrigger(settings.WEBHOOK_DEBOUNCE_SECONDS)
+    secrets = sorted(
+        {
+            route.dropbox_app_secret
+            for route in routes
+            if route.provider == "dropbox" and route.dropbox_app_secret
+        }
+    )
+    receiver = WebhookReceiver(trigger, secrets, settings.WEBHOOK_GDRIVE_TOKEN)
+    _server = _WebhookServer((settings.WEBHOOK_HOST, settings.WEBHOOK_PORT), receiver)
+    threading.Thread(target=_server.serve_forever, name="webhooks", daemon=True).start()
+    logging.info(
+        f"Listening for storage notifications on "
+        f"{settings.WEBHOOK_HOST}:{_server.server_address[1]}."
+    )
+    return trigger
+
+
+def stop_webhook_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
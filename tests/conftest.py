@@ -1,11 +1,13 @@
 # tests/conftest.py
 import pytest
+from collections import Counter
 from unittest.mock import MagicMock
 from pathlib import Path
 
 # Since we refactored config.py, we can now safely import the Settings class
 # without triggering the validation error.
 from src.config import Settings, get_settings
+from src.escalation import EscalationStats
 
 
 @pytest.fixture
@@ -18,20 +20,73 @@ def mock_settings():
     settings.STORAGE_PROVIDER = "dropbox"
     settings.DROPBOX_APP_KEY = "test_key"
     settings.DROPBOX_APP_SECRET = "test_secret"
+    settings.DROPBOX_REFRESH_TOKEN = "test_refresh_token"
     settings.OPENAI_API_KEY = "test_api_key"
     settings.OPENAI_BASE_URL = "https://api.openai.com/v1"
+    settings.RECOGNITION_ENDPOINTS = []
+    settings.ENDPOINT_MAX_ERROR_RATE = 0.5
+    settings.ENDPOINT_EJECTION_SECONDS = 30.0
     settings.DROPBOX_SOURCE_DIR = "/source"
     settings.DROPBOX_DEST_DIR = "/dest"
     settings.DROPBOX_FAILED_DIR = "/failed"
     settings.RECOGNITION_MODEL = "gpt-4"
     settings.RECOGNITION_PROMPT = "test prompt"
+    settings.RECOGNITION_CASCADE = []
+    settings.CASCADE_ESCALATION_RULE = "quality"
     settings.PDF_DPI = 300
+    settings.PDF_DPI_LADDER = []
+    settings.ESCALATION_MIN_CHARS = 20
+    settings.ESCALATION_MARKERS = ["[illegible]", "[unclear]", "???"]
+    settings.ESCALATION_PATTERN = None
+    settings.SHARD_MIN_PAGES = 0
+    settings.SHARD_PAGES = 20
+    settings.SHARD_MAX_ATTEMPTS = 3
     settings.LOOP_SLEEP_SECONDS = 1
+    settings.POLL_MIN_SECONDS = 1
+    settings.POLL_BACKOFF = 2.0
+    settings.MAX_FILES_PER_RUN = 0
+    settings.WEBHOOK_PORT = None
+    settings.WEBHOOK_HOST = "127.0.0.1"
+    settings.WEBHOOK_GDRIVE_TOKEN = None
+    settings.WEBHOOK_DEBOUNCE_SECONDS = 0.05
+    settings.TOKEN_PRICES = {}
+    settings.TOKEN_BUDGET_PER_HOUR = 0
+    settings.USAGE_DB_PATH = None
+    settings.TILE_MAX_BANDS = 1
+    settings.TILE_DENSITY_PER_BAND = 0.04
+    settings.TILE_OVERLAP = 0.15
+    settings.ROUTES = []
+    settings.WORKER_COUNT = 2
+    settings.ROUTE_CONCURRENCY = 2
+    settings.SCHEDULING_POLICY = "sjf"
+    settings.SCHEDULING_AGING_PAGES_PER_MINUTE = 1.0
+    settings.RECOGNITION_CONCURRENCY = 4
+    settings.CIRCUIT_FAILURE_THRESHOLD = 5
+    settings.CIRCUIT_RESET_SECONDS = 60.0
+    settings.HEDGE_REQUESTS = False
+    settings.HEDGE_PERCENTILE = 95.0
+    settings.HEDGE_BUDGET = 0.05
+    settings.HEDGE_MIN_DELAY_SECONDS = 2.0
+    settings.LEASE_DIR = None
+    settings.LEASE_TTL_SECONDS = 300
+    settings.LOCK_TIMEOUT = 5
+    settings.METADATA_CACHE_TTL_SECONDS = 600
+    settings.DEFER_STORAGE_OPS = False
+    settings.IN_MEMORY_MAX_BYTES = 0
+    settings.DEDUP_INDEX_PATH = None
+    settings.LEDGER_PATH = None
+    settings.SPOOL_QUOTA_BYTES = 0
+    settings.SPOOL_USE_TMPFS = False
     settings.DROPBOX_UPLOAD_CHUNK_SIZE = 1024
     settings.BASE_DIR = Path("/tmp")
     settings.LOCAL_BUF_DIR = Path("/tmp/buf")
     settings.FONT_PATH = Path("/tmp/font.ttf")
     settings.LOG_FILE = Path("/tmp/app.log")
+    settings.LOG_LEVEL = "INFO"
+    settings.LOG_FORMAT = "text"
+    settings.LOG_QUEUE = False
+    settings.LOG_MAX_BYTES = 10 * 1024 * 1024
+    settings.LOG_BACKUP_COUNT = 5
 
     # --- Mock Path objects ---
     # Create a MagicMock for the FONT_PATH attribute
@@ -67,3 +122,22 @@ def patch_settings_class(monkeypatch, mock_settings):
     # called and cached a real instance during test collection.
     get_settings.cache_clear()
     monkeypatch.setattr("src.config.Settings", lambda *args, **kwargs: mock_settings)
+    # The metadata cache is shared process-wide; give each test a fresh one.
+    monkeypatch.setattr("src.storage.cache._metadata_cache", None)
+    monkeypatch.setattr("src.spool._spool_manager", None)
+    monkeypatch.setattr("src.escalation._stats", EscalationStats())
+    monkeypatch.setattr("src.recognition._model_slots", {})
+    monkeypatch.setattr("src.cascade._model_usage", Counter())
+    monkeypatch.setattr("src.hedging._hedger", None)
+    monkeypatch.setattr("src.recognition._endpoint_pool", None)
+    monkeypatch.setattr("src.recognition._endpoint_clients", {})
+    monkeypatch.setattr("src.circuit_breaker._recognition_breaker", None)
+    monkeypatch.setattr("src.circuit_breaker._storage_breakers", {})
+    monkeypatch.setattr("src.sharding._executor", None)
+    monkeypatch.setattr("src.profiling._profiler", None)
+    monkeypatch.setattr("src.dedup._dedup_index", None)
+    monkeypatch.setattr("src.ledger._ledger", None)
+    monkeypatch.setattr("src.polling._poller", None)
+    monkeypatch.setattr("src.usage._meter", None)
+    monkeypatch.setattr("src.usage._store", None)
+    monkeypatch.setattr("src.tiling._executor", None)
@@ -0,0 +1,63 @@
+# tests/test_cache.py
+from unittest.mock import MagicMock, patch
+
+from src.storage.cache import MetadataCache, get_metadata_cache
+
+
+def test_get_counts_hits_and_misses():
+    cache = MetadataCache(ttl_seconds=60)
+    assert cache.get("key") is None
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_entries_expire_after_ttl():
+    cache = MetadataCache(ttl_seconds=10)
+    with patch("src.storage.cache.time.monotonic", return_value=100.0):
+        cache.set("key", "value")
+    with patch("src.storage.cache.time.monotonic", return_value=111.0):
+        assert cache.get("key", "default") == "default"
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_get_or_load_calls_loader_only_on_miss():
+    cache = MetadataCache(ttl_seconds=60)
+    loader = MagicMock(return_value={"a.pdf": "id_a"})
+
+    assert cache.get_or_load("names", loader) == {"a.pdf": "id_a"}
+    assert cache.get_or_load("names", loader) == {"a.pdf": "id_a"}
+
+    loader.assert_called_once()
+
+
+def test_peek_does_not_count_and_invalidate_removes():
+    cache = MetadataCache(ttl_seconds=60)
+    cache.set("key", "value")
+    assert cache.peek("key") == "value"
+    cache.invalidate("key")
+    assert cache.peek("key") is None
+
+    assert cache.stats() == {"hits": 0, "misses": 0, "entries": 0}
+
+
+def test_update_changes_cached_value_in_place():
+    cache = MetadataCache(ttl_seconds=60)
+    cache.set("names", {"a.pdf": "id_a"})
+
+    cache.update("names", lambda names: names.pop("a.pdf"))
+    cache.update("missing", lambda value: value.clear())
+
+    assert cache.peek("names") == {}
+    assert cache.peek("missing") is None
+
+
+def test_get_metadata_cache_is_shared(mock_settings):
+    mock_settings.METADATA_CACHE_TTL_SECONDS = 42
+
+    cache = get_metadata_cache()
+
+    assert cache is get_metadata_cache()
+    assert cache.ttl_seconds == 42
@@ -0,0 +1,122 @@
+# tests/test_circuit_breaker.py
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, is_outage_error
+from src.exceptions import CircuitOpenError, TransientError
+from src.storage.breaker import CircuitBreakingStorageClient
+
+
+def _breaker(threshold=2, reset_seconds=60):
+    return CircuitBreaker(
+        "test", failure_threshold=threshold, reset_seconds=reset_seconds
+    )
+
+
+def _fail(*args):
+    raise ConnectionError("down")
+
+
+def test_is_outage_error():
+    import requests
+
+    assert is_outage_error(ConnectionError())
+    assert is_outage_error(requests.exceptions.ReadTimeout())
+    assert is_outage_error(MagicMock(spec=Exception, status_code=503))
+    assert is_outage_error(MagicMock(spec=Exception, status_code=429))
+    assert not is_outage_error(MagicMock(spec=Exception, status_code=404))
+    assert not is_outage_error(ValueError("bad request"))
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = _breaker(threshold=2)
+
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == CLOSED
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+
+    fn = MagicMock()
+    with pytest.raises(CircuitOpenError):
+        breaker.call(fn)
+    fn.assert_not_called()
+    assert issubclass(CircuitOpenError, TransientError)
+
+
+def test_breaker_ignores_non_outage_errors():
+    breaker = _breaker(threshold=1)
+
+    with pytest.raises(ValueError):
+        breaker.call(MagicMock(side_effect=ValueError("not found")))
+
+    assert breaker.state == CLOSED
+
+
+def test_breaker_half_open_probe_closes_or_reopens():
+    breaker = _breaker(threshold=1, reset_seconds=60)
+    with patch("src.circuit_breaker.time.monotonic", return_value=100.0):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+        assert breaker.rejecting()
+
+    with patch("src.circuit_breaker.time.monotonic", return_value=161.0):
+        assert breaker.state == HALF_OPEN
+        assert not breaker.rejecting()
+        # A failed probe reopens the circuit at once.
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+        assert breaker.state == OPEN
+
+    with patch("src.circuit_breaker.time.monotonic", return_value=222.0):
+        breaker.before_call()
+        # Only one probe at a time.
+        assert breaker.rejecting()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+
+def test_storage_client_wrapper_counts_batch_outages():
+    client = MagicMock()
+    client.delete_files.return_value = {"a": None, "b": ConnectionError("down")}
+    breaker = _breaker(threshold=1)
+    wrapped = CircuitBreakingStorageClient(client, breaker)
+
+    assert wrapped.delete_files(["a", "b"]) == client.delete_files.return_value
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        wrapped.download_file("a", "/tmp/a.pdf")
+    client.download_file.assert_not_called()
+
+
+def test_storage_client_wrapper_delegates():
+    client = MagicMock()
+    wrapped = CircuitBreakingStorageClient(client, _breaker())
+
+    wrapped.move_file("id", "/to", "/from")
+    wrapped.upload_bytes(b"pdf", "/dest", "a.pdf")
+
+    client.move_file.assert_called_once_with("id", "/to", "/from")
+    client.upload_bytes.assert_called_once_with(b"pdf", "/dest", "a.pdf")
+    assert wrapped.cache is client.cache
+
+
+def test_storage_client_wrapper_counts_listing_errors_raised_while_iterating():
+    def list_files(folder_id):
+        yield "a.pdf"
+        raise ConnectionError("down")
+
+    client = MagicMock()
+    client.list_files.side_effect = list_files
+    breaker = _breaker(threshold=1)
+    files = CircuitBreakingStorageClient(client, breaker).list_files("/src")
+
+    assert next(files) == "a.pdf"
+    assert breaker.state == CLOSED
+    with pytest.raises(ConnectionError):
+        next(files)
+    assert breaker.state == OPEN
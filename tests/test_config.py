@@ -1,7 +1,7 @@
 # tests/test_config.py
 import pytest
 from pydantic import ValidationError
-from src.config import Settings
+from src.config import Settings, get_settings
 from unittest.mock import patch
 
 
@@ -118,3 +118,112 @@ def test_settings_dropbox_valid_config_succeeds(
         Settings(**base_dropbox_settings_data)
     except ValidationError as e:
         pytest.fail(f"Valid Dropbox configuration failed validation: {e}")
+
+
+@patch("os.getenv", return_value="shared_token")
+@patch("src.config.Path.is_file", return_value=False)
+def test_settings_routes_replace_single_provider_settings(mock_is_file, mock_getenv):
+    """
+    Ensures a ROUTES list is accepted without provider-specific settings and that
+    Dropbox routes without their own refresh token fall back to the shared one.
+    """
+    settings = Settings(
+        OPENAI_API_KEY="test",
+        OPENAI_BASE_URL="test",
+        RECOGNITION_PROMPT="test",
+        PDF_DPI=200,
+        LOOP_SLEEP_SECONDS=120,
+        ROUTES=[
+            {
+                "name": "alice",
+                "provider": "dropbox",
+                "source": "",
+                "dest": "/out",
+                "failed": "/failed",
+                "dropbox_app_key": "key",
+                "dropbox_app_secret": "secret",
+            },
+            {
+                "name": "bob",
+                "provider": "gdrive",
+                "source": "src_id",
+                "dest": "dst_id",
+                "failed": "failed_id",
+                "gdrive_credentials_json": "{}",
+                "gdrive_token_json": "{}",
+            },
+        ],
+    )
+
+    assert [route.name for route in settings.ROUTES] == ["alice", "bob"]
+    assert settings.ROUTES[0].dropbox_refresh_token == "shared_token"
+    assert settings.ROUTES[1].dropbox_refresh_token is None
+
+
+@patch("os.getenv", return_value="shared_token")
+@patch("src.config.Path.is_file", return_value=False)
+def test_settings_routes_missing_credentials_raises_error(mock_is_file, mock_getenv):
+    """Ensures a Google Drive route without credentials is rejected."""
+    with pytest.raises(ValueError, match="Route 'bob'"):
+        Settings(
+            OPENAI_API_KEY="test",
+            OPENAI_BASE_URL="test",
+            RECOGNITION_PROMPT="test",
+            PDF_DPI=200,
+            LOOP_SLEEP_SECONDS=120,
+            ROUTES=[
+                {
+                    "name": "bob",
+                    "provider": "gdrive",
+                    "source": "src_id",
+                    "dest": "dst_id",
+                    "failed": "failed_id",
+                }
+            ],
+        )
+
+
+@pytest.mark.parametrize("ladder", [[200, 100], [100, 100], [0, 100]])
+def test_settings_invalid_dpi_ladder_raises_error(ladder, base_dropbox_settings_data):
+    """The DPI ladder must be strictly ascending and positive."""
+    with pytest.raises(ValueError, match="PDF_DPI_LADDER"):
+        Settings(**base_dropbox_settings_data, PDF_DPI_LADDER=ladder)
+
+
+@patch("os.getenv", return_value="env_token_value")
+def test_settings_parses_recognition_cascade(mock_getenv, base_dropbox_settings_data):
+    """Cascade tiers are parsed from JSON objects, with defaults for omitted fields."""
+    from src.cascade import CascadeModel
+
+    settings = Settings(
+        **base_dropbox_settings_data,
+        RECOGNITION_CASCADE=[
+            {"name": "fast", "concurrency": 8, "timeout_seconds": 20},
+            {"name": "strong"},
+        ],
+    )
+
+    assert settings.RECOGNITION_CASCADE == [
+        CascadeModel("fast", 8, 20),
+        CascadeModel("strong"),
+    ]
+
+
+@patch("os.getenv", return_value="env_token_value")
+def test_get_settings_does_not_log_endpoint_api_keys(
+    mock_getenv, base_dropbox_settings_data, tmp_path, caplog
+):
+    """Endpoints are logged by name and URL only; their API keys stay hidden."""
+    settings = Settings(
+        **base_dropbox_settings_data,
+        LOCAL_BUF_DIR=tmp_path / "buf",
+        RECOGNITION_ENDPOINTS=[
+            {"name": "h1", "base_url": "http://h1", "api_key": "sk-SECRET123"}
+        ],
+    )
+
+    with patch("src.config.Settings", return_value=settings), caplog.at_level("INFO"):
+        get_settings.__wrapped__()
+
+    assert "sk-SECRET123" not in caplog.text
+    assert "ENDPOINT h1: 'http://h1', weight: 1.0, concurrency: 4" in caplog.text
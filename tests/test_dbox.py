@@ -1,10 +1,25 @@
 # tests/test_dbox.py
+import datetime
 import pytest
 from unittest.mock import patch, ANY, MagicMock
 from dropbox.exceptions import ApiError
-from dropbox.files import ListFolderResult, FileMetadata
+from dropbox.files import ListFolderResult, FileMetadata, FolderMetadata
 
 from src.dbox import DropboxClient
+from src.exceptions import PermanentError
+
+MODIFIED = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _dbx_file(name, path_display, size=1024):
+    """Builds Dropbox SDK file metadata with the fields the API always returns."""
+    return FileMetadata(
+        name=name,
+        path_display=path_display,
+        size=size,
+        server_modified=MODIFIED,
+        rev="015f9a3b2c4d",
+    )
 
 
 @patch("src.dbox.dropbox.Dropbox")
@@ -18,7 +33,10 @@ def test_dropbox_client_init_success(MockDropbox):
 
     # 3. Проверки
     MockDropbox.assert_called_once_with(
-        app_key="key", app_secret="secret", oauth2_refresh_token="token"
+        app_key="key",
+        app_secret="secret",
+        oauth2_refresh_token="token",
+        session=ANY,
     )
     mock_dbx_instance.users_get_current_account.assert_called_once()
     assert client.dbx == mock_dbx_instance
@@ -45,30 +63,33 @@ def client():
 def test_list_files_success_single_page(client):
     """Тест успешного получения списка файлов (одна страница)."""
     mock_result = ListFolderResult(
-        entries=[FileMetadata(name="test.pdf", path_display="/some_path/test.pdf")],
+        entries=[_dbx_file("test.pdf", "/some_path/test.pdf")],
         has_more=False,
         cursor=None,
     )
     client.dbx.files_list_folder.return_value = mock_result
 
-    files = client.list_files("/some_path")
+    files = list(client.list_files("/some_path"))
 
     client.dbx.files_list_folder.assert_called_once_with("/some_path")
     client.dbx.files_list_folder_continue.assert_not_called()
     assert len(files) == 1
     assert files[0].name == "test.pdf"
+    assert files[0].size == 1024
+    assert files[0].modified == MODIFIED.replace(tzinfo=datetime.timezone.utc)
+    assert files[0].revision == "015f9a3b2c4d"
 
 
 def test_list_files_with_pagination(client):
     """Тест успешного получения списка файлов с пагинацией."""
     # 1. Настройка моков для двух страниц
     mock_result_page1 = ListFolderResult(
-        entries=[FileMetadata(name="file1.pdf", path_display="/some_path/file1.pdf")],
+        entries=[_dbx_file("file1.pdf", "/some_path/file1.pdf")],
         has_more=True,
         cursor="cursor123",
     )
     mock_result_page2 = ListFolderResult(
-        entries=[FileMetadata(name="file2.pdf", path_display="/some_path/file2.pdf")],
+        entries=[_dbx_file("file2.pdf", "/some_path/file2.pdf")],
         has_more=False,
         cursor=None,
     )
@@ -78,7 +99,7 @@ def test_list_files_with_pagination(client):
     client.dbx.files_list_folder_continue.return_value = mock_result_page2
 
     # 2. Вызов
-    files = client.list_files("/some_path")
+    files = list(client.list_files("/some_path"))
 
     # 3. Проверки
     client.dbx.files_list_folder.assert_called_once_with("/some_path")
@@ -92,11 +113,40 @@ def test_list_files_api_error(client):
     """Тест ошибки API при получении списка файлов."""
     client.dbx.files_list_folder.side_effect = ApiError(None, None, None, None)
 
-    files = client.list_files("/some_path")
+    files = list(client.list_files("/some_path"))
 
     assert files == []
 
 
+def test_list_files_yields_first_page_before_fetching_the_next(client):
+    client.dbx.files_list_folder.return_value = ListFolderResult(
+        entries=[_dbx_file("file1.pdf", "/some_path/file1.pdf")],
+        has_more=True,
+        cursor="cursor123",
+    )
+
+    files = client.list_files("/some_path")
+
+    assert next(files).name == "file1.pdf"
+    client.dbx.files_list_folder_continue.assert_not_called()
+
+
+def test_list_files_skips_folders_and_non_pdf_files(client):
+    client.dbx.files_list_folder.return_value = ListFolderResult(
+        entries=[
+            _dbx_file("notes.txt", "/some_path/notes.txt"),
+            FolderMetadata(name="sub", id="id:sub", path_display="/some_path/sub"),
+            _dbx_file("scan.PDF", "/some_path/scan.PDF"),
+        ],
+        has_more=False,
+        cursor=None,
+    )
+
+    files = list(client.list_files("/some_path"))
+
+    assert [f.name for f in files] == ["scan.PDF"]
+
+
 def test_download_file_success(client):
     """Тест успешной загрузки файла."""
     client.download_file("/dbx_path", "/local_path")
@@ -145,3 +195,145 @@ def test_delete_file_api_error(client):
     client.dbx.files_delete_v2.side_effect = ApiError(None, None, None, None)
     with pytest.raises(ApiError):
         client.delete_file("/dbx_path")
+
+
+def test_verify_folder_exists_is_cached(client):
+    """A verified folder is not looked up again while the cache entry is fresh."""
+    client.verify_folder_exists("/source")
+    client.verify_folder_exists("/Source")
+
+    client.dbx.files_get_metadata.assert_called_once_with("/source")
+
+
+def _delete_entry(failure=None):
+    entry = MagicMock()
+    entry.is_failure.return_value = failure is not None
+    entry.get_failure.return_value = failure
+    return entry
+
+
+def test_delete_files_polls_async_job_and_reports_failures(client):
+    """A batch delete polls its async job; per-entry failures are reported."""
+    launch = MagicMock()
+    launch.is_complete.return_value = False
+    launch.is_async_job_id.return_value = True
+    launch.get_async_job_id.return_value = "job-1"
+    client.dbx.files_delete_batch.return_value = launch
+
+    in_progress = MagicMock()
+    in_progress.is_complete.return_value = False
+    in_progress.is_failed.return_value = False
+    not_found = MagicMock()
+    not_found.is_path_lookup.return_value = True
+    not_found.get_path_lookup.return_value.is_not_found.return_value = True
+    write_error = MagicMock()
+    write_error.is_path_lookup.return_value = False
+    write_error.is_too_many_write_operations.return_value = False
+    complete = MagicMock()
+    complete.is_complete.return_value = True
+    complete.get_complete.return_value.entries = [
+        _delete_entry(),
+        _delete_entry(not_found),
+        _delete_entry(write_error),
+    ]
+    client.dbx.files_delete_batch_check.side_effect = [in_progress, complete]
+
+    with patch("src.dbox.time.sleep") as mock_sleep:
+        outcomes = client.delete_files(["/a.pdf", "/b.pdf", "/c.pdf"])
+
+    client.dbx.files_delete_batch.assert_called_once()
+    assert client.dbx.files_delete_batch_check.call_count == 2
+    mock_sleep.assert_called_once()
+    assert outcomes["/a.pdf"] is None
+    assert outcomes["/b.pdf"] is None
+    assert isinstance(outcomes["/c.pdf"], PermanentError)
+
+
+def test_move_files_completed_synchronously(client):
+    """A batch move that completes immediately is not polled."""
+    launch = MagicMock()
+    launch.is_complete.return_value = True
+    launch.get_complete.return_value.entries = [_delete_entry()]
+    client.dbx.files_move_batch_v2.return_value = launch
+
+    outcomes = client.move_files([("/src/a.pdf", "/failed", None)])
+
+    entries = client.dbx.files_move_batch_v2.call_args.args[0]
+    assert (entries[0].from_path, entries[0].to_path) == ("/src/a.pdf", "/failed/a.pdf")
+    client.dbx.files_move_batch_check_v2.assert_not_called()
+    assert outcomes == {"/src/a.pdf": None}
+
+
+def test_delete_files_reports_launch_error_for_every_entry(client):
+    client.dbx.files_delete_batch.side_effect = ApiError(None, None, None, None)
+
+    outcomes = client.delete_files(["/a.pdf", "/b.pdf"])
+
+    assert set(outcomes) == {"/a.pdf", "/b.pdf"}
+    assert all(isinstance(error, ApiError) for error in outcomes.values())
+
+
+def test_dbx_is_per_thread_and_follows_token_refresh():
+    """Worker threads get their own clients, rebuilt when the root refreshes the token."""
+    import threading
+
+    with patch("src.dbox.dropbox.Dropbox") as MockDropbox:
+        root = MagicMock(_oauth2_access_token="token-1")
+        MockDropbox.side_effect = [root] + [MagicMock() for _ in range(3)]
+        client = DropboxClient("key", "secret", "token")
+
+        main_dbx = client.dbx
+        assert client.dbx is main_dbx
+        other = []
+        thread = threading.Thread(target=lambda: other.append(client.dbx))
+        thread.start()
+        thread.join()
+        assert other[0] is not main_dbx
+
+        root._oauth2_access_token = "token-2"
+        assert client.dbx is not main_dbx
+
+    assert root.check_and_refresh_access_token.call_count == 4
+    MockDropbox.assert_called_with(oauth2_access_token="token-2", session=ANY)
+
+
+def test_download_bytes_reads_response_body(client):
+    response = MagicMock(content=b"%PDF")
+    client.dbx.files_download.return_value = (MagicMock(), response)
+
+    assert client.download_bytes("/src/a.pdf") == b"%PDF"
+    client.dbx.files_download.assert_called_once_with("/src/a.pdf")
+    response.close.assert_called_once()
+
+
+def test_upload_bytes_single_upload(client):
+    client.upload_bytes(b"%PDF", "/dest", "a.pdf")
+
+    client.dbx.files_upload.assert_called_once_with(b"%PDF", "/dest/a.pdf", mode=ANY)
+
+
+def test_list_files_includes_content_hash(client):
+    entry = _dbx_file("a.pdf", "/src/a.pdf")
+    entry.content_hash = "ab" * 32
+    client.dbx.files_list_folder.return_value = ListFolderResult(
+        entries=[entry], has_more=False, cursor=None
+    )
+
+    assert next(client.list_files("/src")).content_hash == "ab" * 32
+
+
+def test_copy_file_replaces_existing_destination(client):
+    conflict = MagicMock()
+    conflict.is_to.return_value = True
+    conflict.get_to.return_value.is_conflict.return_value = True
+    client.dbx.files_copy_v2.side_effect = [ApiError(None, conflict, None, None), None]
+
+    assert client.copy_file("/dest/old.pdf", "/dest", "new.pdf") == "/dest/new.pdf"
+    client.dbx.files_delete_v2.assert_called_once_with("/dest/new.pdf")
+    assert client.dbx.files_copy_v2.call_count == 2
+
+
+def test_copy_file_onto_itself_only_checks_existence(client):
+    assert client.copy_file("/dest/a.pdf", "/dest", "a.pdf") == "/dest/a.pdf"
+    client.dbx.files_get_metadata.assert_called_once_with("/dest/a.pdf")
+    client.dbx.files_copy_v2.assert_not_called()
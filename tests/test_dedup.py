@@ -0,0 +1,44 @@
+# tests/test_dedup.py
+from src.dedup import DedupIndex, get_dedup_index
+
+
+def test_dedup_index_records_and_forgets_outputs(tmp_path):
+    index = DedupIndex(tmp_path / "dedup.sqlite3")
+    assert index.lookup("route", "hash") is None
+
+    index.record("route", "hash", "/dest/recognized_a.pdf")
+    assert index.lookup("route", "hash") == "/dest/recognized_a.pdf"
+    # Output IDs belong to one route's storage account.
+    assert index.lookup("other", "hash") is None
+
+    index.forget("route", "hash")
+    assert index.lookup("route", "hash") is None
+
+
+def test_dedup_index_drops_content_whose_output_was_overwritten(tmp_path):
+    """Re-exporting a file overwrites its output, so the old content loses it."""
+    index = DedupIndex(tmp_path / "dedup.sqlite3")
+    index.record("route", "old-hash", "/dest/recognized_note.pdf")
+    index.record("other", "old-hash", "/dest/recognized_note.pdf")
+
+    index.record("route", "new-hash", "/dest/recognized_note.pdf")
+
+    assert index.lookup("route", "old-hash") is None
+    assert index.lookup("route", "new-hash") == "/dest/recognized_note.pdf"
+    assert index.lookup("other", "old-hash") == "/dest/recognized_note.pdf"
+
+
+def test_dedup_index_persists_across_instances(tmp_path):
+    path = tmp_path / "state" / "dedup.sqlite3"
+    index = DedupIndex(path)
+    index.record("route", "hash", "out_id")
+    index.close()
+
+    assert DedupIndex(path).lookup("route", "hash") == "out_id"
+
+
+def test_get_dedup_index_is_disabled_without_path(mock_settings, tmp_path):
+    assert get_dedup_index() is None
+
+    mock_settings.DEDUP_INDEX_PATH = tmp_path / "dedup.sqlite3"
+    assert get_dedup_index() is get_dedup_index()
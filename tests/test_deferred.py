@@ -0,0 +1,51 @@
+# tests/test_deferred.py
+from unittest.mock import MagicMock
+
+from src.storage.deferred import DeferredOperations
+
+
+def test_flush_submits_batches_and_reports_failures():
+    client = MagicMock()
+    error = RuntimeError("conflict")
+    client.delete_files.return_value = {"/src/a.pdf": None}
+    client.move_files.return_value = {"/src/b.pdf": error}
+    deferred = DeferredOperations(client)
+    deferred.delete("/src/a.pdf", "a.pdf")
+    deferred.move("/src/b.pdf", "/failed", "/src", "b.pdf")
+    assert len(deferred) == 2
+
+    outcomes = deferred.flush()
+
+    assert outcomes == {"/src/a.pdf": None, "/src/b.pdf": error}
+    client.delete_files.assert_called_once_with(["/src/a.pdf"])
+    assert list(client.move_files.call_args.args[0]) == [
+        ("/src/b.pdf", "/failed", "/src")
+    ]
+    assert len(deferred) == 0
+
+
+def test_flush_fails_every_file_of_a_batch_that_raises():
+    """A batch failing as a whole does not drop the other batch or callbacks."""
+    client = MagicMock()
+    client.delete_files.side_effect = RuntimeError("network down")
+    client.move_files.return_value = {"/src/b.pdf": None}
+    callback = MagicMock()
+    deferred = DeferredOperations(client)
+    deferred.delete("/src/a.pdf", "a.pdf")
+    deferred.move("/src/b.pdf", "/failed", "/src", "b.pdf")
+    deferred.call_after_flush(callback)
+
+    outcomes = deferred.flush()
+
+    assert isinstance(outcomes["/src/a.pdf"], RuntimeError)
+    assert outcomes["/src/b.pdf"] is None
+    client.move_files.assert_called_once()
+    callback.assert_called_once()
+
+
+def test_flush_without_operations_makes_no_calls():
+    client = MagicMock()
+
+    assert DeferredOperations(client).flush() == {}
+    client.delete_files.assert_not_called()
+    client.move_files.assert_not_called()
@@ -0,0 +1,93 @@
+# tests/test_endpoints.py
+from unittest.mock import patch
+
+from src.endpoints import (
+    MIN_REQUESTS_FOR_EJECTION,
+    Endpoint,
+    EndpointPool,
+    recognition_capacity,
+)
+
+
+def _pool(*endpoints, max_error_rate=0.5, ejection_seconds=30):
+    return EndpointPool(
+        list(endpoints),
+        max_error_rate=max_error_rate,
+        ejection_seconds=ejection_seconds,
+    )
+
+
+def test_pool_prefers_least_outstanding_by_weight():
+    pool = _pool(
+        Endpoint("big", "http://big", weight=2, concurrency=8),
+        Endpoint("small", "http://small", weight=1, concurrency=8),
+    )
+
+    chosen = [pool.acquire().endpoint.name for _ in range(6)]
+
+    assert chosen.count("big") == 4
+    assert chosen.count("small") == 2
+
+
+def test_pool_respects_endpoint_concurrency():
+    pool = _pool(
+        Endpoint("a", "http://a", weight=10, concurrency=1),
+        Endpoint("b", "http://b", concurrency=1),
+    )
+
+    first = pool.acquire()
+    second = pool.acquire()
+
+    assert {first.endpoint.name, second.endpoint.name} == {"a", "b"}
+
+
+def test_pool_ejects_failing_endpoint_and_readmits_it():
+    pool = _pool(Endpoint("bad", "http://bad"), Endpoint("good", "http://good"))
+    bad = pool._states[0]
+
+    with patch("src.endpoints.time.monotonic", return_value=100.0):
+        for _ in range(MIN_REQUESTS_FOR_EJECTION):
+            bad.outstanding += 1
+            bad.requests += 1
+            bad.admitted_requests += 1
+            pool.release(bad, 1.0, failed=True)
+
+        assert pool.stats()["bad"]["ejected"]
+        assert pool.acquire().endpoint.name == "good"
+        assert pool.acquire().endpoint.name == "good"
+
+    with patch("src.endpoints.time.monotonic", return_value=131.0):
+        assert not pool.stats()["bad"]["ejected"]
+        assert pool.acquire().endpoint.name == "bad"
+
+
+def test_pool_uses_ejected_endpoints_when_all_are_ejected():
+    pool = _pool(Endpoint("only", "http://only"))
+    pool._states[0].ejected_until = float("inf")
+
+    assert pool.acquire().endpoint.name == "only"
+
+
+def test_pool_tracks_latency_and_errors():
+    pool = _pool(Endpoint("a", "http://a"))
+    state = pool.acquire()
+    pool.release(state, 2.0, failed=False)
+    state = pool.acquire()
+    pool.release(state, 1.0, failed=True)
+
+    stats = pool.stats()["a"]
+    assert stats["requests"] == 2
+    assert stats["errors"] == 1
+    assert stats["outstanding"] == 0
+    assert stats["latency_ewma"] == 2.0
+    assert stats["error_rate"] == 0.2
+
+
+def test_recognition_capacity(mock_settings):
+    assert recognition_capacity(mock_settings) == 4
+
+    mock_settings.RECOGNITION_ENDPOINTS = [
+        Endpoint("a", "http://a", concurrency=3),
+        Endpoint("b", "http://b", concurrency=5),
+    ]
+    assert recognition_capacity(mock_settings) == 8
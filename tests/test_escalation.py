@@ -0,0 +1,45 @@
+# tests/test_escalation.py
+from src.escalation import (
+    EscalationStats,
+    dpi_ladder,
+    escalation_reason,
+    get_escalation_stats,
+)
+
+
+def test_escalation_reason_flags_short_and_uncertain_results(mock_settings):
+    assert escalation_reason("") == "short"
+    assert escalation_reason(None) == "short"
+    assert escalation_reason("ok") == "short"
+    assert escalation_reason("Meeting notes about the [ILLEGIBLE] budget") == "marker"
+    assert escalation_reason("A perfectly readable line of handwriting.") is None
+
+
+def test_escalation_reason_uses_configured_pattern(mock_settings):
+    mock_settings.ESCALATION_PATTERN = r"(\?\s*){2,}"
+
+    assert escalation_reason("The total was ? ? dollars in March") == "pattern"
+
+
+def test_dpi_ladder_falls_back_to_pdf_dpi(mock_settings):
+    assert dpi_ladder() == [300]
+    mock_settings.PDF_DPI_LADDER = [100, 200]
+    assert dpi_ladder() == [100, 200]
+
+
+def test_stats_count_escalated_pages():
+    stats = EscalationStats()
+    stats.record(100, [])
+    stats.record(200, ["short"])
+    stats.record(300, ["short", "marker"])
+
+    assert stats.summary() == {
+        "pages": 3,
+        "escalated": 2,
+        "final_dpi": {100: 1, 200: 1, 300: 1},
+        "reasons": {"short": 2, "marker": 1},
+    }
+
+
+def test_stats_are_shared():
+    assert get_escalation_stats() is get_escalation_stats()
@@ -1,9 +1,10 @@
 # tests/test_gdrive.py
 import pytest
+from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock, ANY
 import json
 
-from src.gdrive import GoogleDriveClient
+from src.gdrive import GoogleDriveClient, _drive_discovery_document
 from src.exceptions import PermanentError
 
 
@@ -32,7 +33,7 @@ def mock_token():
     }
 
 
-@patch("src.gdrive.build")
+@patch("src.gdrive.build_from_document")
 @patch("src.gdrive.Credentials")
 def test_gdrive_client_init_success(
     MockCredentials, MockBuild, mock_credentials, mock_token
@@ -50,11 +51,36 @@ def test_gdrive_client_init_success(
 
     # Asserts
     MockCredentials.from_authorized_user_info.assert_called_once()
-    MockBuild.assert_called_once_with("drive", "v3", credentials=ANY)
+    MockBuild.assert_called_once_with(_drive_discovery_document(), credentials=ANY)
     assert client.service == mock_service
 
 
-@patch("src.gdrive.build")
+def test_drive_discovery_document_is_bundled():
+    """The Drive discovery document is loaded from the installed package, not the network."""
+    document = json.loads(_drive_discovery_document())
+    assert document["name"] == "drive"
+    assert document["version"] == "v3"
+
+
+@patch("src.gdrive.Request")
+@patch("src.gdrive.build_from_document")
+@patch("src.gdrive.Credentials")
+def test_gdrive_client_init_refreshes_expired_token(
+    MockCredentials, MockBuild, MockRequest, mock_credentials, mock_token
+):
+    """An expired access token is refreshed during initialization."""
+    mock_creds = MagicMock(valid=False, refresh_token="test_refresh_token")
+    MockCredentials.from_authorized_user_info.return_value = mock_creds
+
+    GoogleDriveClient(
+        credentials_json=json.dumps(mock_credentials),
+        token_json=json.dumps(mock_token),
+    )
+
+    mock_creds.refresh.assert_called_once_with(MockRequest.return_value)
+
+
+@patch("src.gdrive.build_from_document")
 @patch("src.gdrive.Credentials")
 def test_gdrive_client_init_failure(
     MockCredentials, MockBuild, mock_credentials, mock_token
@@ -75,7 +101,7 @@ def test_gdrive_client_init_failure(
 def client(mock_credentials, mock_token):
     """Fixture to create a GoogleDriveClient instance with mocked dependencies."""
     with (
-        patch("src.gdrive.build") as MockBuild,
+        patch("src.gdrive.build_from_document") as MockBuild,
         patch("src.gdrive.Credentials") as MockCredentials,
     ):
         MockCredentials.from_authorized_user_info.return_value = MagicMock(valid=True)
@@ -127,12 +153,46 @@ def test_list_files_success(client):
         "files": [{"id": "file_id", "name": "test.pdf"}]
     }
 
-    files = client.list_files("folder_id")
+    files = list(client.list_files("folder_id"))
 
     assert len(files) == 1
     assert files[0].name == "test.pdf"
 
 
+def test_list_files_filters_pdfs_server_side_and_paginates(client):
+    client.service.files().get().execute.return_value = {
+        "mimeType": "application/vnd.google-apps.folder"
+    }
+    client.service.files().list.reset_mock()
+    client.service.files().list().execute.side_effect = [
+        {
+            "files": [
+                {
+                    "id": "a",
+                    "name": "a.pdf",
+                    "size": "2048",
+                    "modifiedTime": "2024-05-01T10:00:00.000Z",
+                    "version": "7",
+                }
+            ],
+            "nextPageToken": "page2",
+        },
+        {"files": [{"id": "b", "name": "b.pdf"}]},
+    ]
+
+    files = list(client.list_files("folder_id"))
+
+    assert [f.name for f in files] == ["a.pdf", "b.pdf"]
+    assert files[0].size == 2048
+    assert files[0].modified == datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+    assert files[0].revision == "7"
+    assert files[1].size is None and files[1].modified is None
+    list_calls = [c for c in client.service.files().list.call_args_list if c.kwargs]
+    assert [c.kwargs["pageToken"] for c in list_calls] == [None, "page2"]
+    assert "mimeType='application/pdf'" in list_calls[0].kwargs["q"]
+    assert list_calls[0].kwargs["fields"].startswith("nextPageToken, files(")
+
+
 @patch("src.gdrive.MediaIoBaseDownload")
 @patch("src.gdrive.io.FileIO")
 def test_download_file_success(MockFileIO, MockMediaIoBaseDownload, client):
@@ -193,3 +253,322 @@ def test_move_file_success(client):
         fields="id, parents",
     )
     client.service.files().update().execute.assert_called_once()
+
+
+@patch("src.gdrive.MediaFileUpload")
+def test_upload_file_overwrites_existing_file_in_one_call(MockMediaFileUpload, client):
+    """An existing file is overwritten with a single update, not delete + create."""
+    client._find_file_id_by_name = MagicMock(return_value="existing_id")
+    client.service.files().update().execute.return_value = {"id": "existing_id"}
+    client.service.files().update.reset_mock()
+
+    client.upload_file("/local/path/test.pdf", "folder_id", "test.pdf")
+
+    client.service.files().update.assert_called_once_with(
+        fileId="existing_id",
+        media_body=MockMediaFileUpload.return_value,
+        fields="id, trashed",
+    )
+    client.service.files().create.assert_not_called()
+    client.service.files().delete.assert_not_called()
+
+
+@patch("src.gdrive.MediaFileUpload")
+def test_upload_file_replaces_cached_file_that_was_trashed(MockMediaFileUpload, client):
+    """An overwrite target trashed since it was cached is replaced by a new file."""
+    client.service.files().list().execute.return_value = {
+        "files": [{"id": "old_id", "name": "test.pdf"}]
+    }
+    client.service.files().update().execute.return_value = {
+        "id": "old_id",
+        "trashed": True,
+    }
+    client.service.files().create().execute.return_value = {"id": "new_id"}
+
+    assert client.upload_file("/local/path/test.pdf", "dest_id", "test.pdf") == "new_id"
+    assert client._find_file_id_by_name("test.pdf", "dest_id") == "new_id"
+
+
+@patch("src.gdrive.MediaFileUpload")
+def test_upload_file_creates_file_when_cached_target_is_gone(
+    MockMediaFileUpload, client
+):
+    """A 404 on the overwrite falls back to creating the file in the same call."""
+    client._find_file_id_by_name = MagicMock(return_value="deleted_id")
+    from googleapiclient.errors import HttpError
+
+    client.service.files().update().execute.side_effect = HttpError(
+        resp=MagicMock(status=404), content=b"not found"
+    )
+    client.service.files().create().execute.return_value = {"id": "new_id"}
+
+    assert client.upload_file("/local/path/test.pdf", "dest_id", "test.pdf") == "new_id"
+
+
+def test_move_file_with_known_parent_is_single_call(client):
+    """Moving a file whose parent is known skips the parents lookup."""
+    client.move_file("file_id", "to_folder_id", from_folder_id="from_folder_id")
+
+    client.service.files().get.assert_not_called()
+    client.service.files().update.assert_called_once_with(
+        fileId="file_id",
+        addParents="to_folder_id",
+        removeParents="from_folder_id",
+        fields="id, parents",
+    )
+
+
+class FakeBatch:
+    """Stands in for BatchHttpRequest, answering each request from `responses`."""
+
+    def __init__(self, callback, responses):
+        self.callback = callback
+        self.responses = responses
+        self.request_ids = []
+
+    def add(self, request, request_id):
+        self.request_ids.append(request_id)
+
+    def execute(self):
+        for request_id in self.request_ids:
+            response, error = self.responses.get(request_id, ({}, None))
+            self.callback(request_id, response, error)
+
+
+def _fake_batches(client, responses):
+    batches = []
+
+    def new_batch_http_request(callback):
+        batches.append(FakeBatch(callback, responses))
+        return batches[-1]
+
+    client.service.new_batch_http_request.side_effect = new_batch_http_request
+    return batches
+
+
+def _http_error(status):
+    from googleapiclient.errors import HttpError
+
+    return HttpError(resp=MagicMock(status=status), content=b"{}")
+
+
+def test_delete_files_uses_one_batch_and_reports_failures(client):
+    """Deletes are batched; a 404 counts as deleted, other errors are reported."""
+    server_error = _http_error(500)
+    batches = _fake_batches(
+        client, {"gone": (None, _http_error(404)), "broken": (None, server_error)}
+    )
+
+    outcomes = client.delete_files(["ok", "gone", "broken"])
+
+    assert len(batches) == 1
+    assert outcomes == {"ok": None, "gone": None, "broken": server_error}
+
+
+def test_move_files_looks_up_unknown_parents_in_one_batch(client):
+    """Moves with unknown parents need one lookup batch and one update batch."""
+    batches = _fake_batches(client, {"b": ({"parents": ["old_parent"]}, None)})
+
+    outcomes = client.move_files([("a", "failed", "source"), ("b", "failed", None)])
+
+    assert [batch.request_ids for batch in batches] == [["b"], ["a", "b"]]
+    assert outcomes == {"a": None, "b": None}
+    client.service.files().update.assert_any_call(
+        fileId="b",
+        addParents="failed",
+        removeParents="old_parent",
+        fields="id, parents",
+    )
+
+
+def test_verify_folders_exist_raises_for_missing_folder(client):
+    """Folder verification is batched and still raises a PermanentError."""
+    folder = {"mimeType": "application/vnd.google-apps.folder"}
+    batches = _fake_batches(
+        client, {"src": (folder, None), "dst": (None, _http_error(404))}
+    )
+
+    with pytest.raises(PermanentError, match="'dst' not found"):
+        client.verify_folders_exist(["src", "dst"])
+    assert len(batches) == 1
+
+
+def test_verify_folder_exists_is_cached(client):
+    """A verified folder is not looked up again while the cache entry is fresh."""
+    client.service.files().get().execute.return_value = {
+        "id": "folder_id",
+        "mimeType": "application/vnd.google-apps.folder",
+    }
+    client.service.files().get.reset_mock()
+
+    client.verify_folder_exists("folder_id")
+    client.verify_folder_exists("folder_id")
+
+    client.service.files().get.assert_called_once()
+
+
+def test_find_file_id_by_name_lists_folder_once(client):
+    """Destination names are resolved from one paginated listing of the folder."""
+    client.service.files().list().execute.side_effect = [
+        {"files": [{"id": "id_a", "name": "a.pdf"}], "nextPageToken": "page2"},
+        {"files": [{"id": "id_b", "name": "b.pdf"}]},
+    ]
+    client.service.files().list.reset_mock()
+
+    assert client._find_file_id_by_name("a.pdf", "dest_id") == "id_a"
+    assert client._find_file_id_by_name("b.pdf", "dest_id") == "id_b"
+    assert client._find_file_id_by_name("c.pdf", "dest_id") is None
+
+    assert client.service.files().list.call_count == 2
+
+
+@patch("src.gdrive.MediaFileUpload")
+def test_upload_file_updates_cached_names(MockMediaFileUpload, client):
+    """A created file is added to the cached name map, so re-uploads overwrite it."""
+    client.service.files().list().execute.return_value = {"files": []}
+    client.service.files().create().execute.return_value = {"id": "new_id"}
+    client.service.files().update().execute.return_value = {"id": "new_id"}
+    client.service.files().update.reset_mock()
+
+    client.upload_file("/local/path/test.pdf", "dest_id", "test.pdf")
+    assert client.upload_file("/local/path/test.pdf", "dest_id", "test.pdf") == "new_id"
+
+    client.service.files().update.assert_called_once_with(
+        fileId="new_id",
+        media_body=MockMediaFileUpload.return_value,
+        fields="id, trashed",
+    )
+
+
+def test_move_file_uses_parents_from_listing(client):
+    """Files seen in a listing are moved without a parents lookup."""
+    client.service.files().get().execute.return_value = {
+        "id": "src_id",
+        "mimeType": "application/vnd.google-apps.folder",
+    }
+    client.service.files().list().execute.return_value = {
+        "files": [{"id": "file_id", "name": "test.pdf"}]
+    }
+    list(client.list_files("src_id"))
+    client.service.files().get.reset_mock()
+
+    client.move_file("file_id", "failed_id")
+
+    client.service.files().get.assert_not_called()
+    client.service.files().update.assert_called_once_with(
+        fileId="file_id",
+        addParents="failed_id",
+        removeParents="src_id",
+        fields="id, parents",
+    )
+
+
+def test_service_is_built_per_thread(mock_credentials, mock_token):
+    """Each worker thread gets its own service (and httplib2 transport)."""
+    import threading
+
+    with (
+        patch("src.gdrive.build_from_document") as MockBuild,
+        patch("src.gdrive.Credentials") as MockCredentials,
+    ):
+        MockCredentials.from_authorized_user_info.return_value = MagicMock(valid=True)
+        MockBuild.side_effect = lambda *args, **kwargs: MagicMock()
+        client = GoogleDriveClient(
+            credentials_json=json.dumps(mock_credentials),
+            token_json=json.dumps(mock_token),
+        )
+        services = []
+        thread = threading.Thread(target=lambda: services.append(client.service))
+        thread.start()
+        thread.join()
+
+    assert client.service is client.service
+    assert services[0] is not client.service
+    assert MockBuild.call_count == 2
+
+
+@patch("src.gdrive.MediaIoBaseDownload")
+def test_download_bytes_downloads_into_memory(MockMediaIoBaseDownload, client):
+    def fake_downloader(fh, request):
+        fh.write(b"%PDF")
+        return MagicMock(**{"next_chunk.return_value": (None, True)})
+
+    MockMediaIoBaseDownload.side_effect = fake_downloader
+
+    assert client.download_bytes("file_id") == b"%PDF"
+    client.service.files().get_media.assert_called_with(fileId="file_id")
+
+
+@patch("src.gdrive.MediaIoBaseUpload")
+def test_upload_bytes_creates_file_from_memory(MockMediaIoBaseUpload, client):
+    client._find_file_id_by_name = MagicMock(return_value=None)
+    client.service.files().create().execute.return_value = {"id": "new_id"}
+
+    client.upload_bytes(b"%PDF", "folder_id", "a.pdf")
+
+    assert MockMediaIoBaseUpload.call_args.args[0].getvalue() == b"%PDF"
+    assert MockMediaIoBaseUpload.call_args.args[1] == "application/pdf"
+    client.service.files().create.assert_called_with(
+        body={"name": "a.pdf", "parents": ["folder_id"]},
+        media_body=MockMediaIoBaseUpload.return_value,
+        fields="id",
+    )
+
+
+def test_list_files_includes_md5_checksum(client):
+    client.service.files().get().execute.return_value = {
+        "mimeType": "application/vnd.google-apps.folder"
+    }
+    client.service.files().list().execute.return_value = {
+        "files": [{"id": "file_id", "name": "a.pdf", "md5Checksum": "abc123"}]
+    }
+
+    assert next(client.list_files("folder_id")).content_hash == "abc123"
+
+
+def test_copy_file_replaces_file_of_same_name(client):
+    client._find_file_id_by_name = MagicMock(return_value="old_id")
+    client.service.files().copy().execute.return_value = {"id": "copy_id"}
+
+    assert client.copy_file("output_id", "dest_id", "b.pdf") == "copy_id"
+
+    client.service.files().copy.assert_called_with(
+        fileId="output_id",
+        body={"name": "b.pdf", "parents": ["dest_id"]},
+        fields="id",
+    )
+    client.service.files().delete.assert_called_with(fileId="old_id")
+
+
+def test_copy_file_onto_itself_fails_when_trashed(client):
+    client._find_file_id_by_name = MagicMock(return_value="output_id")
+    client.service.files().get().execute.return_value = {"trashed": True}
+
+    with pytest.raises(PermanentError, match="trash"):
+        client.copy_file("output_id", "dest_id", "a.pdf")
+    client.service.files().copy.assert_not_called()
+
+
+def test_drive_outages_open_the_storage_circuit(client):
+    """A 503 while verifying or listing counts as an outage, not an empty folder."""
+    from googleapiclient.errors import HttpError
+    from src.circuit_breaker import OPEN, CircuitBreaker
+    from src.exceptions import TransientError
+    from src.storage.breaker import CircuitBreakingStorageClient
+
+    unavailable = HttpError(resp=MagicMock(status=503), content=b"unavailable")
+    client.service.files().get().execute.side_effect = unavailable
+    breaker = CircuitBreaker("gdrive", failure_threshold=2, reset_seconds=60)
+    wrapped = CircuitBreakingStorageClient(client, breaker)
+
+    with pytest.raises(TransientError):
+        list(wrapped.list_files("folder_id"))
+    client.service.files().get().execute.side_effect = None
+    client.service.files().get().execute.return_value = {
+        "mimeType": "application/vnd.google-apps.folder"
+    }
+    client.service.files().list().execute.side_effect = unavailable
+    with pytest.raises(TransientError):
+        list(wrapped.list_files("folder_id"))
+
+    assert breaker.state == OPEN
@@ -0,0 +1,194 @@
+# tests/test_hedging.py
+import threading
+
+import pytest
+
+from src.hedging import (
+    MIN_SAMPLES,
+    HedgeBudget,
+    HedgeCancelled,
+    Hedger,
+    LatencyTracker,
+)
+
+
+def _warm(hedger, key, seconds=0.01):
+    for _ in range(MIN_SAMPLES):
+        hedger._tracker(key).record(seconds)
+
+
+def test_latency_tracker_needs_min_samples():
+    tracker = LatencyTracker()
+    for i in range(MIN_SAMPLES - 1):
+        tracker.record(i)
+    assert tracker.percentile(50) is None
+
+    tracker.record(MIN_SAMPLES - 1)
+    assert tracker.percentile(50) == MIN_SAMPLES // 2
+    assert tracker.percentile(100) == MIN_SAMPLES - 1
+
+
+def test_hedge_budget_caps_hedges():
+    budget = HedgeBudget(ratio=0.5, burst=1)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    budget.on_request()
+    assert not budget.try_spend()
+    budget.on_request()
+    assert budget.try_spend()
+
+
+def test_hedger_does_not_hedge_without_latency_history():
+    hedger = Hedger(percentile=50, budget_ratio=1, min_delay=0, workers=2)
+    calls = []
+
+    assert hedger.run("model", lambda attempt: calls.append(1) or "text") == "text"
+    assert calls == [1]
+    assert hedger.stats() == {"requests": 1, "hedged": 0, "hedge_wins": 0}
+
+
+def test_hedger_hedges_slow_call_and_takes_first_answer():
+    hedger = Hedger(percentile=50, budget_ratio=1, min_delay=0, workers=2)
+    _warm(hedger, "model")
+    release_primary = threading.Event()
+    attempts = []
+
+    def call(attempt):
+        attempts.append(1)
+        if len(attempts) == 1:
+            release_primary.wait(5)
+            return "slow"
+        return "fast"
+
+    try:
+        assert hedger.run("model", call) == "fast"
+    finally:
+        release_primary.set()
+    assert hedger.stats() == {"requests": 1, "hedged": 1, "hedge_wins": 1}
+
+
+def test_hedger_falls_back_to_other_call_when_one_fails():
+    hedger = Hedger(percentile=50, budget_ratio=1, min_delay=0, workers=2)
+    _warm(hedger, "model")
+    release_primary = threading.Event()
+    attempts = []
+
+    def call(attempt):
+        attempts.append(1)
+        if len(attempts) == 1:
+            release_primary.wait(5)
+            return "slow"
+        release_primary.set()
+        raise RuntimeError("hedge failed")
+
+    assert hedger.run("model", call) == "slow"
+    assert hedger.stats()["hedge_wins"] == 0
+
+
+def test_hedger_raises_when_both_calls_fail():
+    hedger = Hedger(percentile=50, budget_ratio=1, min_delay=0, workers=2)
+    _warm(hedger, "model")
+
+    def call(attempt):
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError, match="down"):
+        hedger.run("model", call)
+
+
+def test_hedger_respects_budget():
+    hedger = Hedger(percentile=50, budget_ratio=0, min_delay=0, workers=2)
+    hedger.budget = HedgeBudget(ratio=0, burst=0)
+    _warm(hedger, "model")
+    release = threading.Event()
+    attempts = []
+
+    def call(attempt):
+        attempts.append(1)
+        release.wait(0.2)
+        return "text"
+
+    assert hedger.run("model", call) == "text"
+    assert attempts == [1]
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_hedger_cancels_losing_copy_still_waiting_to_send():
+    """A copy blocked on local capacity when the other wins never sends its request."""
+    hedger = Hedger(percentile=50, budget_ratio=1, min_delay=0, workers=2)
+    _warm(hedger, "model")
+    capacity = threading.Event()
+    sent = []
+    attempts = []
+    primary_gave_up = threading.Event()
+
+    def call(attempt):
+        attempts.append(attempt)
+        if len(attempts) == 1:
+            capacity.wait(5)  # e.g. blocked on the token budget
+            try:
+                attempt.check()
+            except HedgeCancelled:
+                primary_gave_up.set()
+                raise
+        sent.append(attempt)
+        return "text"
+
+    assert hedger.run("model", call) == "text"
+    capacity.set()
+
+    assert primary_gave_up.wait(5)
+    assert sent == [attempts[1]]
+
+
+def test_hedger_records_only_latency_reported_by_the_call():
+    """Time before the request (e.g. queued for a slot) is not a latency sample."""
+    hedger = Hedger(percentile=50, budget_ratio=1, min_delay=0, workers=2)
+
+    def call(attempt):
+        attempt.record_latency(0.5)
+        return "text"
+
+    hedger.run("model", call)
+    hedger.run("model", lambda attempt: "text")
+
+    assert list(hedger._tracker("model")._latencies) == [0.5]
+
+
+def test_hedger_skips_hedge_without_a_free_slot():
+    hedger = Hedger(percentile=50, budget_ratio=1, min_delay=0, workers=2)
+    _warm(hedger, "model")
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()  # Held by the primary.
+    attempts = []
+
+    def call(attempt):
+        attempts.append(attempt)
+        threading.Event().wait(0.05)
+        return "text"
+
+    assert hedger.run("model", call, slots) == "text"
+    assert len(attempts) == 1
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_hedger_hedge_takes_and_returns_its_own_slot():
+    hedger = Hedger(percentile=50, budget_ratio=1, min_delay=0, workers=2)
+    _warm(hedger, "model")
+    slots = threading.BoundedSemaphore(2)
+    slots.acquire()  # Held by the primary.
+    release_primary = threading.Event()
+    attempts = []
+
+    def call(attempt):
+        attempts.append(attempt)
+        if len(attempts) == 1:
+            release_primary.wait(5)
+        return "text"
+
+    try:
+        assert hedger.run("model", call, slots) == "text"
+    finally:
+        release_primary.set()
+    assert hedger.stats()["hedged"] == 1
+    assert slots.acquire(timeout=5)  # The hedge gave its slot back.
@@ -0,0 +1,58 @@
+# tests/test_leases.py
+import json
+import time
+
+from src.leases import LeaseManager
+
+
+def test_lease_is_exclusive_between_replicas(tmp_path):
+    """Only one replica can hold the lease for a file."""
+    replica_a = LeaseManager(tmp_path, ttl_seconds=60)
+    replica_b = LeaseManager(tmp_path, ttl_seconds=60)
+
+    assert replica_a.try_acquire("route:/file.pdf") is True
+    assert replica_b.try_acquire("route:/file.pdf") is False
+    assert replica_b.try_acquire("route:/other.pdf") is True
+
+    replica_a.close()
+    replica_b.close()
+
+
+def test_released_lease_can_be_claimed(tmp_path):
+    """A released lease is immediately available to other replicas."""
+    replica_a = LeaseManager(tmp_path, ttl_seconds=60)
+    replica_b = LeaseManager(tmp_path, ttl_seconds=60)
+
+    replica_a.try_acquire("key")
+    replica_a.release("key")
+
+    assert replica_b.try_acquire("key") is True
+    replica_a.close()
+    replica_b.close()
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    """A lease that its owner stopped renewing expires and can be taken over."""
+    crashed = LeaseManager(tmp_path, ttl_seconds=0.05)
+    crashed._stop.set()  # Simulate a replica that no longer sends heartbeats
+    crashed.try_acquire("key")
+    survivor = LeaseManager(tmp_path, ttl_seconds=60)
+
+    assert survivor.try_acquire("key") is False
+    time.sleep(0.1)
+    assert survivor.try_acquire("key") is True
+    survivor.close()
+
+
+def test_heartbeat_renews_held_leases(tmp_path):
+    """The heartbeat keeps extending the expiry of a held lease."""
+    replica = LeaseManager(tmp_path, ttl_seconds=0.3)
+    replica.try_acquire("key")
+    lease_path = replica._lease_path("key")
+    first_expiry = json.loads(lease_path.read_text())["expires_at"]
+
+    time.sleep(0.5)
+
+    assert json.loads(lease_path.read_text())["expires_at"] > first_expiry
+    assert LeaseManager(tmp_path, ttl_seconds=60).try_acquire("key") is False
+    replica.close()
@@ -0,0 +1,50 @@
+# tests/test_ledger.py
+from datetime import datetime, timezone
+
+from src.ledger import ProcessedLedger, file_revision, get_ledger
+from src.storage.dto import FileMetadata
+
+
+def _entry(revision="rev1", modified=None):
+    return FileMetadata(
+        id="/src/a.pdf",
+        name="a.pdf",
+        path="/src/a.pdf",
+        revision=revision,
+        modified=modified,
+    )
+
+
+def test_file_revision_falls_back_to_modified_time():
+    modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert file_revision(_entry()) == "rev1"
+    assert file_revision(_entry(None, modified)) == modified.isoformat()
+    assert file_revision(_entry(None)) == ""
+
+
+def test_ledger_matches_route_file_and_revision(tmp_path):
+    ledger = ProcessedLedger(tmp_path / "ledger.sqlite3")
+    assert not ledger.is_processed("route", _entry())
+
+    ledger.record("route", _entry(), "/dest/recognized_a.pdf")
+
+    assert ledger.is_processed("route", _entry())
+    assert not ledger.is_processed("other", _entry())
+    # A modified file is a new revision and must be processed again.
+    assert not ledger.is_processed("route", _entry("rev2"))
+
+
+def test_ledger_persists_across_instances(tmp_path):
+    path = tmp_path / "state" / "ledger.sqlite3"
+    ledger = ProcessedLedger(path)
+    ledger.record("route", _entry())
+    ledger.close()
+
+    assert ProcessedLedger(path).is_processed("route", _entry())
+
+
+def test_get_ledger_is_disabled_without_path(mock_settings, tmp_path):
+    assert get_ledger() is None
+
+    mock_settings.LEDGER_PATH = tmp_path / "ledger.sqlite3"
+    assert get_ledger() is get_ledger()
@@ -0,0 +1,76 @@
+# tests/test_log_handlers.py
+import json
+import logging
+import pytest
+
+from src.log_handlers import JsonFormatter, start_queue_logging, stop_queue_logging
+
+
+@pytest.fixture
+def root_logger():
+    """Restores the root logger's handlers and level after a test."""
+    logger = logging.getLogger()
+    handlers, level = list(logger.handlers), logger.level
+    yield logger
+    stop_queue_logging()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    for handler in handlers:
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+
+def test_json_formatter_writes_one_object_per_record():
+    record = logging.LogRecord(
+        "src.processing", logging.INFO, __file__, 1, "Page %d of %s", (2, "a.pdf"), None
+    )
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Page 2 of a.pdf"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "src.processing"
+
+
+def test_queue_logging_formats_on_the_listener_thread():
+    records = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            records.append((record.getMessage(), record.args))
+
+    handler = start_queue_logging([Capture()])
+    logger = logging.getLogger("test.queue")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning("Uploading chunk for %s (offset: %d)...", "/a.pdf", 42)
+    finally:
+        stop_queue_logging()
+        logger.removeHandler(handler)
+        logger.propagate = True
+
+    # The record reached the writer with its arguments still unformatted.
+    assert records == [("Uploading chunk for /a.pdf (offset: 42)...", ("/a.pdf", 42))]
+
+
+def test_setup_logging_writes_rotating_json_log_from_a_queue(
+    root_logger, mock_settings, tmp_path
+):
+    from src.main import setup_logging
+
+    log_file = tmp_path / "app.log"
+    mock_settings.LOG_FORMAT = "json"
+    mock_settings.LOG_QUEUE = True
+    mock_settings.LOG_MAX_BYTES = 300
+    mock_settings.LOG_BACKUP_COUNT = 2
+    mock_settings.LOG_FILE = log_file
+    setup_logging()
+    for i in range(10):
+        logging.info("Recognizing page %d/%d...", i + 1, 10)
+    stop_queue_logging()
+
+    lines = log_file.read_text().splitlines()
+    assert lines and all(json.loads(line)["level"] == "INFO" for line in lines)
+    assert (tmp_path / "app.log.1").exists()
+    assert not (tmp_path / "app.log.3").exists()
@@ -1,6 +1,15 @@
 # tests/test_main.py
-from unittest.mock import patch, MagicMock
-from src.main import initialize_storage_client
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import ANY, patch, MagicMock
+from src.main import initialize_storage_client, main_workflow, warm_up_clients
+from src.exceptions import PermanentError
+from src.processing import FileResult
+from src.routes import Route
+from src.storage.dto import FileMetadata
 from src.config import Settings
 from src.dbox import DropboxClient
 import dropbox.exceptions
@@ -41,6 +50,7 @@ def test_initialize_storage_client_dropbox_success(MockDropbox):
         app_key="test_key",
         app_secret="test_secret",
         oauth2_refresh_token="some_token",
+        session=ANY,
     )
     mock_dbx_instance.users_get_current_account.assert_called_once()
 
@@ -124,6 +134,8 @@ def test_initialize_storage_client_gdrive_returns_tuple(mock_init_gdrive):
     settings.GDRIVE_SOURCE_FOLDER_ID = "gdrive_source"
     settings.GDRIVE_DEST_FOLDER_ID = "gdrive_dest"
     settings.GDRIVE_FAILED_FOLDER_ID = "gdrive_failed"
+    settings.GDRIVE_CREDENTIALS_JSON = "gdrive_credentials"
+    settings.GDRIVE_TOKEN_JSON = "gdrive_token"
     mock_gdrive_client = MagicMock()
     mock_init_gdrive.return_value = mock_gdrive_client
 
@@ -137,4 +149,494 @@ def test_initialize_storage_client_gdrive_returns_tuple(mock_init_gdrive):
     assert result[1] == "gdrive_source"
     assert result[2] == "gdrive_dest"
     assert result[3] == "gdrive_failed"
-    mock_init_gdrive.assert_called_once_with(settings)
+    mock_init_gdrive.assert_called_once_with("gdrive_credentials", "gdrive_token")
+
+
+def test_main_module_does_not_import_provider_sdks():
+    """
+    Ensures importing src.main stays cheap: provider SDKs and the processing
+    pipeline are loaded only when they are needed.
+    """
+    code = (
+        "import sys, src.main; "
+        "print(sorted(m for m in ('dropbox', 'googleapiclient', 'openai', "
+        "'pdf2image', 'reportlab') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+@patch("src.main.initialize_route_client")
+@patch("src.main._warm_up_recognition")
+def test_warm_up_clients_initializes_storage_and_recognition(
+    mock_warm_up_recognition, mock_init_route_client
+):
+    """Ensures warm-up initializes every route client and the recognition client."""
+    routes = [
+        Route("a", "dropbox", "", "/dest", "/failed"),
+        Route("b", "gdrive", "src", "dst", "failed"),
+    ]
+    clients = {"a": MagicMock(), "b": MagicMock()}
+    mock_init_route_client.side_effect = lambda route: clients[route.name]
+
+    result = warm_up_clients(routes)
+
+    assert result == [clients["a"], clients["b"]]
+    assert mock_init_route_client.call_count == 2
+    mock_warm_up_recognition.assert_called_once()
+
+
+@patch("src.main.initialize_route_client")
+@patch("src.main._warm_up_recognition", side_effect=RuntimeError("no network"))
+def test_warm_up_clients_tolerates_recognition_failure(
+    mock_warm_up_recognition, mock_init_route_client
+):
+    """A failing recognition warm-up must not prevent the storage clients from being returned."""
+    mock_client = MagicMock()
+    mock_init_route_client.return_value = mock_client
+
+    assert warm_up_clients([Route("a", "dropbox", "", "/d", "/f")]) == [mock_client]
+
+
+def _file(name, file_id=None):
+    return FileMetadata(id=file_id or f"/src/{name}", name=name, path=f"/src/{name}")
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_interleaves_files_across_routes(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings
+):
+    """Files of several routes are served in round-robin order by one process."""
+    mock_settings.WORKER_COUNT = 1
+    mock_settings.ROUTES = [
+        Route("alice", "dropbox", "/a", "/a-out", "/a-failed"),
+        Route("bob", "dropbox", "/b", "/b-out", "/b-failed"),
+    ]
+    mock_get_settings.return_value = mock_settings
+    alice, bob = MagicMock(), MagicMock()
+    alice.list_files.return_value = [_file("a1.pdf"), _file("a2.pdf"), _file("a3.pdf")]
+    bob_listed = threading.Event()
+
+    def list_bob(folder_id):
+        yield _file("b1.pdf")
+        yield _file("notes.txt")
+        bob_listed.set()
+
+    bob.list_files.side_effect = list_bob
+    mock_warm_up.return_value = [alice, bob]
+    # The first file starts while bob's folder is still listed; hold it until
+    # the listing is done so the round-robin order is deterministic.
+    mock_process.side_effect = lambda *args, **kwargs: bob_listed.wait(5)
+
+    main_workflow()
+
+    processed = [c.args[1].name for c in mock_process.call_args_list]
+    assert processed == ["a1.pdf", "b1.pdf", "a2.pdf", "a3.pdf"]
+    # Storage clients are wrapped in the route's circuit breaker.
+    assert mock_process.call_args_list[1].args[0].client is bob
+    assert mock_process.call_args_list[1].args[2] == "/b-out"
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_starts_processing_before_listing_finishes(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings
+):
+    """The first files of a large folder are processed while it is still listed."""
+    mock_settings.ROUTES = [Route("alice", "dropbox", "/a", "/a-out", "/a-failed")]
+    mock_get_settings.return_value = mock_settings
+    first_processed = threading.Event()
+    client = MagicMock()
+
+    def list_files(folder_id):
+        yield _file("a1.pdf")
+        assert first_processed.wait(5)
+        yield _file("a2.pdf")
+
+    client.list_files.side_effect = list_files
+    mock_warm_up.return_value = [client]
+    mock_process.side_effect = lambda *args, **kwargs: first_processed.set()
+
+    result = main_workflow()
+
+    assert [c.args[1].name for c in mock_process.call_args_list] == ["a1.pdf", "a2.pdf"]
+    assert (result.found, result.started, result.progressed) == (2, 2, 2)
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_skips_route_without_client(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings
+):
+    """A route whose client failed to initialize does not block the other routes."""
+    mock_settings.ROUTES = [
+        Route("broken", "gdrive", "s", "d", "f"),
+        Route("ok", "dropbox", "/a", "/a-out", "/a-failed"),
+    ]
+    mock_get_settings.return_value = mock_settings
+    ok_client = MagicMock()
+    ok_client.list_files.return_value = [_file("a1.pdf")]
+    mock_warm_up.return_value = [None, ok_client]
+
+    main_workflow()
+
+    mock_process.assert_called_once_with(
+        ANY, ok_client.list_files()[0], "/a-out", delete_source=True
+    )
+    assert mock_process.call_args.args[0].client is ok_client
+
+
+@patch("src.processing.process_single_file", side_effect=PermanentError("bad pdf"))
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_quarantines_permanent_failures(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings
+):
+    """A permanent error moves the source file to the route's failed folder."""
+    mock_get_settings.return_value = mock_settings
+    client = MagicMock()
+    client.list_files.return_value = [_file("a1.pdf")]
+    mock_warm_up.return_value = [client]
+
+    main_workflow()
+
+    client.move_file.assert_called_once_with("/src/a1.pdf", "/failed", None)
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.get_lease_manager")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_skips_files_leased_by_another_replica(
+    mock_get_settings,
+    mock_warm_up,
+    mock_get_lease_manager,
+    mock_process,
+    mock_settings,
+):
+    """Files whose lease is held elsewhere are skipped; acquired leases are released."""
+    mock_get_settings.return_value = mock_settings
+    client = MagicMock()
+    client.list_files.return_value = [_file("mine.pdf"), _file("theirs.pdf")]
+    mock_warm_up.return_value = [client]
+    lease_manager = mock_get_lease_manager.return_value
+    lease_manager.try_acquire.side_effect = lambda key: key.endswith("mine.pdf")
+
+    main_workflow()
+
+    mock_process.assert_called_once_with(
+        ANY, client.list_files()[0], "/dest", delete_source=True
+    )
+    lease_manager.release.assert_called_once_with("dropbox:/src/mine.pdf")
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.get_lease_manager")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_batches_deferred_storage_operations(
+    mock_get_settings,
+    mock_warm_up,
+    mock_get_lease_manager,
+    mock_process,
+    mock_settings,
+):
+    """With DEFER_STORAGE_OPS, deletes and moves are submitted in batches after the run."""
+    mock_settings.DEFER_STORAGE_OPS = True
+    mock_get_settings.return_value = mock_settings
+    client = MagicMock()
+    client.list_files.return_value = [_file("good.pdf"), _file("bad.pdf")]
+    client.delete_files.return_value = {"/src/good.pdf": None}
+    client.move_files.return_value = {"/src/bad.pdf": None}
+    mock_warm_up.return_value = [client]
+
+    def process(storage_client, entry, destination_path, delete_source):
+        if entry.name == "bad.pdf":
+            raise PermanentError("bad pdf")
+        return FileResult(pages=1)
+
+    mock_process.side_effect = process
+    lease_manager = mock_get_lease_manager.return_value
+    lease_manager.try_acquire.return_value = True
+    lease_manager.release.side_effect = lambda key: (
+        client.delete_files.assert_called_once()
+    )
+
+    main_workflow()
+
+    assert all(c.kwargs["delete_source"] is False for c in mock_process.call_args_list)
+    client.delete_file.assert_not_called()
+    client.move_file.assert_not_called()
+    client.delete_files.assert_called_once_with(["/src/good.pdf"])
+    assert list(client.move_files.call_args.args[0]) == [
+        ("/src/bad.pdf", "/failed", None)
+    ]
+    # Leases are only released once the batches have been submitted.
+    assert lease_manager.release.call_count == 2
+
+
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_pulls_no_files_while_recognition_circuit_is_open(
+    mock_get_settings, mock_warm_up, mock_settings
+):
+    """An open recognition circuit stops the run before any listing or download."""
+    from src.circuit_breaker import get_recognition_breaker
+
+    mock_get_settings.return_value = mock_settings
+    breaker = get_recognition_breaker()
+    for _ in range(mock_settings.CIRCUIT_FAILURE_THRESHOLD):
+        breaker.record_failure(ConnectionError("down"))
+
+    main_workflow()
+
+    mock_warm_up.assert_not_called()
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_skips_route_with_open_storage_circuit(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings
+):
+    from src.circuit_breaker import get_storage_breaker
+
+    mock_get_settings.return_value = mock_settings
+    client = MagicMock()
+    client.list_files.return_value = [_file("a1.pdf")]
+    mock_warm_up.return_value = [client]
+    breaker = get_storage_breaker("dropbox")
+    for _ in range(mock_settings.CIRCUIT_FAILURE_THRESHOLD):
+        breaker.record_failure(ConnectionError("down"))
+
+    main_workflow()
+
+    client.list_files.assert_not_called()
+    mock_process.assert_not_called()
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_reuses_output_of_duplicate_content(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings, tmp_path
+):
+    """A file with already processed content is resolved without being processed."""
+    mock_settings.DEDUP_INDEX_PATH = tmp_path / "dedup.sqlite3"
+    mock_get_settings.return_value = mock_settings
+    first = _file("a.pdf")
+    first.content_hash = "hash"
+    client = MagicMock()
+    client.list_files.return_value = [first]
+    client.copy_file.return_value = "/dest/recognized_b.pdf"
+    mock_warm_up.return_value = [client]
+    mock_process.return_value = FileResult(pages=1, output_id="/dest/recognized_a.pdf")
+
+    main_workflow()
+
+    second = _file("b.pdf")
+    second.content_hash = "hash"
+    client.list_files.return_value = [second]
+
+    main_workflow()
+
+    mock_process.assert_called_once()
+    client.copy_file.assert_called_once_with(
+        "/dest/recognized_a.pdf", "/dest", "recognized_b.pdf"
+    )
+    client.delete_file.assert_called_once_with("/src/b.pdf")
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_processes_duplicate_whose_output_is_gone(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings, tmp_path
+):
+    from src.dedup import get_dedup_index
+
+    mock_settings.DEDUP_INDEX_PATH = tmp_path / "dedup.sqlite3"
+    mock_get_settings.return_value = mock_settings
+    get_dedup_index().record("dropbox", "hash", "/dest/removed.pdf")
+    entry = _file("b.pdf")
+    entry.content_hash = "hash"
+    client = MagicMock()
+    client.list_files.return_value = [entry]
+    client.copy_file.side_effect = Exception("not found")
+    mock_warm_up.return_value = [client]
+    mock_process.return_value = FileResult(pages=1, output_id="/dest/recognized_b.pdf")
+
+    main_workflow()
+
+    mock_process.assert_called_once()
+    assert get_dedup_index().lookup("dropbox", "hash") == "/dest/recognized_b.pdf"
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_only_retries_delete_of_processed_file(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings, tmp_path
+):
+    """A file whose delete failed after processing is not recognized again."""
+    mock_settings.LEDGER_PATH = tmp_path / "ledger.sqlite3"
+    mock_get_settings.return_value = mock_settings
+    entry = _file("a.pdf")
+    entry.revision = "rev1"
+    client = MagicMock()
+    client.list_files.return_value = [entry]
+    mock_warm_up.return_value = [client]
+    mock_process.return_value = FileResult(pages=1, output_id="/dest/recognized_a.pdf")
+
+    main_workflow()
+    main_workflow()
+
+    mock_process.assert_called_once()
+    client.delete_file.assert_called_once_with("/src/a.pdf")
+
+    entry.revision = "rev2"
+    main_workflow()
+
+    assert mock_process.call_count == 2
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_reports_files_left_queued(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings
+):
+    """With MAX_FILES_PER_RUN, the rest of the files wait for the next run."""
+    mock_settings.MAX_FILES_PER_RUN = 2
+    mock_get_settings.return_value = mock_settings
+    client = MagicMock()
+    client.list_files.return_value = [_file(f"{i}.pdf") for i in range(3)]
+    mock_warm_up.return_value = [client]
+    mock_process.return_value = FileResult(pages=1, output_id=None)
+
+    result = main_workflow()
+
+    assert (result.found, result.started) == (3, 2)
+    assert mock_process.call_count == 2
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_records_token_usage_per_file(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings, tmp_path
+):
+    from src.usage import TokenUsage, get_usage_store
+
+    mock_settings.USAGE_DB_PATH = tmp_path / "usage.sqlite3"
+    mock_get_settings.return_value = mock_settings
+    client = MagicMock()
+    client.list_files.return_value = [_file("a.pdf")]
+    mock_warm_up.return_value = [client]
+    mock_process.return_value = FileResult(pages=2, usage=TokenUsage(500, 80, 0.01))
+
+    main_workflow()
+
+    (route_usage,) = (
+        get_usage_store().daily_usage(time.strftime("%Y-%m-%d", time.gmtime())).values()
+    )
+    assert route_usage["pages"] == 2
+    assert route_usage["prompt_tokens"] == 500
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_logs_models_and_escalations_per_file(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings, caplog
+):
+    mock_get_settings.return_value = mock_settings
+    client = MagicMock()
+    client.list_files.return_value = [_file("a.pdf")]
+    mock_warm_up.return_value = [client]
+    mock_process.return_value = FileResult(
+        pages=3, escalated_pages=1, page_models=["fast", "strong", "fast"]
+    )
+
+    with caplog.at_level("INFO"):
+        main_workflow()
+
+    assert (
+        "Pages per model: {'fast': 2, 'strong': 1}, 1 re-recognized at a higher DPI."
+        in caplog.text
+    )
+
+
+@patch("src.main.run_scheduled")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_flushes_deferred_operations_when_the_run_fails(
+    mock_get_settings, mock_warm_up, mock_run_scheduled, mock_settings
+):
+    """Leases released after the flush are not held forever by a failed run."""
+    import pytest
+
+    mock_settings.DEFER_STORAGE_OPS = True
+    mock_get_settings.return_value = mock_settings
+    client = MagicMock()
+    client.list_files.return_value = [_file("a.pdf")]
+    mock_warm_up.return_value = [client]
+    release_lease = MagicMock()
+
+    def fail_after_first_job(scheduler, handler, workers, max_jobs, listing_done):
+        listing_done.wait(5)
+        _, job = scheduler.next_job()
+        job.deferred.call_after_flush(release_lease)
+        raise RuntimeError("boom")
+
+    mock_run_scheduled.side_effect = fail_after_first_job
+
+    with pytest.raises(RuntimeError, match="boom"):
+        main_workflow()
+
+    release_lease.assert_called_once()
+
+
+def test_flush_deferred_operations_continues_after_a_route_fails():
+    """One route's failing flush does not keep the other routes from flushing."""
+    from src.main import _flush_deferred_operations
+
+    broken, ok = MagicMock(), MagicMock()
+    broken.flush.side_effect = RuntimeError("boom")
+    ok.flush.return_value = {}
+
+    _flush_deferred_operations({"broken": broken, "ok": ok})
+
+    ok.flush.assert_called_once()
+
+
+@patch("src.processing.process_single_file")
+@patch("src.main.warm_up_clients")
+@patch("src.main.get_settings")
+def test_main_workflow_file_failing_transiently_is_not_progress_twice(
+    mock_get_settings, mock_warm_up, mock_process, mock_settings
+):
+    """A file retried run after run only counts as progress when first seen."""
+    from src.exceptions import TransientError
+
+    mock_settings.ROUTES = [Route("alice", "dropbox", "/a", "/a-out", "/a-failed")]
+    mock_get_settings.return_value = mock_settings
+    client = MagicMock()
+    client.list_files.return_value = [_file("stuck.pdf")]
+    mock_warm_up.return_value = [client]
+    mock_process.side_effect = TransientError("429 Too Many Requests")
+
+    first, second = main_workflow(), main_workflow()
+
+    assert (first.found, first.progressed) == (1, 1)
+    assert (second.found, second.progressed) == (1, 0)
@@ -85,3 +85,17 @@ def test_create_reflowed_pdf_font_fallback(
     assert style_used.fontName == "Helvetica"
 
     mock_doc.build.assert_called_once()
+
+
+@patch("src.pdf_utils.get_settings")
+def test_create_reflowed_pdf_into_buffer(mock_get_settings, mock_settings):
+    """The PDF can be rendered into an in-memory buffer."""
+    import io
+
+    mock_get_settings.return_value = mock_settings
+    mock_settings.FONT_PATH.exists.return_value = False
+    buffer = io.BytesIO()
+
+    create_reflowed_pdf(["Page 1", "Page 2"], buffer)
+
+    assert buffer.getvalue().startswith(b"%PDF")
@@ -0,0 +1,87 @@
+# tests/test_polling.py
+from src.polling import AdaptivePoller, RunResult, get_poller
+
+
+def test_poller_backs_off_while_idle_up_to_ceiling():
+    poller = AdaptivePoller(min_interval=5, max_interval=60, backoff=2)
+
+    delays = [poller.next_delay(RunResult()) for _ in range(5)]
+
+    assert delays == [10, 20, 40, 60, 60]
+
+
+def test_poller_polls_tightly_after_activity():
+    poller = AdaptivePoller(min_interval=5, max_interval=60, backoff=2)
+    for _ in range(4):
+        poller.next_delay(RunResult())
+
+    assert poller.next_delay(RunResult(found=2, started=2, progressed=2)) == 5
+    assert poller.next_delay(RunResult()) == 10
+
+
+def test_poller_reruns_immediately_when_files_are_left_queued():
+    poller = AdaptivePoller(min_interval=5, max_interval=60, backoff=2)
+
+    assert poller.next_delay(RunResult(found=10, started=4, progressed=4)) == 0
+    assert poller.next_delay(RunResult()) == 10
+
+
+def test_poller_backs_off_on_a_file_that_keeps_failing():
+    """A file listed on every run without leaving the folder is not activity."""
+    poller = AdaptivePoller(min_interval=5, max_interval=60, backoff=2)
+    delays = []
+    for _ in range(4):
+        poller.record_listed(("route", "/src/stuck.pdf", "rev1"))
+        delays.append(
+            poller.next_delay(
+                RunResult(found=1, started=1, progressed=poller.take_progress())
+            )
+        )
+
+    assert delays == [5, 10, 20, 40]
+
+
+def test_poller_counts_new_revisions_and_completed_files_as_progress():
+    poller = AdaptivePoller(min_interval=5, max_interval=60, backoff=2)
+    poller.record_listed(("route", "/src/a.pdf", "rev1"))
+    poller.take_progress()
+
+    poller.record_listed(("route", "/src/a.pdf", "rev1"))
+    assert poller.take_progress() == 0
+    poller.record_listed(("route", "/src/a.pdf", "rev2"))
+    poller.record_progress(("route", "/src/a.pdf", "rev2"))
+    poller.record_progress(("route", "/src/b.pdf", "rev1"))
+    assert poller.take_progress() == 2
+
+
+def test_poller_does_not_rerun_immediately_without_progress():
+    poller = AdaptivePoller(min_interval=5, max_interval=60, backoff=2)
+
+    assert poller.next_delay(RunResult(found=10, started=4)) == 10
+
+
+def test_poller_reports_listings_and_pickup_latency():
+    poller = AdaptivePoller(min_interval=5, max_interval=60, backoff=2)
+    poller.record_listing()
+    poller.record_listing()
+    poller.record_pickup(10)
+    poller.record_pickup(30)
+    poller.record_pickup(-1)  # A provider clock ahead of ours.
+
+    stats = poller.stats()
+
+    assert stats["listings"] == 2
+    assert stats["pickups"] == 3
+    assert stats["pickup_mean"] == 40 / 3
+    assert stats["pickup_max"] == 30
+
+
+def test_get_poller_uses_settings(mock_settings):
+    mock_settings.POLL_MIN_SECONDS = 3
+    mock_settings.LOOP_SLEEP_SECONDS = 300
+    mock_settings.POLL_BACKOFF = 1.5
+
+    poller = get_poller()
+
+    assert (poller.min_interval, poller.max_interval, poller.backoff) == (3, 300, 1.5)
+    assert get_poller() is poller
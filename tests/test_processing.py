@@ -4,6 +4,8 @@ from unittest.mock import patch, MagicMock
 from pathlib import Path
 from src.processing import process_single_file
 from src.exceptions import PermanentError
+from src.recognition import RecognitionResult
+from src.usage import TokenUsage
 
 # Fixtures for mock_settings and mock_storage_client can be used from conftest.py
 
@@ -12,7 +14,7 @@ from src.exceptions import PermanentError
 @patch("src.processing.os.remove")
 @patch("src.processing.get_settings")
 @patch("src.processing.convert_from_path")
-@patch("src.processing.recognize")
+@patch("src.processing.recognize_page")
 @patch("src.processing.create_reflowed_pdf")
 def test_process_single_file_success(
     mock_create_pdf,
@@ -37,7 +39,12 @@ def test_process_single_file_success(
     mock_settings.LOCAL_BUF_DIR = Path("/tmp/buf")
     mock_settings.DST_FOLDER = "/processed"
 
-    process_single_file(mock_storage_client, file_entry, mock_settings.DST_FOLDER)
+    result = process_single_file(
+        mock_storage_client,
+        file_entry,
+        mock_settings.DST_FOLDER,
+        work_dir=Path("/tmp/buf"),
+    )
 
     # Asserts
     mock_storage_client.download_file.assert_called_once()
@@ -51,6 +58,8 @@ def test_process_single_file_success(
     )
     mock_storage_client.delete_file.assert_called_once_with("file_id_123")
     assert mock_os_remove.call_count == 2  # local_pdf_path and result_pdf_path
+    assert result.pages == 1
+    assert result.output_id == mock_storage_client.upload_file.return_value
 
 
 @patch("src.processing.get_settings")
@@ -58,7 +67,11 @@ def test_process_single_file_success(
     "src.processing.convert_from_path", side_effect=Exception("PDF processing failed")
 )
 def test_process_single_file_permanent_error(
-    mock_convert_from_path, mock_get_settings, mock_settings, mock_storage_client
+    mock_convert_from_path,
+    mock_get_settings,
+    mock_settings,
+    mock_storage_client,
+    tmp_path,
 ):
     """Test that a permanent error is raised when PDF processing fails."""
     # Setup
@@ -68,8 +81,209 @@ def test_process_single_file_permanent_error(
 
     # Action and Asserts
     with pytest.raises(PermanentError):
-        process_single_file(mock_storage_client, file_entry, "dummy_dest_path")
+        process_single_file(
+            mock_storage_client, file_entry, "dummy_dest_path", work_dir=tmp_path
+        )
 
     mock_storage_client.download_file.assert_called_once()
     mock_storage_client.upload_file.assert_not_called()
     mock_storage_client.delete_file.assert_not_called()
+
+
+@patch("src.processing.recognize_page", return_value=RecognitionResult("text", "gpt-4"))
+@patch("src.processing.convert_from_path", return_value=[MagicMock()])
+@patch("src.processing.create_reflowed_pdf")
+def test_process_single_file_uses_a_spool_job_dir(
+    mock_create_pdf,
+    mock_convert_from_path,
+    mock_recognize,
+    mock_settings,
+    mock_storage_client,
+    tmp_path,
+):
+    """Without work_dir, files go to a per-job spool directory removed afterwards."""
+    mock_settings.LOCAL_BUF_DIR = tmp_path
+    file_entry = MagicMock(size=1000)
+    file_entry.name = "test.pdf"
+
+    process_single_file(mock_storage_client, file_entry, "/processed")
+
+    local_path = mock_storage_client.download_file.call_args.args[1]
+    assert local_path.parent.parent == tmp_path
+    assert local_path.parent.name.startswith("job-")
+    assert list(tmp_path.iterdir()) == []
+
+
+@patch("src.processing.recognize_page", return_value=RecognitionResult("text", "gpt-4"))
+@patch("src.processing.convert_from_bytes", return_value=[MagicMock()])
+@patch("src.processing.convert_from_path")
+@patch("src.processing.create_reflowed_pdf")
+def test_process_single_file_small_file_in_memory(
+    mock_create_pdf,
+    mock_convert_from_path,
+    mock_convert_from_bytes,
+    mock_recognize,
+    mock_settings,
+    mock_storage_client,
+):
+    """Files below IN_MEMORY_MAX_BYTES never touch the filesystem."""
+    mock_settings.IN_MEMORY_MAX_BYTES = 10_000
+    mock_settings.LOCAL_BUF_DIR = MagicMock()  # Any filesystem use would fail
+    mock_storage_client.download_bytes.return_value = b"%PDF-data"
+    mock_create_pdf.side_effect = lambda texts, buffer: buffer.write(b"%PDF-result")
+    file_entry = MagicMock(id="file_id", size=1000)
+    file_entry.name = "test.pdf"
+
+    result = process_single_file(mock_storage_client, file_entry, "/processed")
+
+    mock_storage_client.download_bytes.assert_called_once_with("file_id")
+    mock_convert_from_bytes.assert_called_once_with(b"%PDF-data", dpi=300)
+    mock_convert_from_path.assert_not_called()
+    mock_storage_client.upload_bytes.assert_called_once_with(
+        b"%PDF-result", folder_id="/processed", filename="recognized_test.pdf"
+    )
+    mock_storage_client.download_file.assert_not_called()
+    mock_storage_client.delete_file.assert_called_once_with("file_id")
+    assert result.pages == 1
+    assert result.output_id == mock_storage_client.upload_bytes.return_value
+
+
+@patch("src.processing.image_to_base64", side_effect=lambda image: image)
+@patch("src.processing.recognize_page")
+@patch("src.processing.convert_from_path")
+@patch("src.processing.create_reflowed_pdf")
+def test_process_single_file_escalates_poor_pages(
+    mock_create_pdf,
+    mock_convert_from_path,
+    mock_recognize,
+    mock_image_to_base64,
+    mock_settings,
+    mock_storage_client,
+    tmp_path,
+):
+    """Only pages with a poor result are re-rasterized at the next DPI."""
+    mock_settings.PDF_DPI_LADDER = [100, 200, 300]
+    mock_convert_from_path.side_effect = lambda path, dpi, **kwargs: (
+        [f"page{kwargs['first_page']}@{dpi}"] if kwargs else ["page1@100", "page2@100"]
+    )
+    results = {
+        "page1@100": "A clear first page of handwritten notes.",
+        "page2@100": "???",
+        "page2@200": "Second page [illegible] word",
+        "page2@300": "Second page with every word readable.",
+    }
+    mock_recognize.side_effect = lambda image: RecognitionResult(
+        results[image], "gpt-4", usage=TokenUsage(100, 10)
+    )
+    file_entry = MagicMock(id="file_id")
+    file_entry.name = "test.pdf"
+
+    result = process_single_file(
+        mock_storage_client, file_entry, "/processed", work_dir=tmp_path
+    )
+
+    assert mock_convert_from_path.call_args_list[0].kwargs == {"dpi": 100}
+    assert [c.kwargs for c in mock_convert_from_path.call_args_list[1:]] == [
+        {"dpi": 200, "first_page": 2, "last_page": 2},
+        {"dpi": 300, "first_page": 2, "last_page": 2},
+    ]
+    assert mock_create_pdf.call_args.args[0] == [
+        results["page1@100"],
+        results["page2@300"],
+    ]
+    assert result.escalated_pages == 1
+    # Tokens of the discarded low-DPI attempts count towards the file.
+    assert result.usage == TokenUsage(400, 40)
+
+
+@patch("src.sharding.pdfinfo_from_path", return_value={"Pages": 5})
+@patch("src.processing.image_to_base64", side_effect=lambda image: image)
+@patch("src.processing.recognize_page")
+@patch("src.processing.convert_from_path")
+@patch("src.processing.create_reflowed_pdf")
+def test_process_single_file_shards_large_pdf(
+    mock_create_pdf,
+    mock_convert_from_path,
+    mock_recognize,
+    mock_image_to_base64,
+    mock_pdfinfo,
+    mock_settings,
+    mock_storage_client,
+    tmp_path,
+):
+    """Large PDFs are recognized in page-range shards, merged in page order,
+    and a shard failing transiently is retried on its own."""
+    from src.exceptions import TransientError
+
+    mock_settings.SHARD_MIN_PAGES = 4
+    mock_settings.SHARD_PAGES = 2
+    mock_convert_from_path.side_effect = lambda path, dpi, first_page, last_page: [
+        f"page{n}" for n in range(first_page, last_page + 1)
+    ]
+    attempts = []
+
+    def recognize(image):
+        attempts.append(image)
+        if image == "page3" and attempts.count("page3") == 1:
+            raise TransientError("Recognition API connection error")
+        return RecognitionResult(f"text of {image}", "gpt-4")
+
+    mock_recognize.side_effect = recognize
+    file_entry = MagicMock(id="file_id")
+    file_entry.name = "big.pdf"
+
+    result = process_single_file(
+        mock_storage_client, file_entry, "/processed", work_dir=tmp_path
+    )
+
+    assert sorted(
+        (c.kwargs["first_page"], c.kwargs["last_page"])
+        for c in mock_convert_from_path.call_args_list
+    ) == [(1, 2), (3, 4), (3, 4), (5, 5)]
+    assert mock_create_pdf.call_args.args[0] == [
+        f"text of page{n}" for n in range(1, 6)
+    ]
+    assert attempts.count("page1") == 1
+    assert result.pages == 5
+
+
+@patch(
+    "src.processing.image_to_base64", side_effect=lambda image: image.getpixel((0, 0))
+)
+@patch("src.processing.recognize_page")
+@patch("src.processing.convert_from_path")
+@patch("src.processing.create_reflowed_pdf")
+def test_process_single_file_tiles_dense_pages(
+    mock_create_pdf,
+    mock_convert_from_path,
+    mock_recognize,
+    mock_image_to_base64,
+    mock_settings,
+    mock_storage_client,
+    tmp_path,
+):
+    """A dense page is recognized in overlapping bands and stitched in order."""
+    from PIL import Image, ImageDraw
+
+    mock_settings.TILE_MAX_BANDS = 2
+    mock_settings.TILE_DENSITY_PER_BAND = 0.1
+    mock_settings.TILE_OVERLAP = 0.1
+    # Ink all over: black at the top, dark grey from row 400, where the second
+    # band (rows 450-1000) starts.
+    page = Image.new("L", (100, 1000), 0)
+    ImageDraw.Draw(page).rectangle((0, 400, 99, 999), fill=50)
+    mock_convert_from_path.return_value = [page]
+    band_texts = {0: "line one\nline two", 50: "line two\nline three"}
+    mock_recognize.side_effect = lambda top_pixel: RecognitionResult(
+        band_texts[top_pixel], "gpt-4", usage=TokenUsage(100, 10)
+    )
+    file_entry = MagicMock(id="file_id")
+    file_entry.name = "dense.pdf"
+
+    result = process_single_file(
+        mock_storage_client, file_entry, "/processed", work_dir=tmp_path
+    )
+
+    assert mock_create_pdf.call_args.args[0] == ["line one\nline two\nline three"]
+    assert result.pages == 1
+    assert result.usage == TokenUsage(200, 20)
@@ -0,0 +1,58 @@
+# tests/test_profiling.py
+import pstats
+import tracemalloc
+
+import pytest
+
+from src.profiling import StageProfiler, profile_file, profile_stage
+
+
+@pytest.fixture
+def traced():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+
+def _busy():
+    return sum(i * i for i in range(20000))
+
+
+def test_profile_helpers_are_no_ops_when_disabled(tmp_path):
+    with profile_stage("convert"):
+        with profile_file("a.pdf"):
+            _busy()
+
+
+def test_stage_profiler_writes_reports(traced, tmp_path):
+    profiler = StageProfiler()
+
+    with profiler.file("big.pdf"):
+        with profiler.stage("convert"):
+            _busy()
+            # Nested stages count towards the outer one.
+            with profiler.stage("encode"):
+                data = [bytes(1000) for _ in range(100)]
+        with profiler.stage("convert"):
+            _busy()
+    del data
+
+    summary_path = profiler.write_reports(tmp_path)
+
+    summary = summary_path.read_text()
+    assert "convert" in summary and "encode" not in summary.split("---")[0]
+    assert "_busy" in summary
+    assert "big.pdf" in summary
+    pstats_files = list(tmp_path.glob("*.convert.pstats"))
+    assert len(pstats_files) == 1
+    calls = pstats.Stats(str(pstats_files[0])).stats
+    assert any(func[2] == "_busy" and stat[1] == 2 for func, stat in calls.items())
+
+
+def test_stage_profiler_starts_over_after_reports(traced, tmp_path):
+    profiler = StageProfiler()
+    with profiler.stage("upload"):
+        _busy()
+
+    assert profiler.write_reports(tmp_path) is not None
+    assert profiler.write_reports(tmp_path) is None
@@ -23,3 +23,269 @@ def test_recognize_success(MockOpenAI, mock_get_settings, mock_settings):
     # Asserts
     assert recognized_text == "Recognized text"
     mock_openai_client.chat.completions.create.assert_called_once()
+
+
+def _timeout_error():
+    import openai
+
+    return openai.APITimeoutError(request=MagicMock())
+
+
+@patch("src.recognition.recognize")
+def test_recognize_page_escalates_through_cascade(mock_recognize, mock_settings):
+    """Poor results and timeouts move a page to the next model; the model is recorded."""
+    from src.cascade import CascadeModel
+    from src.cascade import get_model_usage
+    from src.recognition import recognize_page
+
+    mock_settings.RECOGNITION_CASCADE = [
+        CascadeModel("fast", concurrency=8, timeout_seconds=10),
+        CascadeModel("medium", concurrency=4, timeout_seconds=30),
+        CascadeModel("strong", concurrency=2, timeout_seconds=120),
+    ]
+    mock_recognize.side_effect = ["???", _timeout_error(), "Readable handwritten text."]
+
+    result = recognize_page("img")
+
+    assert result.text == "Readable handwritten text."
+    assert result.model == "strong"
+    assert result.escalations == ("short", "timeout")
+    assert [c.args[:3] for c in mock_recognize.call_args_list] == [
+        ("img", "fast", 10),
+        ("img", "medium", 30),
+        ("img", "strong", 120),
+    ]
+    assert get_model_usage() == {"strong": 1}
+    assert [c.kwargs["timeout_escalates"] for c in mock_recognize.call_args_list] == [
+        True,
+        True,
+        False,
+    ]
+
+
+@patch("src.recognition.recognize", return_value="???")
+def test_recognize_page_accepts_last_model_and_custom_rule(
+    mock_recognize, mock_settings
+):
+    from src.cascade import CascadeModel
+    from src.recognition import recognize_page, register_escalation_rule
+
+    mock_settings.RECOGNITION_CASCADE = [CascadeModel("fast"), CascadeModel("strong")]
+    register_escalation_rule("always", lambda text: "always")
+    mock_settings.CASCADE_ESCALATION_RULE = "always"
+
+    result = recognize_page("img")
+
+    assert result.model == "strong"
+    assert result.text == "???"
+
+
+@patch("src.recognition.recognize", return_value="Some text")
+def test_recognize_page_without_cascade_uses_recognition_model(
+    mock_recognize, mock_settings
+):
+    from src.recognition import recognize_page
+
+    result = recognize_page("img")
+
+    assert result.model == "gpt-4"
+    mock_recognize.assert_called_once_with(
+        "img", "gpt-4", None, [], timeout_escalates=False, attempt=None
+    )
+
+
+@patch("src.recognition.get_hedger")
+@patch("src.recognition.recognize", return_value="Some text")
+def test_recognize_page_hedges_when_enabled(
+    mock_recognize, mock_get_hedger, mock_settings
+):
+    from src.hedging import HedgeAttempt
+    from src.recognition import recognize_page
+
+    mock_settings.HEDGE_REQUESTS = True
+    mock_get_hedger.return_value.run.side_effect = lambda key, call, slots: call(
+        attempt
+    )
+    attempt = HedgeAttempt()
+
+    result = recognize_page("img")
+
+    assert result.text == "Some text"
+    assert mock_get_hedger.return_value.run.call_args.args[0] == "gpt-4"
+    mock_recognize.assert_called_once_with(
+        "img", "gpt-4", None, [], timeout_escalates=False, attempt=attempt
+    )
+
+
+@patch("src.recognition.OpenAI")
+def test_recognize_balances_over_endpoints(MockOpenAI, mock_settings):
+    """With RECOGNITION_ENDPOINTS, requests go to per-endpoint clients and failures count."""
+    import openai
+    import pytest
+    from src.endpoints import Endpoint
+    from src.recognition import get_endpoint_pool
+
+    mock_settings.RECOGNITION_ENDPOINTS = [
+        Endpoint("a", "http://a", api_key="key-a"),
+        Endpoint("b", "http://b"),
+    ]
+    clients = {"http://a": MagicMock(), "http://b": MagicMock()}
+    MockOpenAI.side_effect = lambda base_url, api_key: clients[base_url]
+    response = MagicMock()
+    response.choices[0].message.content = "text"
+    clients["http://a"].chat.completions.create.return_value = response
+    clients["http://b"].chat.completions.create.side_effect = openai.APIConnectionError(
+        request=MagicMock()
+    )
+
+    assert recognize("img") == "text"
+    with pytest.raises(openai.APIConnectionError):
+        recognize("img")
+
+    MockOpenAI.assert_any_call(base_url="http://a", api_key="key-a")
+    MockOpenAI.assert_any_call(base_url="http://b", api_key="test_api_key")
+    stats = get_endpoint_pool().stats()
+    assert stats["a"]["requests"] == 1 and stats["a"]["errors"] == 0
+    assert stats["b"]["requests"] == 1 and stats["b"]["errors"] == 1
+
+
+@patch("src.recognition.get_openai_client")
+def test_recognize_opens_circuit_on_repeated_outages(mock_get_client, mock_settings):
+    import openai
+    import pytest
+    from src.exceptions import CircuitOpenError
+
+    create = mock_get_client.return_value.chat.completions.create
+    create.side_effect = openai.APIConnectionError(request=MagicMock())
+
+    for _ in range(mock_settings.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(openai.APIConnectionError):
+            recognize("img")
+    with pytest.raises(CircuitOpenError):
+        recognize("img")
+
+    assert create.call_count == mock_settings.CIRCUIT_FAILURE_THRESHOLD
+
+
+@patch("src.recognition.get_openai_client")
+def test_recognize_timeouts_that_escalate_do_not_open_circuit(
+    mock_get_client, mock_settings
+):
+    """Fast-tier timeouts route pages onward; only final-tier timeouts are outages."""
+    import openai
+    import pytest
+    from src.circuit_breaker import CLOSED, OPEN, get_recognition_breaker
+
+    client = mock_get_client.return_value
+    client.chat.completions.create.side_effect = _timeout_error()
+    client.with_options.return_value.chat.completions.create.side_effect = (
+        _timeout_error()
+    )
+
+    for _ in range(mock_settings.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(openai.APITimeoutError):
+            recognize("img", "fast", 10, timeout_escalates=True)
+    assert get_recognition_breaker().state == CLOSED
+
+    for _ in range(mock_settings.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(openai.APITimeoutError):
+            recognize("img", "strong", 120)
+    assert get_recognition_breaker().state == OPEN
+
+
+@patch("src.recognition.get_openai_client")
+def test_recognize_page_escalates_after_one_timed_out_attempt(
+    mock_get_client, mock_settings
+):
+    """Non-final tiers are not retried by the client, so their timeout is the budget."""
+    from src.cascade import CascadeModel
+    from src.recognition import recognize_page
+
+    mock_settings.RECOGNITION_CASCADE = [
+        CascadeModel("fast", timeout_seconds=10),
+        CascadeModel("strong"),
+    ]
+    client = mock_get_client.return_value
+    no_retries = client.with_options.return_value.chat.completions.create
+    no_retries.side_effect = _timeout_error()
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = "Readable handwritten text."
+    client.chat.completions.create.return_value = response
+
+    result = recognize_page("img")
+
+    assert result.model == "strong"
+    client.with_options.assert_called_once_with(max_retries=0)
+    no_retries.assert_called_once()
+    assert no_retries.call_args.kwargs["timeout"] == 10
+    client.chat.completions.create.assert_called_once()
+
+
+@patch("src.recognition.get_openai_client")
+def test_recognize_cancelled_hedge_sends_no_request(mock_get_client, mock_settings):
+    import pytest
+    from src.circuit_breaker import CLOSED, get_recognition_breaker
+    from src.hedging import HedgeAttempt, HedgeCancelled
+
+    attempt = HedgeAttempt()
+    attempt.cancelled.set()
+
+    with pytest.raises(HedgeCancelled):
+        recognize("img", attempt=attempt)
+
+    mock_get_client.return_value.chat.completions.create.assert_not_called()
+    assert get_recognition_breaker().state == CLOSED
+
+
+@patch("src.recognition.get_openai_client")
+def test_recognize_reports_request_latency_to_hedge_attempt(
+    mock_get_client, mock_settings
+):
+    from src.hedging import HedgeAttempt, LatencyTracker
+
+    tracker = LatencyTracker()
+    mock_get_client.return_value.chat.completions.create.return_value = MagicMock()
+
+    recognize("img", attempt=HedgeAttempt(tracker))
+
+    assert len(tracker._latencies) == 1
+
+
+@patch("src.recognition.get_openai_client")
+def test_recognize_records_token_usage(mock_get_client, mock_settings):
+    from src.usage import TokenUsage, get_usage_meter
+
+    mock_settings.TOKEN_PRICES = {"gpt-4": [10, 30]}
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = "text"
+    response.usage.prompt_tokens = 1000
+    response.usage.completion_tokens = 100
+    mock_get_client.return_value.chat.completions.create.return_value = response
+    usage = []
+
+    recognize("img", usage=usage)
+
+    assert usage == [TokenUsage(1000, 100, 0.013)]
+    assert get_usage_meter().stats()["gpt-4"]["prompt_tokens"] == 1000
+
+
+@patch("src.recognition.recognize")
+def test_recognize_page_sums_usage_of_all_cascade_tiers(mock_recognize, mock_settings):
+    from src.cascade import CascadeModel
+    from src.recognition import recognize_page
+    from src.usage import TokenUsage
+
+    mock_settings.RECOGNITION_CASCADE = [CascadeModel("fast"), CascadeModel("strong")]
+
+    def fake_recognize(img, model, timeout, usage, **kwargs):
+        usage.append(TokenUsage(100, 10 if model == "fast" else 50))
+        return "???" if model == "fast" else "Readable handwritten text."
+
+    mock_recognize.side_effect = fake_recognize
+
+    result = recognize_page("img")
+
+    assert result.model == "strong"
+    assert result.usage == TokenUsage(200, 60)
@@ -0,0 +1,166 @@
+# tests/test_scheduler.py
+import threading
+import time
+
+import pytest
+
+from src.scheduler import CostModel, FairScheduler, run_scheduled
+
+
+def test_next_job_round_robins_across_routes():
+    """Jobs are interleaved across routes regardless of insertion order."""
+    scheduler = FairScheduler(max_in_flight_per_route=10)
+    for i in range(3):
+        scheduler.add("big", f"big-{i}")
+    scheduler.add("small", "small-0")
+
+    order = []
+    while (scheduled := scheduler.next_job()) is not None:
+        order.append(scheduled[1])
+
+    assert order == ["big-0", "small-0", "big-1", "big-2"]
+
+
+def test_next_job_respects_in_flight_limit():
+    """A route at its in-flight limit is skipped until a job finishes."""
+    scheduler = FairScheduler(max_in_flight_per_route=1)
+    scheduler.add("a", "a-0")
+    scheduler.add("a", "a-1")
+
+    assert scheduler.next_job() == ("a", "a-0")
+    assert scheduler.next_job() is None
+    assert scheduler.pending == 1
+
+    scheduler.task_done("a")
+    assert scheduler.next_job() == ("a", "a-1")
+
+
+def test_run_scheduled_runs_every_job_and_survives_errors():
+    """Every job is handled, even when a handler raises."""
+    scheduler = FairScheduler(max_in_flight_per_route=1)
+    for route in ("a", "b"):
+        for i in range(3):
+            scheduler.add(route, f"{route}-{i}")
+    handled = []
+    lock = threading.Lock()
+
+    def handler(route_name, job):
+        with lock:
+            handled.append(job)
+        if job == "a-1":
+            raise RuntimeError("boom")
+
+    assert run_scheduled(scheduler, handler, max_workers=2) == 6
+
+    assert sorted(handled) == ["a-0", "a-1", "a-2", "b-0", "b-1", "b-2"]
+    assert scheduler.pending == 0
+
+
+def test_run_scheduled_starts_at_most_max_jobs():
+    scheduler = FairScheduler(max_in_flight_per_route=2)
+    for i in range(5):
+        scheduler.add("a", i)
+    handled = []
+
+    assert run_scheduled(scheduler, lambda route, job: handled.append(job), 2, 3) == 3
+
+    assert sorted(handled) == [0, 1, 2]
+    assert scheduler.pending == 2
+
+
+def test_run_scheduled_limits_concurrency_per_route():
+    """With one in-flight job per route, a route never runs two jobs at once."""
+    scheduler = FairScheduler(max_in_flight_per_route=1)
+    for i in range(4):
+        scheduler.add("a", i)
+    running, peak = 0, 0
+    lock = threading.Lock()
+
+    def handler(route_name, job):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+
+    run_scheduled(scheduler, handler, max_workers=4)
+
+    assert peak == 1
+
+
+def test_run_scheduled_waits_for_jobs_until_listing_is_done():
+    """Jobs added while the run is going are picked up until the listing ends."""
+    scheduler = FairScheduler()
+    listing_done = threading.Event()
+    seen = []
+
+    def list_jobs():
+        for i in range(3):
+            time.sleep(0.02)
+            scheduler.add("a", i)
+        listing_done.set()
+
+    lister = threading.Thread(target=list_jobs)
+    lister.start()
+    started = run_scheduled(
+        scheduler, lambda route, job: seen.append(job), 2, listing_done=listing_done
+    )
+    lister.join()
+
+    assert started == 3
+    assert seen == [0, 1, 2]
+
+
+def test_sjf_runs_cheapest_jobs_first():
+    """Shortest-job-first orders a route's jobs by estimated cost."""
+    scheduler = FairScheduler(max_in_flight_per_route=10, policy="sjf")
+    now = time.time()
+    scheduler.add("a", "200-pages", cost=200, submitted_at=now)
+    scheduler.add("a", "1-page", cost=1, submitted_at=now)
+    scheduler.add("a", "3-pages", cost=3, submitted_at=now)
+
+    order = [scheduler.next_job()[1] for _ in range(3)]
+
+    assert order == ["1-page", "3-pages", "200-pages"]
+
+
+def test_sjf_aging_prevents_starvation():
+    """A large job that has waited long enough overtakes newer small ones."""
+    scheduler = FairScheduler(max_in_flight_per_route=10, policy="sjf", aging_rate=1.0)
+    now = time.time()
+    scheduler.add("a", "old-large", cost=50, submitted_at=now - 60 * 60)
+    scheduler.add("a", "new-small", cost=1, submitted_at=now)
+
+    assert scheduler.next_job()[1] == "old-large"
+
+
+def test_wait_stats_reports_queue_wait():
+    """Queue wait times are recorded when jobs are started."""
+    scheduler = FairScheduler()
+    assert scheduler.wait_stats()["count"] == 0
+    scheduler.add("a", "job")
+    time.sleep(0.01)
+    scheduler.next_job()
+
+    stats = scheduler.wait_stats()
+    assert stats["count"] == 1
+    assert stats["max"] >= 0.01
+
+
+def test_invalid_policy_raises_error():
+    with pytest.raises(ValueError, match="Invalid scheduling policy"):
+        FairScheduler(policy="random")
+
+
+def test_cost_model_calibrates_from_observed_page_counts():
+    """The size-to-pages estimate converges towards observed page counts."""
+    model = CostModel(bytes_per_page=100_000, smoothing=0.5)
+    assert model.estimate_pages(None) == model.unknown_size_pages
+    assert model.estimate_pages(400_000) == 4
+
+    model.observe(size=200_000, pages=10)  # 20 KB per page
+
+    assert model.bytes_per_page == 60_000
+    assert model.estimate_pages(600_000) == 10
@@ -0,0 +1,62 @@
+# tests/test_sharding.py
+from unittest.mock import patch
+
+import pytest
+
+from src.exceptions import PermanentError, TransientError
+from src.sharding import Shard, plan_shards, run_shards, shard_page_count
+
+
+def test_plan_shards_covers_every_page_once():
+    assert plan_shards(7, 3) == [Shard(0, 1, 3), Shard(1, 4, 6), Shard(2, 7, 7)]
+    assert plan_shards(3, 3) == [Shard(0, 1, 3)]
+
+
+@patch("src.sharding.pdfinfo_from_path", return_value={"Pages": 50})
+def test_shard_page_count_respects_threshold(mock_pdfinfo, mock_settings):
+    assert shard_page_count("/tmp/a.pdf") is None  # Sharding disabled
+    mock_pdfinfo.assert_not_called()
+
+    mock_settings.SHARD_MIN_PAGES = 50
+    assert shard_page_count("/tmp/a.pdf") == 50
+    mock_settings.SHARD_MIN_PAGES = 51
+    assert shard_page_count("/tmp/a.pdf") is None
+
+
+@patch("src.sharding.pdfinfo_from_bytes", side_effect=RuntimeError("bad pdf"))
+def test_shard_page_count_maps_pdfinfo_errors(mock_pdfinfo, mock_settings):
+    mock_settings.SHARD_MIN_PAGES = 10
+
+    with pytest.raises(PermanentError):
+        shard_page_count(b"%PDF-")
+
+
+def test_run_shards_returns_results_in_order(mock_settings):
+    shards = plan_shards(10, 2)
+
+    assert run_shards(shards, lambda shard: shard.first_page) == [1, 3, 5, 7, 9]
+
+
+def test_run_shards_gives_up_after_max_attempts(mock_settings):
+    mock_settings.SHARD_MAX_ATTEMPTS = 2
+    attempts = []
+
+    def process(shard):
+        attempts.append(shard.index)
+        raise TransientError("down")
+
+    with pytest.raises(TransientError):
+        run_shards([Shard(0, 1, 1)], process)
+    assert attempts == [0, 0]
+
+
+def test_run_shards_does_not_retry_permanent_errors(mock_settings):
+    attempts = []
+
+    def process(shard):
+        attempts.append(shard.index)
+        raise PermanentError("corrupt page")
+
+    with pytest.raises(PermanentError):
+        run_shards([Shard(0, 1, 1)], process)
+    assert attempts == [0]
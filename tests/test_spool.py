@@ -0,0 +1,72 @@
+# tests/test_spool.py
+import threading
+import time
+
+from src.spool import SpoolManager, get_spool_manager, spool_reservation
+
+
+def test_job_dirs_are_unique_and_removed(tmp_path):
+    spool = SpoolManager(tmp_path)
+
+    with spool.job_dir() as first, spool.job_dir() as second:
+        assert first != second
+        assert first.is_dir() and second.is_dir()
+        (first / "a.pdf").write_bytes(b"data")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_quota_throttles_new_jobs_until_space_is_released(tmp_path):
+    spool = SpoolManager(tmp_path, quota_bytes=100)
+    started = threading.Event()
+
+    def second_job():
+        with spool.job_dir(60):
+            started.set()
+
+    with spool.job_dir(60):
+        thread = threading.Thread(target=second_job)
+        thread.start()
+        time.sleep(0.1)
+        assert not started.is_set()
+    thread.join(timeout=5)
+
+    assert started.is_set()
+    assert spool.reserved_bytes() == 0
+
+
+def test_job_larger_than_quota_runs_alone(tmp_path):
+    spool = SpoolManager(tmp_path, quota_bytes=100)
+
+    with spool.job_dir(500) as job_dir:
+        assert job_dir.is_dir()
+
+
+def test_cleanup_removes_orphans_but_keeps_active_jobs(tmp_path):
+    (tmp_path / "job-crashed").mkdir()
+    (tmp_path / "job-crashed" / "a.pdf").write_bytes(b"data")
+    (tmp_path / "job-crashed.lock").touch()
+    (tmp_path / "job-nolock").mkdir()
+    spool = SpoolManager(tmp_path)
+
+    with spool.job_dir() as active:
+        assert spool.cleanup_orphans() == 2
+        assert active.is_dir()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_get_spool_manager_uses_settings(mock_settings, tmp_path):
+    mock_settings.LOCAL_BUF_DIR = tmp_path
+    mock_settings.SPOOL_QUOTA_BYTES = 1234
+
+    spool = get_spool_manager()
+
+    assert spool is get_spool_manager()
+    assert spool.root == tmp_path
+    assert spool.quota_bytes == 1234
+
+
+def test_spool_reservation_covers_source_and_result():
+    assert spool_reservation(1000) == 2000
+    assert spool_reservation(None) > 0
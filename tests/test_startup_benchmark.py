@@ -0,0 +1,19 @@
+# tests/test_startup_benchmark.py
+from unittest.mock import patch
+
+from src.routes import Route
+from src.startup_benchmark import PROBES
+
+
+@patch("src.main.initialize_route_client")
+@patch("src.config.get_settings")
+def test_warm_up_probe_runs_against_current_signatures(
+    mock_get_settings, mock_init_route_client, mock_settings
+):
+    """The warm-up probe still matches warm_up_clients and resolve_routes."""
+    mock_settings.ROUTES = [Route("a", "dropbox", "/a", "/a-out", "/a-failed")]
+    mock_get_settings.return_value = mock_settings
+
+    exec(PROBES["warm-up (real settings)"], {})
+
+    mock_init_route_client.assert_called_once_with(mock_settings.ROUTES[0])
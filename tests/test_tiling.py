@@ -0,0 +1,67 @@
+# tests/test_tiling.py
+from PIL import Image, ImageDraw
+
+from src.tiling import (
+    band_count,
+    ink_density,
+    map_bands,
+    plan_bands,
+    split_bands,
+    stitch_texts,
+)
+
+
+def _page(ink_rows: int, height: int = 1000, width: int = 200):
+    """A white page whose top `ink_rows` rows are black."""
+    image = Image.new("RGB", (width, height), "white")
+    if ink_rows:
+        ImageDraw.Draw(image).rectangle((0, 0, width - 1, ink_rows - 1), fill="black")
+    return image
+
+
+def test_ink_density_is_fraction_of_dark_pixels():
+    assert ink_density(_page(0)) == 0
+    assert abs(ink_density(_page(250)) - 0.25) < 0.01
+
+
+def test_band_count_follows_density_within_limits():
+    assert band_count(0.01, 0.04, 4) == 1
+    assert band_count(0.09, 0.04, 4) == 3
+    assert band_count(0.5, 0.04, 4) == 4
+    assert band_count(0.5, 0, 4) == 1
+
+
+def test_plan_bands_cover_page_with_overlap():
+    assert plan_bands(1000, 2, 0.1) == [(0, 550), (450, 1000)]
+    assert plan_bands(900, 3, 0) == [(0, 300), (300, 600), (600, 900)]
+
+
+def test_split_bands_only_splits_dense_pages(mock_settings):
+    assert split_bands(_page(500)) is None  # Tiling disabled.
+
+    mock_settings.TILE_MAX_BANDS = 4
+    mock_settings.TILE_DENSITY_PER_BAND = 0.2
+    mock_settings.TILE_OVERLAP = 0.1
+
+    assert split_bands(_page(100)) is None
+    bands = split_bands(_page(500))
+    assert [band.size for band in bands] == [(200, 366), (200, 400), (200, 366)]
+
+
+def test_stitch_texts_drops_overlapping_lines():
+    texts = [
+        "Meeting notes\nfirst point\nsecond point",
+        "second  point\nthird point\n",
+        "\nfourth point",
+    ]
+    assert stitch_texts(texts) == (
+        "Meeting notes\nfirst point\nsecond point\nthird point\nfourth point"
+    )
+
+
+def test_stitch_texts_keeps_lines_without_overlap():
+    assert stitch_texts(["a\nb", "c\nd"]) == "a\nb\nc\nd"
+
+
+def test_map_bands_keeps_band_order(mock_settings):
+    assert map_bands([3, 1, 2], lambda band: band * 10) == [30, 10, 20]
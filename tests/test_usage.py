@@ -0,0 +1,116 @@
+# tests/test_usage.py
+import threading
+import time
+from types import SimpleNamespace
+
+from src.usage import (
+    TokenBudget,
+    TokenUsage,
+    UsageMeter,
+    UsageStore,
+    completion_usage,
+    get_usage_meter,
+)
+
+
+def _completion(prompt, output):
+    return SimpleNamespace(
+        usage=SimpleNamespace(prompt_tokens=prompt, completion_tokens=output)
+    )
+
+
+def test_completion_usage_prices_tokens_per_million():
+    prices = {"gpt-4o": [2.5, 10]}
+
+    usage = completion_usage(_completion(1000, 200), "gpt-4o", prices)
+
+    assert (usage.prompt_tokens, usage.completion_tokens) == (1000, 200)
+    assert usage.cost == (1000 * 2.5 + 200 * 10) / 1e6
+    assert completion_usage(_completion(1000, 200), "other", prices).cost == 0
+    assert completion_usage(SimpleNamespace(usage=None), "gpt-4o", prices) == (
+        TokenUsage()
+    )
+
+
+def test_token_usage_adds_up():
+    total = TokenUsage(10, 2, 0.5) + TokenUsage(5, 1, 0.25)
+    assert total == TokenUsage(15, 3, 0.75)
+    assert total.total_tokens == 18
+
+
+def test_token_budget_throttles_until_spend_leaves_window():
+    budget = TokenBudget(tokens_per_hour=100, window=0.2)
+    budget.wait()  # Nothing spent yet.
+    budget.record(150)
+
+    started = time.monotonic()
+    budget.wait()
+
+    assert time.monotonic() - started >= 0.15
+    assert budget.spent() == 0
+    assert budget.throttled_seconds > 0
+
+
+def test_token_budget_lets_requests_through_below_limit():
+    budget = TokenBudget(tokens_per_hour=100)
+    budget.record(60)
+    waiter = threading.Thread(target=budget.wait)
+    waiter.start()
+    waiter.join(1)
+    assert not waiter.is_alive()
+
+
+def test_token_budget_of_zero_or_less_never_waits():
+    for tokens_per_hour in (0, -5):
+        budget = TokenBudget(tokens_per_hour=tokens_per_hour)
+        budget.wait()  # Nothing spent yet: used to raise IndexError.
+        budget.record(10)
+        budget.wait()
+
+        assert budget.throttled_seconds == 0
+
+
+def test_usage_meter_aggregates_per_model():
+    meter = UsageMeter()
+    meter.record("fast", TokenUsage(10, 2, 0.1))
+    meter.record("fast", TokenUsage(5, 1, 0.1))
+
+    assert meter.stats() == {
+        "fast": {"prompt_tokens": 15, "completion_tokens": 3, "cost": 0.2}
+    }
+
+
+def test_get_usage_meter_has_budget_only_when_set(mock_settings):
+    assert get_usage_meter().budget is None
+
+    import src.usage
+
+    src.usage._meter = None
+    mock_settings.TOKEN_BUDGET_PER_HOUR = 1000
+    assert get_usage_meter().budget.tokens_per_hour == 1000
+
+
+def test_usage_store_totals_per_route_and_day(tmp_path):
+    store = UsageStore(tmp_path / "usage.sqlite3")
+    store.record_file("alice", "a.pdf", 3, TokenUsage(300, 60, 0.01))
+    store.record_file("alice", "b.pdf", 2, TokenUsage(200, 40, 0.02))
+    store.record_file("bob", "c.pdf", 1, TokenUsage(100, 20, 0.0))
+    today = time.strftime("%Y-%m-%d", time.gmtime())
+
+    usage = store.daily_usage(today)
+
+    assert usage["alice"] == {
+        "files": 2,
+        "pages": 5,
+        "prompt_tokens": 500,
+        "completion_tokens": 100,
+        "cost": 0.03,
+    }
+    assert usage["bob"]["files"] == 1
+    assert store.daily_usage("2000-01-01") == {}
+
+
+def test_get_usage_meter_treats_negative_budget_as_disabled(mock_settings):
+    mock_settings.TOKEN_BUDGET_PER_HOUR = -1
+
+    assert get_usage_meter().budget is None
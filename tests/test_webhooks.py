@@ -0,0 +1,125 @@
+# tests/test_webhooks.py
+import hashlib
+import hmac
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.routes import Route
+from src.webhooks import (
+    WebhookReceiver,
+    WorkflowTrigger,
+    start_webhook_server,
+    stop_webhook_server,
+)
+
+
+def _sign(secret: str, body: bytes) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def test_trigger_wait_times_out_without_notifications():
+    trigger = WorkflowTrigger(debounce=0.01)
+    assert trigger.wait(0.01) is False
+
+
+def test_trigger_coalesces_a_burst_into_one_wake_up():
+    trigger = WorkflowTrigger(debounce=0.05)
+
+    def burst():
+        for _ in range(5):
+            trigger.notify("dropbox")
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=burst)
+    thread.start()
+    assert trigger.wait(5) is True
+    thread.join()
+
+    assert trigger.wait(0.01) is False
+    assert (trigger.notifications, trigger.wake_ups) == (5, 1)
+
+
+def test_trigger_keeps_notifications_that_arrive_between_waits():
+    trigger = WorkflowTrigger(debounce=0)
+    trigger.notify("gdrive")
+    assert trigger.wait(0) is True
+
+
+def test_receiver_verifies_dropbox_signature():
+    trigger = WorkflowTrigger(debounce=0)
+    receiver = WebhookReceiver(trigger, ["secret-a", "secret-b"], None)
+    body = b'{"list_folder": {"accounts": ["dbid:1"]}}'
+
+    assert receiver.dropbox(body, _sign("secret-b", body)) == 200
+    assert receiver.dropbox(body, _sign("wrong", body)) == 403
+    assert receiver.dropbox(body, None) == 403
+    assert trigger.notifications == 1
+
+
+def test_receiver_checks_gdrive_token_and_ignores_sync():
+    trigger = WorkflowTrigger(debounce=0)
+    receiver = WebhookReceiver(trigger, [], "channel-token")
+
+    assert receiver.gdrive("channel-token", "sync") == 200
+    assert trigger.notifications == 0
+    assert receiver.gdrive("channel-token", "change") == 200
+    assert receiver.gdrive("other", "change") == 403
+    assert WebhookReceiver(trigger, [], None).gdrive(None, "change") == 403
+    assert trigger.notifications == 1
+
+
+@pytest.fixture
+def webhook_url(mock_settings):
+    mock_settings.WEBHOOK_PORT = 0
+    mock_settings.WEBHOOK_GDRIVE_TOKEN = "channel-token"
+    routes = [Route("r", "dropbox", "/s", "/d", "/f", dropbox_app_secret="secret")]
+    trigger = start_webhook_server(routes)
+    from src.webhooks import _server
+
+    try:
+        yield f"http://127.0.0.1:{_server.server_address[1]}", trigger
+    finally:
+        stop_webhook_server()
+
+
+def _request(url, data=None, headers=None):
+    request = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, b""
+
+
+def test_server_answers_dropbox_challenge(webhook_url):
+    url, _ = webhook_url
+    assert _request(f"{url}/dropbox?challenge=abc123") == (200, b"abc123")
+
+
+def test_server_wakes_trigger_on_fake_notifications(webhook_url):
+    url, trigger = webhook_url
+    body = b'{"list_folder": {"accounts": ["dbid:1"]}}'
+
+    status, _ = _request(
+        f"{url}/dropbox", body, {"X-Dropbox-Signature": _sign("secret", body)}
+    )
+    assert status == 200
+    status, _ = _request(
+        f"{url}/gdrive",
+        b"",
+        {"X-Goog-Channel-Token": "channel-token", "X-Goog-Resource-State": "change"},
+    )
+    assert status == 200
+    assert _request(f"{url}/dropbox", body, {"X-Dropbox-Signature": "bad"})[0] == 403
+    assert _request(f"{url}/other", b"")[0] == 404
+
+    assert trigger.wait(5) is True
+    assert trigger.notifications == 2
+
+
+def test_start_webhook_server_is_disabled_without_port():
+    assert start_webhook_server([]) is None